@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import Trip
+from .models import Driver, GeocodeCacheEntry, LogSheet, RouteCacheEntry, RouteJob, Trip, Vehicle
 
+admin.site.register(Driver)
+admin.site.register(Vehicle)
 admin.site.register(Trip)
+admin.site.register(LogSheet)
+admin.site.register(GeocodeCacheEntry)
+admin.site.register(RouteCacheEntry)
+admin.site.register(RouteJob)
 # Register your models here.        
\ No newline at end of file
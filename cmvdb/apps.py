@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CmvdbConfig(AppConfig):
+    name = 'cmvdb'
+
+    def ready(self):
+        # connects the response cache's post_save/post_delete receivers
+        from . import response_cache  # noqa: F401
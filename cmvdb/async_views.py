@@ -0,0 +1,122 @@
+"""
+Async versions of the trip endpoints, served under /async/ when running
+under ASGI (see asgi.py). Upstream ORS calls go through httpx, and ORM and
+cache work runs on asyncdb's thread pool rather than sync_to_async's single
+shared thread, so a single worker process can keep many route computations
+in flight. Route planning and the log response are the sync views' own code
+(routing.aplan_route, views.trip_log_response), response caching included.
+
+/async/trips/<id>/status/stream is a server-sent event stream of the trip's
+duty status, so ELD clients can subscribe instead of polling the logs.
+"""
+
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+
+from .asyncdb import database_sync_to_async
+from .listing import ListingError, trip_page
+from .metrics import timer
+from .models import Trip
+from .response_cache import cached_response
+from .routing import RoutingError, aplan_route, wants_geometry
+from .serializers import TripSerializer, render_json
+from .views import trip_log_response
+
+
+def _create_trip(data):
+    serializer = TripSerializer(data=data)
+    if serializer.is_valid():
+        serializer.save()
+        return {"trip": serializer.data}, 201
+    return serializer.errors, 400
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+@cached_response()
+async def trip_list(request):
+    if request.method == 'GET':
+        try:
+            page = await database_sync_to_async(trip_page)(request.GET)
+            return HttpResponse(render_json(page), content_type='application/json')
+        except ListingError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    payload, status = await database_sync_to_async(_create_trip)(data)
+    return JsonResponse(payload, status=status)
+
+
+@require_GET
+async def trip_route(request, id):
+    try:
+        trip = await database_sync_to_async(Trip.objects.get)(pk=id)
+    except Trip.DoesNotExist:
+        return JsonResponse({"error": "Trip not found"}, status=404)
+
+    try:
+        payload = await aplan_route(trip, geometry=wants_geometry(request.GET))
+    except RoutingError as e:
+        return JsonResponse({"error": e.message}, status=e.status_code)
+
+    with timer('serialize'):
+        return JsonResponse(payload)
+
+
+@require_GET
+@cached_response('trip_id')
+async def trip_logs(request, trip_id):
+    return await database_sync_to_async(trip_log_response)(request, trip_id)
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def _status_events(trip):
+    interval = settings.TRIP_STATUS_INTERVAL
+    yield f"retry: {int(interval * 1000)}\n\n"
+    while True:
+        now = timezone.now()
+        status = trip.duty_status(now)
+        yield _event('status', {"trip_id": trip.pk, **status})
+        if status['state'] == 'completed':
+            return
+
+        # push again at the next status change if that comes before the interval
+        delay = interval
+        if 'until' in status:
+            delay = min(delay, max((status['until'] - now).total_seconds(), 0))
+        await asyncio.sleep(delay)
+
+        # pick up edits (PUT, a new route) made while streaming
+        try:
+            await database_sync_to_async(trip.refresh_from_db)(fields=Trip.SCHEDULE_FIELDS)
+        except Trip.DoesNotExist:
+            yield _event('deleted', {"trip_id": trip.pk})
+            return
+
+
+@require_GET
+async def trip_status_stream(request, trip_id):
+    try:
+        trip = await database_sync_to_async(Trip.objects.only(*Trip.SCHEDULE_FIELDS).get)(pk=trip_id)
+    except Trip.DoesNotExist:
+        return JsonResponse({"error": "Trip not found"}, status=404)
+
+    response = StreamingHttpResponse(_status_events(trip), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
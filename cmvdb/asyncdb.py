@@ -0,0 +1,32 @@
+"""
+ORM and cache work for the async views, on a bounded pool of threads.
+
+sync_to_async() runs every call on one shared thread by default, so the
+queries of all in-flight requests queue up behind each other. Wrapping a
+function with database_sync_to_async() runs it on one of ASYNC_DB_WORKERS
+threads instead, each with its own database connection:
+
+    trip = await database_sync_to_async(Trip.objects.get)(pk=id)
+
+Like a sync request, each call first closes its thread's connection if it
+is past CONN_MAX_AGE or unusable. Context variables (metrics stages) follow
+the call into the pool.
+"""
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+db_executor = ThreadPoolExecutor(max_workers=settings.ASYNC_DB_WORKERS, thread_name_prefix='db')
+
+
+def database_sync_to_async(fn):
+    @functools.wraps(fn)
+    def call(*args, **kwargs):
+        close_old_connections()
+        return fn(*args, **kwargs)
+
+    return sync_to_async(call, thread_sensitive=False, executor=db_executor)
@@ -0,0 +1,160 @@
+"""
+Batch route planning for POST /trips/route/batch.
+
+Locations are geocoded once per unique address and each unique lane is routed
+once on a bounded thread pool. A lane's trips are saved in one transaction as
+soon as its route comes back. plan_routes_batch() is a generator, so the view
+can stream each trip's line once that trip is committed. If a lane fails to
+save, its trips get error lines. The summary line always comes last.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import transaction
+
+from . import polyline
+from .geocoding import geocode_locations, normalize_location
+from .models import Trip
+from .ors_client import RoutingError
+from .routing import DEFAULT_PROFILE, apply_route, fetch_directions, round_coords, route_cache, route_key
+from .serializers import TripSerializer
+
+logger = logging.getLogger(__name__)
+
+def resolve_items(items):
+    """Turn trip ids / trip payloads into (index, Trip or None, error) tuples."""
+    ids = [item for item in items if isinstance(item, int) and not isinstance(item, bool)]
+    existing = Trip.objects.in_bulk(ids)
+
+    resolved = []
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            serializer = TripSerializer(data=item)
+            if serializer.is_valid():
+                resolved.append((index, Trip(**serializer.validated_data), None))
+            else:
+                resolved.append((index, None, {"status_code": 400, "error": serializer.errors}))
+        elif not isinstance(item, int) or isinstance(item, bool):
+            resolved.append((index, None, {"status_code": 400, "error": "Expected a trip id or trip object"}))
+        elif item in existing:
+            resolved.append((index, existing[item], None))
+        else:
+            resolved.append((index, None, {"status_code": 404, "error": "Trip not found"}))
+    return resolved
+
+
+def _error(index, trip, error):
+    return {
+        "index": index,
+        "trip_id": trip.pk if trip is not None else None,
+        "status": "error",
+        **error,
+    }
+
+
+def plan_routes_batch(items, workers=None, profile=DEFAULT_PROFILE):
+    workers = workers or settings.ROUTE_BATCH_WORKERS
+    resolved = resolve_items(items)
+    failed = 0
+
+    for index, trip, error in resolved:
+        if error is not None:
+            failed += 1
+            yield _error(index, trip, error)
+    pending = [(index, trip) for index, trip, error in resolved if error is None]
+
+    # geocode every distinct address once
+    locations = {}
+    for _, trip in pending:
+        for location in (trip.pickup_location, trip.dropoff_location):
+            locations.setdefault(normalize_location(location), location)
+    try:
+        coords = dict(zip(locations, geocode_locations(list(locations.values()))))
+    except RoutingError as e:
+        coords = {}
+        geocode_error = {"status_code": e.status_code, "error": e.message}
+    else:
+        geocode_error = {"status_code": 400, "error": "Failed to geocode one or both locations"}
+
+    # group trips by lane so each lane is routed once
+    lanes = {}
+    for index, trip in pending:
+        start = coords.get(normalize_location(trip.pickup_location))
+        end = coords.get(normalize_location(trip.dropoff_location))
+        if not start or not end:
+            failed += 1
+            yield _error(index, trip, geocode_error)
+            continue
+        key = route_key(start, end, profile)
+        lane = lanes.setdefault(key, {"start": start, "end": end, "trips": []})
+        lane["trips"].append((index, trip))
+
+    saved = 0
+    created = {}
+
+    def finish(lane, route):
+        nonlocal failed, saved
+        encoded = polyline.encode(route['coordinates'])
+        trips = lane["trips"]
+        new = {index for index, trip in trips if trip.pk is None}
+        try:
+            with transaction.atomic():
+                for index, trip in trips:
+                    apply_route(trip, route, encoded)
+                    trip.save()
+        except Exception as e:
+            logger.exception("Saving batch routes failed")
+            for index, trip in trips:
+                failed += 1
+                # a rolled-back insert leaves its pk on the instance
+                if index in new:
+                    trip.pk = None
+                yield _error(index, trip, {"status_code": 500, "error": str(e) or e.__class__.__name__})
+            return
+
+        for index, trip in trips:
+            saved += 1
+            if index in new:
+                created[index] = trip.pk
+            yield {
+                "index": index,
+                "trip_id": trip.pk,
+                "status": "ok",
+                "total_distance": trip.total_distance,
+            }
+
+    to_fetch = {}
+    for key, lane in lanes.items():
+        route = route_cache.get(key)
+        if route is not None:
+            yield from finish(lane, route)
+        else:
+            to_fetch[key] = lane
+
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(fetch_directions, round_coords(lane["start"]), round_coords(lane["end"]), profile): key
+                for key, lane in to_fetch.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                lane = to_fetch[key]
+                try:
+                    route = future.result()
+                except RoutingError as e:
+                    for index, trip in lane["trips"]:
+                        failed += 1
+                        yield _error(index, trip, {"status_code": e.status_code, "error": e.message})
+                    continue
+                route_cache.set(key, profile, route)
+                yield from finish(lane, route)
+
+    yield {
+        "done": True,
+        "saved": saved,
+        "failed": failed,
+        "created": created,
+    }
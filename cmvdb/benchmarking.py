@@ -0,0 +1,65 @@
+"""
+Timing and percentile helpers shared by the bench_* management commands.
+
+Latencies are per-call durations in seconds; summaries report them in
+milliseconds. Percentiles use the nearest-rank method on the sorted samples,
+so every reported value is one that was actually measured.
+"""
+
+import gc
+import math
+import time
+import tracemalloc
+
+
+def timed(fn, *args, **kwargs):
+    """(fn's result, seconds it took)."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def best_of(repeat, fn):
+    """(last result, fastest of repeat runs of fn()), for timings that should ignore noise."""
+    timings = []
+    for _ in range(repeat):
+        result, seconds = timed(fn)
+        timings.append(seconds)
+    return result, min(timings)
+
+
+def measure(build):
+    """(build()'s result, seconds, bytes still allocated after it, peak bytes) under tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    result, seconds = timed(build)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, retained, peak
+
+
+def percentile(ordered, q):
+    """The q (0-1) percentile of already sorted samples, by nearest rank."""
+    return ordered[min(max(math.ceil(len(ordered) * q) - 1, 0), len(ordered) - 1)]
+
+
+def latency_stats(latencies):
+    ordered = sorted(latencies)
+    return {
+        'samples': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 4),
+        'p50_ms': round(percentile(ordered, 0.5) * 1000, 4),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 4),
+    }
+
+
+def summarize(name, latencies, elapsed):
+    """latency_stats() plus throughput over elapsed, the wall time the calls took together."""
+    return {
+        'mode': name,
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 1),
+        **latency_stats(latencies),
+    }
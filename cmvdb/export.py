@@ -0,0 +1,129 @@
+"""
+Streaming export of trips and their log sheets for GET /trips/export and
+`manage.py export_trips`.
+
+Trips are read as plain rows through a chunked iterator (a server-side cursor
+on PostgreSQL) and each trip's log sheets are generated from its schedule
+inputs while its row is written, so memory stays flat however many trips are
+exported.
+
+    ndjson  one line per trip: the trip fields plus "log_sheets"/"total_days"
+    csv     one row per log sheet, prefixed with the trip's columns; trips
+            without a schedule get a single row with the sheet columns blank
+"""
+
+import csv
+import json
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .hos import iter_duty_entries, iter_log_sheets
+from .listing import filter_trips
+from .models import Trip
+from .stops import place_route_stops
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+TRIP_COLUMNS = [
+    'id', 'current_location', 'pickup_location', 'dropoff_location',
+    'current_cycle_hours', 'total_distance', 'start_time', 'worked_hours',
+    'fuel_stops', 'pickup_dropoff_time', 'driver', 'vehicle',
+]
+SHEET_COLUMNS = [
+    'day', 'date', 'day_start', 'day_end', 'drive_hours', 'on_duty_hours',
+    'off_duty_hours', 'day_fuel_stops', 'entries',
+]
+
+# flush to the client in blocks rather than one write per row
+BUFFER_SIZE = 64 * 1024
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _trip_rows(trips, chunk_size, log_sheets):
+    # the route geometry is read only to place stops, never written out
+    columns = TRIP_COLUMNS + ['route_polyline'] if log_sheets else TRIP_COLUMNS
+    for values in trips.values_list(*columns).iterator(chunk_size=chunk_size):
+        yield dict(zip(columns, values))
+
+
+def _sheets(trip):
+    duty_entries = iter_duty_entries(
+        trip['total_distance'], trip['fuel_stops'], trip['pickup_location'], trip['dropoff_location']
+    )
+    duty_entries = place_route_stops(duty_entries, trip.pop('route_polyline'), trip['total_distance'])
+    return iter_log_sheets(trip['start_time'], duty_entries)
+
+
+def _ndjson_lines(rows, log_sheets):
+    for trip in rows:
+        sheets = [sheet.to_dict() for sheet in _sheets(trip)] if log_sheets else None
+        trip['start_time'] = _datetime_field.to_representation(trip['start_time'])
+        if log_sheets:
+            trip['log_sheets'] = sheets
+            trip['total_days'] = len(sheets)
+        yield json.dumps(trip) + "\n"
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, log_sheets):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(TRIP_COLUMNS + SHEET_COLUMNS if log_sheets else TRIP_COLUMNS)
+    for trip in rows:
+        prefix = [trip[name] for name in TRIP_COLUMNS]
+        prefix[TRIP_COLUMNS.index('start_time')] = _datetime_field.to_representation(trip['start_time'])
+        if not log_sheets:
+            yield writer.writerow(prefix)
+            continue
+
+        written = False
+        for sheet in _sheets(trip):
+            written = True
+            yield writer.writerow(prefix + [
+                sheet.day,
+                sheet.date.strftime('%Y-%m-%d'),
+                str(sheet.start_time),
+                str(sheet.end_time),
+                round(sheet.drive_hours, 2),
+                round(sheet.on_duty_hours, 2),
+                round(sheet.off_duty_hours, 2),
+                sheet.fuel_stops,
+                json.dumps([entry.to_dict() for entry in sheet.entries]),
+            ])
+        if not written:
+            yield writer.writerow(prefix + [''] * len(SHEET_COLUMNS))
+
+
+def _buffered(lines, size=BUFFER_SIZE):
+    chunk = []
+    length = 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(chunk)
+            chunk = []
+            length = 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def export_trips(fmt='ndjson', params=None, log_sheets=True, chunk_size=None):
+    """Yield the export as text blocks; raises ListingError for bad filters."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    trips = filter_trips(Trip.objects.order_by('id'), params or {})
+    rows = _trip_rows(trips, chunk_size or settings.EXPORT_CHUNK_SIZE, log_sheets)
+    lines = _ndjson_lines(rows, log_sheets) if fmt == 'ndjson' else _csv_lines(rows, log_sheets)
+    return _buffered(lines)
@@ -0,0 +1,159 @@
+import asyncio
+import re
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .asyncdb import database_sync_to_async
+from .metrics import timer
+from .models import GeocodeCacheEntry
+from .routing_backends import get_backend
+
+
+def normalize_location(location):
+    # "Chicago, IL " and "chicago il" share a cache key
+    key = re.sub(r'[^\w\s]', ' ', location.lower())
+    return re.sub(r'\s+', ' ', key).strip()[:200]
+
+
+class GeocodeCache:
+    """In-process LRU backed by the GeocodeCacheEntry table, both with a TTL."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, location):
+        key = normalize_location(location)
+        now = timezone.now()
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                coords, expires_at = cached
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return coords
+                del self._entries[key]
+
+        entry = GeocodeCacheEntry.objects.filter(key=key, expires_at__gt=now).first()
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+            self._remember(key, entry.coords, entry.expires_at)
+        return entry.coords
+
+    def set(self, location, coords):
+        key = normalize_location(location)
+        expires_at = timezone.now() + timedelta(seconds=self.ttl)
+        # single-statement upsert: no read-then-write transaction to contend on
+        GeocodeCacheEntry.objects.bulk_create(
+            [GeocodeCacheEntry(key=key, longitude=coords[0], latitude=coords[1], expires_at=expires_at)],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['longitude', 'latitude', 'expires_at', 'updated_at'],
+        )
+        with self._lock:
+            self._remember(key, list(coords), expires_at)
+
+    def _remember(self, key, coords, expires_at):
+        self._entries[key] = (coords, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def purge_expired(self):
+        deleted, _ = GeocodeCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        GeocodeCacheEntry.objects.all().delete()
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.db_hits
+            lookups = hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'memory_hits': self.memory_hits,
+                'db_hits': self.db_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+geocode_cache = GeocodeCache(settings.GEOCODE_CACHE_SIZE, settings.GEOCODE_CACHE_TTL)
+
+
+def fetch_geocode(location):
+    backend = get_backend()
+    with timer(f'{backend.name}_geocode'):
+        return backend.geocode(location)
+
+
+async def afetch_geocode(location):
+    backend = get_backend()
+    with timer(f'{backend.name}_geocode'):
+        return await backend.ageocode(location)
+
+
+def cached_geocodes(locations):
+    """
+    Cached coordinates for each location (None on a miss), plus the misses
+    to fetch, keyed by normalized location so duplicates are fetched once.
+    """
+    results = [geocode_cache.get(location) for location in locations]
+    missing = {}
+    for location, coords in zip(locations, results):
+        if coords is None:
+            missing.setdefault(normalize_location(location), location)
+    return results, missing
+
+
+def store_geocodes(locations, results, missing, fetched):
+    """Cache `fetched` (coordinates in the order of `missing`) and fill the misses in results."""
+    fetched = dict(zip(missing, fetched))
+    for key, coords in fetched.items():
+        if coords is not None:
+            geocode_cache.set(missing[key], coords)
+    return [coords if coords is not None else fetched[normalize_location(location)]
+            for location, coords in zip(locations, results)]
+
+
+def geocode_locations(locations):
+    """Coordinates for each location (None when it can't be geocoded).
+
+    Cache misses are fetched from the routing backend concurrently; cache reads
+    and writes stay on the calling thread so no extra DB connections are opened.
+    """
+    results, missing = cached_geocodes(locations)
+    if not missing:
+        return results
+    return store_geocodes(locations, results, missing, get_backend().map(fetch_geocode, missing.values()))
+
+
+async def ageocode_locations(locations):
+    """
+    Async counterpart of geocode_locations: misses are fetched with the
+    backend's async calls, and the cache is read and written in one pooled
+    call each (see asyncdb.py).
+    """
+    results, missing = await database_sync_to_async(cached_geocodes)(locations)
+    if not missing:
+        return results
+    fetched = await asyncio.gather(*map(afetch_geocode, missing.values()))
+    return await database_sync_to_async(store_geocodes)(locations, results, missing, fetched)
@@ -0,0 +1,67 @@
+"""
+Recent log sheets per driver or vehicle for GET /drivers/<id>/log-sheets and
+/vehicles/<id>/log-sheets.
+
+Query parameters:
+    since  ISO datetime, default HISTORY_DEFAULT_DAYS before until
+    until  ISO datetime, default now; the window is at most HISTORY_MAX_DAYS
+
+Trips are found through the (driver, start_time) / (vehicle, start_time)
+indexes with driver and vehicle joined in, and their stored sheets come from
+one prefetch, so a request costs the same number of queries however many
+trips it returns. Trips whose sheets were never stored (bulk-created rows) get
+them generated in memory; nothing is written on a read.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .listing import ListingError, parse_time
+from .models import LogSheet, Trip
+
+
+def history_window(params):
+    until = parse_time(params, 'until') or timezone.now()
+    since = parse_time(params, 'since') or until - timedelta(days=settings.HISTORY_DEFAULT_DAYS)
+    if since >= until:
+        raise ListingError("'since' must be before 'until'")
+    if until - since > timedelta(days=settings.HISTORY_MAX_DAYS):
+        raise ListingError(f"The window can span at most {settings.HISTORY_MAX_DAYS} days")
+    return since, until
+
+
+def _trip_history(trip):
+    if trip.log_sheets_updated_at is None:
+        log_sheets = trip.generate_log_sheets()
+    else:
+        log_sheets = [sheet.to_dict() for sheet in trip.log_sheets.all()]
+    return {
+        "id": trip.pk,
+        "start_time": trip.start_time,
+        "pickup_location": trip.pickup_location,
+        "dropoff_location": trip.dropoff_location,
+        "total_distance": trip.total_distance,
+        "driver": {"id": trip.driver.pk, "name": trip.driver.name} if trip.driver else None,
+        "vehicle": {"id": trip.vehicle.pk, "unit_number": trip.vehicle.unit_number} if trip.vehicle else None,
+        "log_sheets": log_sheets,
+        "total_days": len(log_sheets),
+    }
+
+
+def recent_log_sheets(params, **owner):
+    """Trips (oldest first) and their log sheets for owner, e.g. driver_id=1; encode with render_json()."""
+    since, until = history_window(params)
+    trips = (
+        Trip.objects.filter(start_time__gte=since, start_time__lt=until, **owner)
+        .select_related('driver', 'vehicle')
+        .prefetch_related(Prefetch('log_sheets', queryset=LogSheet.objects.order_by('day')))
+        .order_by('start_time')
+    )
+    return {
+        "since": since,
+        "until": until,
+        "trips": [_trip_history(trip) for trip in trips],
+    }
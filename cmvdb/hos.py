@@ -0,0 +1,683 @@
+"""
+Hours-of-service scheduling helpers shared by Trip.generate_log_sheets and
+the batch engine used for replaying many trips at once.
+
+BatchSchedule runs the same rules as Trip.generate_log_sheets (11-hour drive
+limit, 30-minute break after 8 hours of driving, 10-hour reset at 14 hours on
+duty, a 15-minute fuel stop every 1000 miles) for arrays of trips in lockstep
+with NumPy. Its log sheets are identical to the scalar path, including the
+int/float type of every duration, for trips without a stored route: stop
+placement (stops.py) isn't vectorized, so generate_log_sheets_batch sends
+trips that have a route_polyline through Trip.generate_log_sheets instead.
+"""
+
+from datetime import datetime, time as dt_time, timedelta
+
+import numpy as np
+
+DRIVE_SPEED = 60
+MAX_DRIVE_HOURS = 11
+BREAK_AFTER = 8
+OFF_DUTY_RESET = 10
+MAX_ON_DUTY = 14
+FUEL_INTERVAL_MILES = 1000
+CYCLE_LIMIT_HOURS = 70
+CYCLE_DAYS = 8
+RESTART_HOURS = 34
+
+US_PER_HOUR = 3600000000
+PICKUP_US = US_PER_HOUR
+BREAK_US = US_PER_HOUR // 2
+RESET_US = OFF_DUTY_RESET * US_PER_HOUR
+FUEL_US = US_PER_HOUR // 4
+
+
+class DutyEntry:
+    """One duty-status change; turned into the API dict only by to_dict()."""
+
+    __slots__ = ('time', 'status', 'duration', 'activity', 'location', 'coordinates')
+
+    def __init__(self, time, status, duration, activity=None, location=None):
+        self.time = time
+        self.status = status
+        self.duration = duration
+        self.activity = activity
+        self.location = location
+        # [lon, lat], set when stops.place_stops() snaps the entry to a POI
+        self.coordinates = None
+
+    def to_dict(self):
+        entry = {'time': str(self.time), 'status': self.status, 'duration': self.duration}
+        if self.activity is not None:
+            entry['activity'] = self.activity
+        # breaks and resets carry no location unless placed at a POI
+        if self.status != 'OFF' or self.location is not None:
+            entry['location'] = self.location
+        if self.coordinates is not None:
+            entry['coordinates'] = self.coordinates
+        return entry
+
+
+class DailyLog:
+    """One day's entries plus its summary, computed in a single pass."""
+
+    __slots__ = ('trip_start', 'day', 'start_time', 'end_time', 'entries',
+                 'drive_hours', 'on_duty_hours', 'off_duty_hours', 'fuel_stops')
+
+    def __init__(self, trip_start, day, entries, start_time, end_time):
+        self.trip_start = trip_start
+        self.day = day
+        self.start_time = start_time
+        self.end_time = end_time
+        self.entries = entries
+
+        # each total is added in entry order, as the per-status sum()s used to
+        drive_hours = on_duty_hours = off_duty_hours = fuel_stops = 0
+        for entry in entries:
+            status = entry.status
+            if status == 'DR':
+                drive_hours += entry.duration
+                on_duty_hours += entry.duration
+            elif status == 'ON':
+                on_duty_hours += entry.duration
+            elif status in ('OFF', 'SB'):
+                off_duty_hours += entry.duration
+            if entry.activity == 'Fuel stop':
+                fuel_stops += 1
+        self.drive_hours = drive_hours
+        self.on_duty_hours = on_duty_hours
+        self.off_duty_hours = off_duty_hours
+        self.fuel_stops = fuel_stops
+
+    @property
+    def date(self):
+        # Calculate date based on trip start time
+        return (self.trip_start + self.start_time).date()
+
+    def summary(self):
+        return {
+            'drive_hours': round(self.drive_hours, 2),
+            'on_duty_hours': round(self.on_duty_hours, 2),
+            'off_duty_hours': round(self.off_duty_hours, 2),
+            'fuel_stops': self.fuel_stops
+        }
+
+    def to_dict(self):
+        return {
+            'day': self.day,
+            'date': self.date.strftime('%Y-%m-%d'),
+            'start_time': str(self.start_time),
+            'end_time': str(self.end_time),
+            'entries': [entry.to_dict() for entry in self.entries],
+            'summary': self.summary()
+        }
+
+
+ONE_HOUR = timedelta(hours=1)
+BREAK_TIME = timedelta(minutes=30)
+RESET_TIME = timedelta(hours=OFF_DUTY_RESET)
+FUEL_TIME = timedelta(minutes=15)
+
+# off-duty activities that start a new log sheet
+RESET_ACTIVITIES = ('10-hour reset', '34-hour restart')
+
+
+def iter_duty_entries(total_distance, fuel_stops, pickup_location, dropoff_location):
+    """Yield a DutyEntry for each duty-status change of a trip, one day at a time.
+
+    After the pickup hour and each 10-hour reset the clock is fresh, so a day
+    is always: drive up to 11 hours, a 30-minute break, drive whatever is left
+    of the 14-hour window, then reset (a fuel stop can follow either drive).
+    Each day is therefore a fixed sequence instead of a re-checked loop. The
+    remaining hours are still decremented chunk by chunk so every float matches
+    the original step-by-step schedule.
+    """
+    if not total_distance:
+        return
+
+    total_drive_hours = total_distance / DRIVE_SPEED
+    remaining = total_drive_hours
+    fuel_gap = FUEL_INTERVAL_MILES / DRIVE_SPEED
+    fuel_left = fuel_stops
+    time = timedelta(0)
+    on_duty = 0
+
+    yield DutyEntry(time, 'ON', 1.0, 'Pickup', pickup_location)
+    time += ONE_HOUR
+    on_duty += 1
+
+    while remaining > 0:
+        for window_limited in (False, True):
+            # the first drive of a day is capped by the 11-hour limit, the
+            # second by what is left of the 14-hour window
+            cap = MAX_ON_DUTY - on_duty if window_limited else MAX_DRIVE_HOURS
+            drive_chunk = remaining if remaining < cap else cap
+
+            location = f"Route {1 - (remaining / total_drive_hours):.1%}"
+            yield DutyEntry(time, 'DR', drive_chunk, location=location)
+            time += timedelta(hours=drive_chunk)
+            on_duty += drive_chunk
+            remaining -= drive_chunk
+
+            if (fuel_left > 0 and
+                    (total_drive_hours - remaining) >= (fuel_stops - fuel_left + 1) * fuel_gap):
+                yield DutyEntry(time, 'ON', 0.25, 'Fuel stop', location)
+                time += FUEL_TIME
+                on_duty += 0.25
+                fuel_left -= 1
+
+            if remaining <= 0:
+                break
+
+            if not window_limited:
+                yield DutyEntry(time, 'OFF', 0.5, '30-min break')
+                time += BREAK_TIME
+                on_duty += 0.5
+        else:
+            yield DutyEntry(time, 'OFF', OFF_DUTY_RESET, '10-hour reset')
+            time += RESET_TIME
+            on_duty = 0
+
+    yield DutyEntry(time, 'ON', 1.0, 'Drop-off', dropoff_location)
+
+
+def iter_log_sheets(trip_start, duty_entries):
+    """Group iter_duty_entries() output into DailyLogs, yielding each as it closes."""
+    day = 1
+    entries = []
+    for entry in duty_entries:
+        if entry.activity in RESET_ACTIVITIES:
+            yield DailyLog(trip_start, day, entries, entries[0].time, entry.time)
+            day += 1
+            entries = []
+        entries.append(entry)
+
+    if entries:
+        # the last entry is the one-hour drop-off
+        yield DailyLog(trip_start, day, entries, entries[0].time, entries[-1].time + ONE_HOUR)
+
+
+def duty_status(trip_start, duty_entries, now):
+    """
+    Where the schedule stands at `now`: the active duty status and the drive
+    and on-duty hours left before the next 10-hour reset is due. Only the
+    entries up to `now` are consumed.
+    """
+    elapsed = now - trip_start
+    if elapsed < timedelta(0):
+        return {'state': 'scheduled', 'starts_at': trip_start}
+
+    day = 1
+    # counted like iter_duty_entries' on_duty: everything since the last reset
+    shift_drive = shift_on_duty = 0
+    end = None
+    for entry in duty_entries:
+        if entry.activity in RESET_ACTIVITIES:
+            day += 1
+        end = entry.time + timedelta(hours=entry.duration)
+        if elapsed < end:
+            hours_in = (elapsed - entry.time) / ONE_HOUR
+            if entry.activity not in RESET_ACTIVITIES:
+                shift_on_duty += hours_in
+                if entry.status == 'DR':
+                    shift_drive += hours_in
+            status = {
+                'state': 'in_progress',
+                'day': day,
+                'status': entry.status,
+                'activity': entry.activity,
+                'since': trip_start + entry.time,
+                'until': trip_start + end,
+                'remaining_drive_hours': round(max(float(MAX_DRIVE_HOURS - shift_drive), 0.0), 2),
+                'remaining_on_duty_hours': round(max(float(MAX_ON_DUTY - shift_on_duty), 0.0), 2),
+            }
+            if entry.status != 'OFF':
+                status['location'] = entry.location
+            return status
+
+        if entry.activity in RESET_ACTIVITIES:
+            shift_drive = shift_on_duty = 0
+        else:
+            shift_on_duty += entry.duration
+            if entry.status == 'DR':
+                shift_drive += entry.duration
+
+    if end is None:
+        # no distance yet, so nothing has been scheduled
+        return {'state': 'unscheduled'}
+    return {'state': 'completed', 'finished_at': trip_start + end}
+
+
+class CycleError(ValueError):
+    pass
+
+
+class DutyCycle:
+    """
+    A driver's rolling 70-hour/8-day cycle: on-duty hours per calendar day in
+    a ring of CYCLE_DAYS slots (indexed by date ordinal) plus their running
+    total. Charging time or asking what is left only touches the slots for
+    the days that rolled over since the last call, never past trips.
+    """
+
+    __slots__ = ('hours', 'day', 'total', 'off_since')
+
+    def __init__(self, hours=None, day=None, total=0.0, off_since=None):
+        self.hours = list(hours) if hours else [0.0] * CYCLE_DAYS
+        self.day = day
+        self.total = total
+        self.off_since = off_since
+
+    def _roll(self, day):
+        if self.day is None or day - self.day >= CYCLE_DAYS:
+            self.hours = [0.0] * CYCLE_DAYS
+            self.total = 0.0
+        elif day > self.day:
+            for ordinal in range(self.day + 1, day + 1):
+                self.hours[ordinal % CYCLE_DAYS] = 0.0
+            # re-sum the eight slots so float error can't build up over months
+            self.total = sum(self.hours)
+        else:
+            return
+        self.day = day
+
+    def available(self, at):
+        """On-duty hours left in the cycle at `at`."""
+        self._roll(at.date().toordinal())
+        return max(CYCLE_LIMIT_HOURS - self.total, 0.0)
+
+    def charge(self, start, hours):
+        """
+        Book `hours` of on-duty time from `start`, split at midnight, each part
+        in its own day's slot. Raises CycleError for days that have already
+        rolled out of the 8-day window.
+        """
+        end = start + timedelta(hours=hours)
+        while hours > 0:
+            day = start.date().toordinal()
+            self._roll(day)
+            if day <= self.day - CYCLE_DAYS:
+                raise CycleError(f"{start.date()} is outside the cycle's {CYCLE_DAYS}-day window")
+            midnight = datetime.combine(start.date() + timedelta(days=1), dt_time.min, tzinfo=start.tzinfo)
+            part = hours if end <= midnight else (midnight - start) / ONE_HOUR
+            self.hours[day % CYCLE_DAYS] += part
+            self.total += part
+            hours -= part
+            start = midnight
+        # a backdated charge doesn't move the end of the latest duty period back
+        if self.off_since is None or end > self.off_since:
+            self.off_since = end
+
+    def rest(self, until):
+        """Off duty until `until`; 34 consecutive hours off restarts the cycle."""
+        if self.off_since is not None and until - self.off_since >= timedelta(hours=RESTART_HOURS):
+            self.hours = [0.0] * CYCLE_DAYS
+            self.total = 0.0
+        self._roll(until.date().toordinal())
+
+    def summary(self):
+        # oldest day first, ending with self.day
+        days = [round(self.hours[(self.day - offset) % CYCLE_DAYS], 2)
+                for offset in range(CYCLE_DAYS - 1, -1, -1)] if self.day is not None else []
+        return {
+            'used_hours': round(self.total, 2),
+            'available_hours': round(max(CYCLE_LIMIT_HOURS - self.total, 0.0), 2),
+            'daily_on_duty_hours': days,
+            'off_duty_since': self.off_since,
+        }
+
+
+def iter_cycle_duty_entries(cycle, trip_start, total_distance, fuel_stops,
+                            pickup_location, dropoff_location):
+    """
+    iter_duty_entries() with the 70-hour/8-day rule. On-duty time is charged
+    to `cycle` as it is scheduled, a drive is cut short when the cycle runs
+    out and a 34-hour restart is inserted before any on-duty time that would
+    exceed it. `cycle` is left holding the driver's state after the trip.
+    """
+    if not total_distance:
+        return
+
+    total_drive_hours = total_distance / DRIVE_SPEED
+    remaining = total_drive_hours
+    fuel_gap = FUEL_INTERVAL_MILES / DRIVE_SPEED
+    fuel_left = fuel_stops
+    time = timedelta(0)
+    shift_drive = shift_on_duty = 0
+    cycle.rest(trip_start)
+
+    def off_duty(hours, activity):
+        nonlocal time, shift_drive, shift_on_duty
+        yield DutyEntry(time, 'OFF', hours, activity)
+        time += timedelta(hours=hours)
+        if activity in RESET_ACTIVITIES:
+            shift_drive = shift_on_duty = 0
+        else:
+            shift_on_duty += hours
+        cycle.rest(trip_start + time)
+
+    def on_duty(status, hours, activity, location):
+        # returns whether a restart had to come first
+        nonlocal time, shift_drive, shift_on_duty
+        restarted = cycle.available(trip_start + time) < hours
+        if restarted:
+            yield from off_duty(RESTART_HOURS, '34-hour restart')
+        yield DutyEntry(time, status, hours, activity, location)
+        cycle.charge(trip_start + time, hours)
+        time += timedelta(hours=hours)
+        shift_on_duty += hours
+        if status == 'DR':
+            shift_drive += hours
+        return restarted
+
+    yield from on_duty('ON', 1.0, 'Pickup', pickup_location)
+
+    took_break = False
+    while remaining > 0:
+        # as in iter_duty_entries: the first drive of a shift is capped by
+        # the 11-hour limit, the one after the break by the 14-hour window
+        cap = MAX_ON_DUTY - shift_on_duty if took_break else MAX_DRIVE_HOURS - shift_drive
+        cycle_left = cycle.available(trip_start + time)
+        if cycle_left <= 0:
+            yield from off_duty(RESTART_HOURS, '34-hour restart')
+            took_break = False
+            continue
+        if cap <= 0:
+            yield from off_duty(OFF_DUTY_RESET, '10-hour reset')
+            took_break = False
+            continue
+
+        drive_chunk = min(remaining, cap, cycle_left)
+        location = f"Route {1 - (remaining / total_drive_hours):.1%}"
+        yield from on_duty('DR', drive_chunk, None, location)
+        remaining -= drive_chunk
+
+        restarted = False
+        if (fuel_left > 0 and
+                (total_drive_hours - remaining) >= (fuel_stops - fuel_left + 1) * fuel_gap):
+            restarted = yield from on_duty('ON', 0.25, 'Fuel stop', location)
+            fuel_left -= 1
+
+        if remaining <= 0:
+            break
+        if restarted:
+            # the fuel stop already waited out a restart, which also ended the shift
+            took_break = False
+        elif drive_chunk < cap:
+            # stopped by the cycle limit rather than the shift
+            yield from off_duty(RESTART_HOURS, '34-hour restart')
+            took_break = False
+        elif not took_break:
+            yield from off_duty(0.5, '30-min break')
+            took_break = True
+        else:
+            yield from off_duty(OFF_DUTY_RESET, '10-hour reset')
+            took_break = False
+
+    yield from on_duty('ON', 1.0, 'Drop-off', dropoff_location)
+
+
+
+def _summarized_sheet(trip_start, day, entries, start_time, end_time,
+                      drive_hours, on_duty_hours, off_duty_hours, fuel_stops):
+    return {
+        'day': day,
+        'date': (trip_start + start_time).date().strftime('%Y-%m-%d'),
+        'start_time': str(start_time),
+        'end_time': str(end_time),
+        'entries': entries,
+        'summary': {
+            'drive_hours': round(drive_hours, 2),
+            'on_duty_hours': round(on_duty_hours, 2),
+            'off_duty_hours': round(off_duty_hours, 2),
+            'fuel_stops': fuel_stops
+        }
+    }
+
+
+def hours_to_us(hours):
+    """Vectorized timedelta(hours=h) -> microseconds, with timedelta's exact rounding."""
+    whole = np.trunc(hours)
+    scaled = (hours - whole) * float(US_PER_HOUR)
+    scaled_whole = np.trunc(scaled)
+    leftover = scaled - scaled_whole
+    us = whole.astype(np.int64) * US_PER_HOUR + scaled_whole.astype(np.int64)
+    # timedelta rounds the leftover fraction half-to-even on the total
+    return us + np.where(leftover > 0.5, 1, np.where(leftover < 0.5, 0, us & 1))
+
+
+BREAK, RESET, DRIVE, FUEL = range(4)
+
+
+class BatchSchedule:
+    """Duty schedule for many trips, computed with array math.
+
+    Each loop step advances every still-driving trip by one drive chunk. The
+    breaks, resets, drive chunks and fuel stops it produces are kept as flat
+    columns sorted by trip, so trip i's entries are one contiguous slice and
+    log_sheets(i) only has to turn that slice into the dicts
+    Trip.generate_log_sheets returns for a trip without a stored route (no
+    stops are snapped to POIs here).
+    """
+
+    def __init__(self, distances, fuel_stops, start_times, pickups, dropoffs):
+        self.start_times = list(start_times)
+        self.pickups = list(pickups)
+        self.dropoffs = list(dropoffs)
+
+        distances = np.array([d or 0.0 for d in distances], dtype=np.float64)
+        fuel_total = np.asarray(fuel_stops, dtype=np.int64)
+        routed = distances != 0
+
+        n = len(distances)
+        total = distances / DRIVE_SPEED
+        remaining = total.copy()
+        on_duty = np.ones(n)
+        on_duty_int = np.ones(n, dtype=bool)
+        drive = np.zeros(n)
+        drive_int = np.ones(n, dtype=bool)
+        fuel_left = fuel_total.copy()
+        clock = np.full(n, PICKUP_US, dtype=np.int64)
+        fuel_gap = FUEL_INTERVAL_MILES / DRIVE_SPEED
+
+        columns = []
+
+        def record(kind, step, mask, at, duration=None, duration_int=None, progress=None):
+            index = np.flatnonzero(mask)
+            columns.append((
+                index,
+                np.full(len(index), step, dtype=np.int64),
+                np.full(len(index), kind, dtype=np.int64),
+                at[index],
+                duration[index] if duration is not None else np.zeros(len(index)),
+                duration_int[index] if duration_int is not None else np.zeros(len(index), dtype=bool),
+                progress[index] if progress is not None else np.zeros(len(index)),
+            ))
+
+        step = 0
+        active = routed & (remaining > 0)
+        while active.any():
+            took_break = active & (drive >= BREAK_AFTER)
+            record(BREAK, step, took_break, clock)
+            on_duty = np.where(took_break, on_duty + 0.5, on_duty)
+            on_duty_int &= ~took_break
+            drive = np.where(took_break, 0.0, drive)
+            drive_int |= took_break
+            clock += np.where(took_break, BREAK_US, 0)
+
+            took_reset = active & (on_duty >= MAX_ON_DUTY)
+            record(RESET, step, took_reset, clock)
+            clock += np.where(took_reset, RESET_US, 0)
+            on_duty = np.where(took_reset, 0.0, on_duty)
+            on_duty_int |= took_reset
+            drive = np.where(took_reset, 0.0, drive)
+            drive_int |= took_reset
+
+            # min() keeps the first of equal candidates, which decides int vs float
+            by_drive = MAX_DRIVE_HOURS - drive
+            by_duty = MAX_ON_DUTY - on_duty
+            chunk, chunk_int = by_drive, drive_int.copy()
+            use_duty = by_duty < chunk
+            chunk = np.where(use_duty, by_duty, chunk)
+            chunk_int = np.where(use_duty, on_duty_int, chunk_int)
+            use_remaining = remaining < chunk
+            chunk = np.where(use_remaining, remaining, chunk)
+            chunk_int &= ~use_remaining
+
+            drove = active & (chunk > 0)
+            progress = 1 - (remaining / np.where(total == 0, 1, total))
+            record(DRIVE, step, drove, clock, chunk, chunk_int, progress)
+            clock += np.where(drove, hours_to_us(np.where(drove, chunk, 0.0)), 0)
+            on_duty = np.where(drove, on_duty + chunk, on_duty)
+            on_duty_int &= ~drove | chunk_int
+            drive = np.where(drove, drive + chunk, drive)
+            drive_int &= ~drove | chunk_int
+            remaining = np.where(drove, remaining - chunk, remaining)
+
+            fueled = drove & (fuel_left > 0) & (
+                (total - remaining) >= (fuel_total - fuel_left + 1) * fuel_gap
+            )
+            record(FUEL, step, fueled, clock, progress=progress)
+            clock += np.where(fueled, FUEL_US, 0)
+            on_duty = np.where(fueled, on_duty + 0.25, on_duty)
+            on_duty_int &= ~fueled
+            fuel_left -= fueled
+
+            active = drove & (remaining > 0)
+            step += 1
+
+        if columns:
+            trip, steps, kind, at, duration, duration_int, progress = (
+                np.concatenate(column) for column in zip(*columns)
+            )
+        else:
+            trip = steps = kind = at = np.zeros(0, dtype=np.int64)
+            duration = progress = np.zeros(0)
+            duration_int = np.zeros(0, dtype=bool)
+        order = np.lexsort((kind, steps, trip))
+
+        self.routed = routed
+        self.end_clock = clock
+        self.entry_trip = trip[order]
+        self.entry_kind = kind[order]
+        self.entry_clock = at[order]
+        self.entry_duration = duration[order]
+        self.entry_duration_int = duration_int[order]
+        self.entry_progress = progress[order]
+        self.offsets = np.searchsorted(self.entry_trip, np.arange(n + 1))
+        self.days = np.where(routed, 1 + np.bincount(trip[kind == RESET], minlength=n), 0)
+        # plain lists index much faster than numpy scalars when building dicts
+        self._lists = None
+
+    @classmethod
+    def from_trips(cls, trips):
+        return cls(
+            [trip.total_distance for trip in trips],
+            [trip.fuel_stops for trip in trips],
+            [trip.start_time for trip in trips],
+            [trip.pickup_location for trip in trips],
+            [trip.dropoff_location for trip in trips],
+        )
+
+    def __len__(self):
+        return len(self.pickups)
+
+    def log_sheets(self, i):
+        if self._lists is None:
+            self._lists = (
+                self.routed.tolist(), self.offsets.tolist(), self.end_clock.tolist(),
+                self.entry_kind.tolist(), self.entry_clock.tolist(), self.entry_duration.tolist(),
+                self.entry_duration_int.tolist(), self.entry_progress.tolist(),
+            )
+        routed, offsets, end_clock, kinds, clocks, durations, duration_ints, progresses = self._lists
+        if not routed[i]:
+            return []
+
+        trip_start = self.start_times[i]
+        log_sheets = []
+        day = 1
+        day_start = timedelta(0)
+        entries = [{
+            'time': str(day_start),
+            'status': 'ON',
+            'duration': 1.0,
+            'activity': 'Pickup',
+            'location': self.pickups[i]
+        }]
+        # running sums added in entry order, as DailyLog does
+        drive_hours, on_duty_hours, off_duty_hours, fuel_count = 0, 1.0, 0, 0
+
+        for k in range(offsets[i], offsets[i + 1]):
+            kind = kinds[k]
+            time = timedelta(microseconds=clocks[k])
+            if kind == DRIVE:
+                duration = int(durations[k]) if duration_ints[k] else durations[k]
+                entries.append({
+                    'time': str(time),
+                    'status': 'DR',
+                    'duration': duration,
+                    'location': f"Route {progresses[k]:.1%}"
+                })
+                drive_hours += duration
+                on_duty_hours += duration
+            elif kind == FUEL:
+                entries.append({
+                    'time': str(time),
+                    'status': 'ON',
+                    'duration': 0.25,
+                    'activity': 'Fuel stop',
+                    'location': f"Route {progresses[k]:.1%}"
+                })
+                on_duty_hours += 0.25
+                fuel_count += 1
+            elif kind == BREAK:
+                entries.append({
+                    'time': str(time),
+                    'status': 'OFF',
+                    'duration': 0.5,
+                    'activity': '30-min break'
+                })
+                off_duty_hours += 0.5
+            else:
+                log_sheets.append(_summarized_sheet(
+                    trip_start, day, entries, day_start, time,
+                    drive_hours, on_duty_hours, off_duty_hours, fuel_count,
+                ))
+                day += 1
+                day_start = time
+                entries = [{
+                    'time': str(time),
+                    'status': 'OFF',
+                    'duration': OFF_DUTY_RESET,
+                    'activity': '10-hour reset'
+                }]
+                drive_hours, on_duty_hours, off_duty_hours, fuel_count = 0, 0, OFF_DUTY_RESET, 0
+
+        end = timedelta(microseconds=end_clock[i])
+        entries.append({
+            'time': str(end),
+            'status': 'ON',
+            'duration': 1.0,
+            'activity': 'Drop-off',
+            'location': self.dropoffs[i]
+        })
+        log_sheets.append(_summarized_sheet(
+            trip_start, day, entries, day_start, end + timedelta(hours=1),
+            drive_hours, on_duty_hours + 1.0, off_duty_hours, fuel_count,
+        ))
+        return log_sheets
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.log_sheets(i)
+
+
+def generate_log_sheets_batch(trips):
+    """
+    Log sheets for each trip, identical to calling trip.generate_log_sheets()
+    in turn. Trips with a stored route take that scalar path, so their stops
+    are placed at POIs; the rest come from one BatchSchedule.
+    """
+    schedule = BatchSchedule.from_trips(trips)
+    return [trip.generate_log_sheets() if trip.route_polyline else schedule.log_sheets(i)
+            for i, trip in enumerate(trips)]
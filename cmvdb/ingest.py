@@ -0,0 +1,123 @@
+"""
+Bulk trip ingest for POST /trips/bulk and `manage.py ingest_trips`.
+
+Rows are handled in chunks of INGEST_CHUNK_SIZE: each row is validated by one
+reused TripSerializer, the fields Trip.save() derives (fuel_stops,
+worked_hours) are computed for the whole chunk at once, and the chunk is
+inserted with bulk_create in its own transaction. Invalid rows are reported
+by input index and never stop the rest of the batch.
+
+bulk_create skips Trip.save(), so each chunk's log sheets are generated here
+with the batch engine and inserted alongside the trips, and since no
+post_save is sent either, each chunk invalidates the cached trip lists itself.
+"""
+
+from itertools import islice
+
+import numpy as np
+import orjson
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .hos import generate_log_sheets_batch
+from .metrics import timer
+from .models import LogSheet, Trip, log_sheets_digest
+from .response_cache import response_cache
+from .serializers import TripSerializer
+
+
+def parse_ndjson(lines):
+    """Decode NDJSON lines lazily; undecodable lines come through as None."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield None
+
+
+def _validate(serializer, chunk):
+    valid, errors = [], []
+    for index, item in chunk:
+        if not isinstance(item, dict):
+            errors.append({"index": index, "errors": {"non_field_errors": ["Expected a JSON trip object"]}})
+            continue
+        try:
+            valid.append((index, serializer.run_validation(item)))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.detail})
+    return valid, errors
+
+
+def _build_trips(rows):
+    """Trip instances with the fields Trip.save() would derive already set."""
+    distance = np.array(
+        [np.nan if data.get('total_distance') is None else data['total_distance'] for data in rows],
+        dtype=float,
+    )
+    pickup_dropoff_default = Trip._meta.get_field('pickup_dropoff_time').default
+    worked = np.add(
+        [data['current_cycle_hours'] for data in rows],
+        [data.get('pickup_dropoff_time', pickup_dropoff_default) for data in rows],
+    )
+    with np.errstate(invalid='ignore'):
+        fuel_stops = np.floor_divide(distance, 1000)
+
+    trips = []
+    for data, has_distance, stops, hours in zip(
+        rows, (~np.isnan(distance)).tolist(), fuel_stops.tolist(), worked.tolist()
+    ):
+        trip = Trip(**data)
+        if has_distance:
+            trip.fuel_stops = int(stops)
+        # Python's round(), not np.round(): they disagree on some halfway values
+        trip.worked_hours = round(hours, 2)
+        trips.append(trip)
+    return trips
+
+
+def ingest_trips(items, chunk_size=None):
+    """
+    Validate and insert an iterable of trip payloads. Returns
+    {"created", "failed", "ids", "errors"}, where ids are the new trip ids in
+    input order and each error carries the row's input index.
+    """
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+    serializer = TripSerializer()
+    rows = enumerate(items)
+    ids, errors = [], []
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        valid, chunk_errors = _validate(serializer, chunk)
+        errors.extend(chunk_errors)
+        if not valid:
+            continue
+
+        trips = _build_trips([data for _, data in valid])
+        with timer('log_sheets'):
+            sheets = generate_log_sheets_batch(trips)
+        now = timezone.now()
+        for trip, log_sheets in zip(trips, sheets):
+            trip.log_sheets_etag = log_sheets_digest(log_sheets)
+            trip.log_sheets_updated_at = now
+        try:
+            with transaction.atomic():
+                Trip.objects.bulk_create(trips)
+                LogSheet.objects.bulk_create([
+                    LogSheet.from_dict(trip, sheet)
+                    for trip, log_sheets in zip(trips, sheets) for sheet in log_sheets
+                ])
+                response_cache.invalidate_list()
+        except DatabaseError as e:
+            errors.extend({"index": index, "errors": {"non_field_errors": [str(e)]}} for index, _ in valid)
+            continue
+        ids.extend(trip.pk for trip in trips)
+
+    errors.sort(key=lambda error: error["index"])
+    return {"created": len(ids), "failed": len(errors), "ids": ids, "errors": errors}
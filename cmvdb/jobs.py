@@ -0,0 +1,133 @@
+"""
+Database-backed queue for route computations.
+
+POST /trips/<id>/route creates a RouteJob; `manage.py route_worker` runs a
+pool of threads that claim queued jobs, run plan_route() and store the
+payload for GET /jobs/<id>. Jobs that hit an ORS outage go back on the queue
+with run_after pushed out, so they wait for upstream instead of using up
+their attempts.
+"""
+
+import logging
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.db import DatabaseError, close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import RouteJob
+from .ors_client import CircuitOpen, ServiceUnavailable
+from .routing import RoutingError, plan_route
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next_job(worker_id):
+    """Atomically move the oldest runnable queued job to running; None when there is none."""
+    while True:
+        due = Q(run_after__isnull=True) | Q(run_after__lte=timezone.now())
+        job_id = (RouteJob.objects.filter(due, status=RouteJob.QUEUED)
+                  .order_by('created_at', 'pk').values_list('pk', flat=True).first())
+        if job_id is None:
+            return None
+        # compare-and-set on status so two workers can't claim the same job
+        claimed = RouteJob.objects.filter(pk=job_id, status=RouteJob.QUEUED).update(
+            status=RouteJob.RUNNING,
+            worker=worker_id,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return RouteJob.objects.select_related('trip').get(pk=job_id)
+
+
+def run_job(job, max_attempts=3, retry_backoff=5.0):
+    try:
+        result = plan_route(job.trip)
+    except CircuitOpen as e:
+        # never reached upstream: wait for the breaker, and don't count the claim as an attempt
+        _requeue(job, max(e.retry_after, retry_backoff), attempts=F('attempts') - 1)
+    except ServiceUnavailable as e:
+        # upstream is down: put the job back, backing off, unless it has been retried enough
+        if job.attempts < max_attempts:
+            _requeue(job, retry_backoff * 2 ** (job.attempts - 1))
+            return
+        _fail(job, e.message, e.status_code)
+    except RoutingError as e:
+        _fail(job, e.message, e.status_code)
+    except Exception as e:
+        logger.exception("Route job %s failed", job.pk)
+        _fail(job, str(e) or e.__class__.__name__, 500)
+    else:
+        RouteJob.objects.filter(pk=job.pk).update(
+            status=RouteJob.DONE, result=result, finished_at=timezone.now()
+        )
+
+
+def _requeue(job, delay, **fields):
+    RouteJob.objects.filter(pk=job.pk).update(
+        status=RouteJob.QUEUED, worker='', run_after=timezone.now() + timedelta(seconds=delay), **fields
+    )
+
+
+def _fail(job, message, status_code):
+    RouteJob.objects.filter(pk=job.pk).update(
+        status=RouteJob.FAILED, error=message, error_status=status_code,
+        finished_at=timezone.now(),
+    )
+
+
+def requeue_stale_jobs(timeout):
+    """Return jobs stuck in running (e.g. a worker was killed) to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return RouteJob.objects.filter(status=RouteJob.RUNNING, started_at__lt=cutoff).update(
+        status=RouteJob.QUEUED, worker=''
+    )
+
+
+class WorkerPool:
+    def __init__(self, workers=4, poll_interval=1.0, max_attempts=3, retry_backoff=5.0):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.stopping = threading.Event()
+        self.prefix = f"{socket.gethostname()}:{threading.get_native_id()}"
+
+    def work(self, index, exit_when_empty=False):
+        worker_id = f"{self.prefix}:{index}"
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                try:
+                    job = claim_next_job(worker_id)
+                except DatabaseError:
+                    logger.exception("Worker %s could not claim a job", worker_id)
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                if job is None:
+                    if exit_when_empty:
+                        return
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                run_job(job, self.max_attempts, self.retry_backoff)
+        finally:
+            close_old_connections()
+
+    def run(self, exit_when_empty=False):
+        threads = [
+            threading.Thread(target=self.work, args=(i, exit_when_empty), daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
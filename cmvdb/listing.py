@@ -0,0 +1,141 @@
+"""
+Keyset-paginated trip listing for GET /trips/.
+
+Query parameters:
+    limit        page size (default TRIP_LIST_PAGE_SIZE, at most TRIP_LIST_MAX_PAGE_SIZE)
+    ordering     id, -id, start_time or -start_time (default id)
+    cursor       next_cursor from the previous page
+    fields       comma-separated subset of trip fields
+    start_after  only trips with start_time >= this ISO datetime
+    start_before only trips with start_time < this ISO datetime
+    pickup, dropoff, current_location
+                 exact location matches
+
+Pages are fetched with a WHERE on the last row's (start_time, id) rather than
+an OFFSET, so every page costs the same no matter how deep it is.
+"""
+
+import base64
+import json
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+
+from .models import Trip
+from .serializers import TRIP_FIELDS, TripRowSerializer
+
+ORDERINGS = {
+    'id': ('id',),
+    '-id': ('-id',),
+    'start_time': ('start_time', 'id'),
+    '-start_time': ('-start_time', '-id'),
+}
+LOCATION_FILTERS = {
+    'pickup': 'pickup_location',
+    'dropoff': 'dropoff_location',
+    'current_location': 'current_location',
+}
+
+
+class ListingError(ValueError):
+    pass
+
+
+def encode_cursor(ordering, row):
+    values = [row['start_time'].isoformat(), row['id']] if 'start_time' in ordering else [row['id']]
+    raw = json.dumps({'o': ordering, 'v': values}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if data.get('o') != ordering:
+            raise ListingError("Cursor does not match ordering")
+        if 'start_time' not in ordering:
+            return None, int(data['v'][0])
+        start_time = parse_datetime(data['v'][0])
+        if start_time is None:
+            raise ValueError
+        return start_time, int(data['v'][1])
+    except ListingError:
+        raise
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        raise ListingError("Invalid cursor")
+
+
+def parse_time(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ListingError(f"'{name}' must be an ISO 8601 datetime")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def _keyset_filter(ordering, start_time, pk):
+    descending = ordering.startswith('-')
+    after = 'lt' if descending else 'gt'
+    if start_time is None:
+        return Q(**{f'id__{after}': pk})
+    return (Q(**{f'start_time__{after}': start_time}) |
+            Q(start_time=start_time, **{f'id__{after}': pk}))
+
+
+def filter_trips(trips, params):
+    """Apply the start_after/start_before and location filters in params."""
+    start_after = parse_time(params, 'start_after')
+    start_before = parse_time(params, 'start_before')
+    if start_after:
+        trips = trips.filter(start_time__gte=start_after)
+    if start_before:
+        trips = trips.filter(start_time__lt=start_before)
+    for name, field in LOCATION_FILTERS.items():
+        if params.get(name):
+            trips = trips.filter(**{field: params[name]})
+    return trips
+
+
+def trip_page(params):
+    """One page of trips as {"trips": [...], "next_cursor": str or None}; encode with render_json()."""
+    ordering = params.get('ordering', 'id')
+    if ordering not in ORDERINGS:
+        raise ListingError(f"'ordering' must be one of {', '.join(ORDERINGS)}")
+
+    try:
+        limit = int(params.get('limit', settings.TRIP_LIST_PAGE_SIZE))
+    except ValueError:
+        raise ListingError("'limit' must be an integer")
+    if not 1 <= limit <= settings.TRIP_LIST_MAX_PAGE_SIZE:
+        raise ListingError(f"'limit' must be between 1 and {settings.TRIP_LIST_MAX_PAGE_SIZE}")
+
+    fields = TRIP_FIELDS
+    if params.get('fields'):
+        requested = {name.strip() for name in params['fields'].split(',') if name.strip()}
+        unknown = requested - set(TRIP_FIELDS)
+        if unknown:
+            raise ListingError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        fields = tuple(name for name in TRIP_FIELDS if name in requested)
+
+    trips = filter_trips(Trip.objects.order_by(*ORDERINGS[ordering]), params)
+
+    if params.get('cursor'):
+        trips = trips.filter(_keyset_filter(ordering, *decode_cursor(params['cursor'], ordering)))
+
+    # the cursor needs the ordering columns even when they aren't returned
+    extra = tuple(name for name in ('id', 'start_time') if name not in fields)
+    page = TripRowSerializer(trips[:limit + 1], fields + extra).data
+    next_cursor = encode_cursor(ordering, page[limit - 1]) if len(page) > limit else None
+    page = page[:limit]
+    if extra:
+        for row in page:
+            for name in extra:
+                del row[name]
+
+    return {"trips": page, "next_cursor": next_cursor}
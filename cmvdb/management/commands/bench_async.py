@@ -0,0 +1,103 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from cmvdb.benchmarking import summarize, timed
+from cmvdb.models import GeocodeCacheEntry, RouteCacheEntry, Trip
+from cmvdb.ors_client import async_ors_client, ors_client
+from cmvdb.ors_stub import start_in_process
+
+
+class Command(BaseCommand):
+    help = ("Compare sync and async /route throughput against a local ORS stub. "
+            "Creates throwaway trips and removes them afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--latency', type=float, default=0.2,
+                            help="Simulated ORS latency per call, in seconds.")
+        parser.add_argument('--sync-workers', type=int, default=4,
+                            help="Concurrent sync requests (like gunicorn sync workers).")
+        parser.add_argument('--concurrency', type=int, default=200,
+                            help="In-flight requests for the async run.")
+
+    def handle(self, *args, **options):
+        stub = start_in_process(latency=options['latency'])
+        base_urls = (ors_client.base_url, async_ors_client.base_url)
+        ors_client.base_url = async_ors_client.base_url = stub.base_url
+        run_id = uuid.uuid4().hex[:8]
+        last_route_entry = RouteCacheEntry.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                results = [
+                    self.run_sync(self.make_trips(run_id, 'sync', options['requests']), options),
+                    self.run_async(self.make_trips(run_id, 'async', options['requests']), options),
+                ]
+        finally:
+            ors_client.base_url, async_ors_client.base_url = base_urls
+            stub.shutdown()
+            self.cleanup(run_id, last_route_entry)
+
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:>5}: {result['requests']} requests in {result['seconds']}s "
+                f"({result['throughput']} req/s, p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms)"
+            )
+        self.stdout.write(f"ORS stub calls: {stub.counts}")
+
+    def make_trips(self, run_id, mode, count):
+        # unique lanes so every request pays the full upstream cost
+        Trip.objects.bulk_create([
+            Trip(
+                current_location=f"bench-{run_id}",
+                pickup_location=f"bench-{run_id}-{mode}-{i}-pickup",
+                dropoff_location=f"bench-{run_id}-{mode}-{i}-dropoff",
+                current_cycle_hours=0,
+            )
+            for i in range(count)
+        ])
+        return list(Trip.objects.filter(
+            pickup_location__startswith=f"bench-{run_id}-{mode}-"
+        ).values_list('id', flat=True))
+
+    def run_sync(self, trip_ids, options):
+        client = Client()
+
+        def call(trip_id):
+            response, seconds = timed(client.get, f'/trips/{trip_id}/route')
+            assert response.status_code == 200, response.content
+            return seconds
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['sync_workers']) as pool:
+            latencies = list(pool.map(call, trip_ids))
+        return summarize('sync', latencies, time.perf_counter() - started)
+
+    def run_async(self, trip_ids, options):
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(options['concurrency'])
+
+            async def call(trip_id):
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(f'/async/trips/{trip_id}/route')
+                    assert response.status_code == 200, response.content
+                    return time.perf_counter() - started
+
+            started = time.perf_counter()
+            latencies = await asyncio.gather(*map(call, trip_ids))
+            return summarize('async', latencies, time.perf_counter() - started)
+
+        return asyncio.run(run())
+
+    def cleanup(self, run_id, last_route_entry):
+        Trip.objects.filter(pickup_location__startswith=f"bench-{run_id}-").delete()
+        GeocodeCacheEntry.objects.filter(key__startswith=f"bench {run_id} ").delete()
+        RouteCacheEntry.objects.filter(pk__gt=last_route_entry).delete()
@@ -0,0 +1,93 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+
+from cmvdb.benchmarking import summarize
+from cmvdb.models import Trip
+
+
+class Command(BaseCommand):
+    help = ("Concurrent write benchmark for the configured database: threads re-save trips "
+            "the way trip_route does (Trip row plus its log sheets in one transaction). "
+            "Run it once per DB_ENGINE / SQLITE_TUNED setting to compare. "
+            "Creates throwaway trips and removes them afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=50,
+                            help="Saves per thread.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.describe_database())
+        run_id = uuid.uuid4().hex[:8]
+        count = options['threads'] * options['writes']
+        Trip.objects.bulk_create([
+            Trip(
+                current_location=f"bench-{run_id}",
+                pickup_location=f"Pickup {i}",
+                dropoff_location=f"Dropoff {i}",
+                current_cycle_hours=i % 70,
+            )
+            for i in range(count)
+        ])
+        trip_ids = list(Trip.objects.filter(current_location=f"bench-{run_id}").values_list('id', flat=True))
+
+        errors = []
+        lock = threading.Lock()
+
+        def write(trip_id):
+            started = time.perf_counter()
+            try:
+                trip = Trip.objects.get(pk=trip_id)
+                trip.total_distance = 500 + trip_id % 2500
+                trip.current_location = f"bench-{run_id}-done"
+                trip.save()
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+                return None
+            return time.perf_counter() - started
+
+        def work(chunk):
+            try:
+                return [write(trip_id) for trip_id in chunk]
+            finally:
+                connections.close_all()
+
+        chunks = [trip_ids[i::options['threads']] for i in range(options['threads'])]
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                latencies = [latency for result in pool.map(work, chunks) for latency in result
+                             if latency is not None]
+            elapsed = time.perf_counter() - started
+        finally:
+            Trip.objects.filter(current_location__startswith=f"bench-{run_id}").delete()
+
+        if latencies:
+            result = summarize(connection.vendor, latencies, elapsed)
+            self.stdout.write(
+                f"{result['requests']} saves by {options['threads']} threads in {result['seconds']}s "
+                f"({result['throughput']} saves/s, p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms)"
+            )
+        self.stdout.write(f"{len(errors)} failed saves")
+        for message in sorted(set(errors)):
+            self.stdout.write(f"  {message}")
+
+    def describe_database(self):
+        if connection.vendor != 'sqlite':
+            settings_dict = connection.settings_dict
+            return (f"{connection.vendor} {settings_dict['NAME']} "
+                    f"(CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}, "
+                    f"CONN_HEALTH_CHECKS={settings_dict['CONN_HEALTH_CHECKS']})")
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+                cursor.execute(f"PRAGMA {name}")
+                pragmas[name] = cursor.fetchone()[0]
+        mode = connection.transaction_mode or 'DEFERRED'
+        return f"sqlite {connection.settings_dict['NAME']} ({mode} transactions, {pragmas})"
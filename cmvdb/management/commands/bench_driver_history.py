@@ -0,0 +1,128 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from cmvdb.benchmarking import summarize, timed
+from cmvdb.history import recent_log_sheets
+from cmvdb.models import Driver, Trip, Vehicle
+
+
+class Command(BaseCommand):
+    help = ("Time GET /drivers/<id>/log-sheets against a table of throwaway trips spread across "
+            "many drivers, and compare it with scanning every trip. Removes the data afterwards "
+            "unless --keep is given.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drivers', type=int, default=10000)
+        parser.add_argument('--trips', type=int, default=1000000)
+        parser.add_argument('--history-days', type=int, default=365,
+                            help="Spread trip start times over this many past days.")
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        run_id = uuid.uuid4().hex[:8]
+        tag = f"bench-{run_id}"
+
+        started = time.perf_counter()
+        driver_ids, vehicle_ids = self.make_fleet(tag, options['drivers'])
+        self.make_trips(tag, rng, driver_ids, vehicle_ids, options['trips'], options['history_days'])
+        self.stdout.write(
+            f"Seeded {options['trips']} trips for {len(driver_ids)} drivers "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+        try:
+            self.explain(driver_ids[0])
+            self.run_endpoint(rng, driver_ids, options['requests'])
+            self.run_scan(tag, driver_ids[0])
+        finally:
+            if not options['keep']:
+                Trip.objects.filter(current_location=tag).delete()
+                Driver.objects.filter(name__startswith=tag).delete()
+                Vehicle.objects.filter(unit_number__startswith=tag).delete()
+
+    def make_fleet(self, tag, count):
+        Driver.objects.bulk_create([Driver(name=f"{tag}-{i}") for i in range(count)])
+        Vehicle.objects.bulk_create([Vehicle(unit_number=f"{tag}-{i}") for i in range(count)])
+        return (
+            list(Driver.objects.filter(name__startswith=tag).values_list('id', flat=True)),
+            list(Vehicle.objects.filter(unit_number__startswith=tag).values_list('id', flat=True)),
+        )
+
+    def make_trips(self, tag, rng, driver_ids, vehicle_ids, count, history_days):
+        # bulk_create skips Trip.save(), so no sheets are stored and the endpoint generates them in memory
+        now = timezone.now()
+        span = history_days * 24 * 60
+        batch = []
+        for i in range(count):
+            distance = rng.uniform(50, 1500)
+            index = rng.randrange(len(driver_ids))
+            batch.append(Trip(
+                driver_id=driver_ids[index],
+                vehicle_id=vehicle_ids[index],
+                current_location=tag,
+                pickup_location=f"Pickup {i % 1000}",
+                dropoff_location=f"Dropoff {i % 997}",
+                current_cycle_hours=0,
+                total_distance=distance,
+                fuel_stops=int(distance // 1000),
+                worked_hours=2,
+                start_time=now - timedelta(minutes=rng.randrange(span)),
+            ))
+            if len(batch) == 10000:
+                Trip.objects.bulk_create(batch)
+                batch = []
+        Trip.objects.bulk_create(batch)
+
+    def explain(self, driver_id):
+        trips = Trip.objects.filter(driver_id=driver_id, start_time__gte=timezone.now() - timedelta(days=7))
+        self.stdout.write(f"Query plan: {trips.order_by('start_time').explain()}")
+
+    def run_endpoint(self, rng, driver_ids, requests):
+        client = Client()
+        latencies, queries, trips = [], set(), 0
+        started = time.perf_counter()
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for _ in range(requests):
+                driver_id = rng.choice(driver_ids)
+                with CaptureQueriesContext(connection) as captured:
+                    response, seconds = timed(client.get, f'/drivers/{driver_id}/log-sheets')
+                latencies.append(seconds)
+                assert response.status_code == 200, response.content
+                queries.add(len(captured.captured_queries))
+                trips += len(response.json()['trips'])
+        result = summarize('endpoint', latencies, time.perf_counter() - started)
+        self.stdout.write(
+            f"GET /drivers/<id>/log-sheets: {result['throughput']} req/s, p50 {result['p50_ms']:.1f} ms, "
+            f"p95 {result['p95_ms']:.1f} ms, {trips / requests:.1f} trips per response, "
+            f"queries per request: {sorted(queries)}"
+        )
+
+    def run_scan(self, tag, driver_id):
+        # what the same question cost without a driver index: read every trip
+        since = timezone.now() - timedelta(days=7)
+        started = time.perf_counter()
+        matches = [
+            trip_id for trip_id, trip_driver, start_time in
+            Trip.objects.filter(current_location=tag).values_list('id', 'driver_id', 'start_time')
+            .iterator(chunk_size=10000)
+            if trip_driver == driver_id and start_time >= since
+        ]
+        scan_seconds = time.perf_counter() - started
+
+        history, indexed_seconds = timed(recent_log_sheets, {}, driver_id=driver_id)
+        assert sorted(trip['id'] for trip in history['trips']) == sorted(matches)
+        self.stdout.write(
+            f"One driver's week: full scan {scan_seconds * 1000:.0f} ms, "
+            f"indexed {indexed_seconds * 1000:.1f} ms ({scan_seconds / indexed_seconds:.0f}x)"
+        )
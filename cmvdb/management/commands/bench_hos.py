@@ -0,0 +1,58 @@
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cmvdb.benchmarking import timed
+from cmvdb.hos import BatchSchedule
+from cmvdb.models import Trip
+
+
+def sample_trips(count, seed, min_miles=50, max_miles=3500):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    trips = []
+    for i in range(count):
+        distance = round(rng.uniform(min_miles, max_miles), 2)
+        trips.append(Trip(
+            current_location=f"bench-{i}",
+            pickup_location=f"bench-{i}-pickup",
+            dropoff_location=f"bench-{i}-dropoff",
+            current_cycle_hours=rng.uniform(0, 60),
+            total_distance=distance,
+            fuel_stops=int(distance // 1000),
+            start_time=start + timedelta(minutes=rng.randrange(60 * 24 * 365)),
+        ))
+    return trips
+
+
+class Command(BaseCommand):
+    help = "Compare Trip.generate_log_sheets with the NumPy batch engine on unsaved sample trips."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trips', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--max-miles', type=float, default=3500)
+
+    def handle(self, *args, **options):
+        trips = sample_trips(options['trips'], options['seed'], max_miles=options['max_miles'])
+
+        scalar, scalar_seconds = timed(lambda: [trip.generate_log_sheets() for trip in trips])
+        schedule, compute_seconds = timed(BatchSchedule.from_trips, trips)
+        batch, materialize_seconds = timed(list, schedule)
+
+        if json.dumps(scalar) != json.dumps(batch):
+            raise CommandError("Batch engine output differs from Trip.generate_log_sheets")
+
+        per_10k = 10000 / len(trips)
+        self.stdout.write(f"{len(trips)} trips, {int(schedule.days.sum())} log sheets; outputs identical")
+        self.stdout.write(f"scalar generate_log_sheets: {scalar_seconds * per_10k:.3f}s per 10k trips")
+        self.stdout.write(
+            f"batch schedule:             {compute_seconds * per_10k:.3f}s per 10k trips "
+            f"({scalar_seconds / compute_seconds:.1f}x)"
+        )
+        self.stdout.write(
+            f"batch schedule + dicts:     {(compute_seconds + materialize_seconds) * per_10k:.3f}s per 10k trips "
+            f"({scalar_seconds / (compute_seconds + materialize_seconds):.1f}x)"
+        )
@@ -0,0 +1,53 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cmvdb.benchmarking import summarize, timed
+from cmvdb.road_graph import RoadGraph
+
+
+class Command(BaseCommand):
+    help = ("Load a road graph into CSR arrays and time shortest-path queries between random "
+            "node pairs with A* and with plain Dijkstra. Needs no network.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--graph', default=settings.ROAD_GRAPH_PATH)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        graph = RoadGraph.load(options['graph'])
+        self.stdout.write(
+            f"Loaded {graph.node_count} nodes / {graph.edge_count} directed edges "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms, "
+            f"{graph.nbytes() / 1024:.0f} KiB in CSR arrays"
+        )
+
+        rng = random.Random(options['seed'])
+        pairs = [(rng.randrange(graph.node_count), rng.randrange(graph.node_count))
+                 for _ in range(options['queries'])]
+
+        results = {}
+        for name, heuristic in (('a*', True), ('dijkstra', False)):
+            latencies, distances = [], []
+            started = time.perf_counter()
+            for source, target in pairs:
+                found, seconds = timed(graph.shortest_path, source, target, heuristic=heuristic)
+                latencies.append(seconds)
+                distances.append(found[0] if found else None)
+            results[name] = distances
+            result = summarize(name, latencies, time.perf_counter() - started)
+            self.stdout.write(
+                f"{name}: {result['throughput']} queries/s, p50 {result['p50_ms']:.2f} ms, "
+                f"p95 {result['p95_ms']:.2f} ms"
+            )
+
+        # the heuristic must not change any answer
+        mismatches = sum(
+            1 for a, b in zip(results['a*'], results['dijkstra'])
+            if (a is None) != (b is None) or (a is not None and abs(a - b) > 1e-6)
+        )
+        self.stdout.write(f"Distance mismatches between A* and Dijkstra: {mismatches}")
@@ -0,0 +1,185 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cmvdb.benchmarking import measure
+from cmvdb.hos import (
+    BREAK_TIME, DRIVE_SPEED, FUEL_INTERVAL_MILES, FUEL_TIME, MAX_DRIVE_HOURS, MAX_ON_DUTY,
+    OFF_DUTY_RESET, ONE_HOUR, RESET_TIME,
+)
+from cmvdb.management.commands.bench_hos import sample_trips
+
+
+# The dict-based builder hos.py used before DutyEntry/DailyLog, kept here
+# as the baseline; the current generate_log_sheets() builds the objects first.
+
+def create_log_sheet(trip_start, day, entries, start_time, end_time):
+    drive_hours = sum(e['duration'] for e in entries if e['status'] == 'DR')
+    on_duty_hours = sum(e['duration'] for e in entries if e['status'] in ('DR', 'ON'))
+    off_duty_hours = sum(e['duration'] for e in entries if e['status'] in ('OFF', 'SB'))
+
+    # Calculate date based on trip start time
+    sheet_date = (trip_start + start_time).date()
+
+    return {
+        'day': day,
+        'date': sheet_date.strftime('%Y-%m-%d'),
+        'start_time': str(start_time),
+        'end_time': str(end_time),
+        'entries': entries,
+        'summary': {
+            'drive_hours': round(drive_hours, 2),
+            'on_duty_hours': round(on_duty_hours, 2),
+            'off_duty_hours': round(off_duty_hours, 2),
+            'fuel_stops': sum(1 for e in entries if e.get('activity') == 'Fuel stop')
+        }
+    }
+
+
+def iter_dict_duty_entries(total_distance, fuel_stops, pickup_location, dropoff_location):
+    if not total_distance:
+        return
+
+    total_drive_hours = total_distance / DRIVE_SPEED
+    remaining = total_drive_hours
+    fuel_gap = FUEL_INTERVAL_MILES / DRIVE_SPEED
+    fuel_left = fuel_stops
+    time = timedelta(0)
+    on_duty = 0
+
+    yield time, {
+        'time': str(time),
+        'status': 'ON',
+        'duration': 1.0,
+        'activity': 'Pickup',
+        'location': pickup_location
+    }
+    time += ONE_HOUR
+    on_duty += 1
+
+    while remaining > 0:
+        for window_limited in (False, True):
+            cap = MAX_ON_DUTY - on_duty if window_limited else MAX_DRIVE_HOURS
+            drive_chunk = remaining if remaining < cap else cap
+
+            location = f"Route {1 - (remaining / total_drive_hours):.1%}"
+            yield time, {
+                'time': str(time),
+                'status': 'DR',
+                'duration': drive_chunk,
+                'location': location
+            }
+            time += timedelta(hours=drive_chunk)
+            on_duty += drive_chunk
+            remaining -= drive_chunk
+
+            if (fuel_left > 0 and
+                    (total_drive_hours - remaining) >= (fuel_stops - fuel_left + 1) * fuel_gap):
+                yield time, {
+                    'time': str(time),
+                    'status': 'ON',
+                    'duration': 0.25,
+                    'activity': 'Fuel stop',
+                    'location': location
+                }
+                time += FUEL_TIME
+                on_duty += 0.25
+                fuel_left -= 1
+
+            if remaining <= 0:
+                break
+
+            if not window_limited:
+                yield time, {
+                    'time': str(time),
+                    'status': 'OFF',
+                    'duration': 0.5,
+                    'activity': '30-min break'
+                }
+                time += BREAK_TIME
+                on_duty += 0.5
+        else:
+            yield time, {
+                'time': str(time),
+                'status': 'OFF',
+                'duration': OFF_DUTY_RESET,
+                'activity': '10-hour reset'
+            }
+            time += RESET_TIME
+            on_duty = 0
+
+    yield time, {
+        'time': str(time),
+        'status': 'ON',
+        'duration': 1.0,
+        'activity': 'Drop-off',
+        'location': dropoff_location
+    }
+
+
+def iter_dict_log_sheets(trip_start, duty_entries):
+    day = 1
+    day_start = None
+    entries = []
+    time = None
+    for time, entry in duty_entries:
+        if day_start is None:
+            day_start = time
+        elif entry.get('activity') == '10-hour reset':
+            yield create_log_sheet(trip_start, day, entries, day_start, time)
+            day += 1
+            day_start = time
+            entries = []
+        entries.append(entry)
+
+    if entries:
+        yield create_log_sheet(trip_start, day, entries, day_start, time + ONE_HOUR)
+
+
+def dict_log_sheets(trip):
+    return list(iter_dict_log_sheets(trip.start_time, iter_dict_duty_entries(
+        trip.total_distance, trip.fuel_stops, trip.pickup_location, trip.dropoff_location
+    )))
+
+
+class Command(BaseCommand):
+    help = ("Compare memory and time of the original dict-based log sheet builder with "
+            "the slotted DutyEntry/DailyLog objects (iter_log_sheets) for long trips.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trips', type=int, default=1000)
+        parser.add_argument('--min-miles', type=float, default=5000)
+        parser.add_argument('--max-miles', type=float, default=15000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        trips = sample_trips(options['trips'], options['seed'], options['min_miles'], options['max_miles'])
+
+        dicts, dict_seconds, dict_retained, dict_peak = measure(
+            lambda: [dict_log_sheets(trip) for trip in trips]
+        )
+        if dicts[:100] != [trip.generate_log_sheets() for trip in trips[:100]]:
+            raise CommandError("The dict baseline no longer matches Trip.generate_log_sheets")
+        sheets = sum(len(trip_sheets) for trip_sheets in dicts)
+        entries = sum(len(sheet['entries']) for trip_sheets in dicts for sheet in trip_sheets)
+        del dicts
+
+        compact, compact_seconds, compact_retained, compact_peak = measure(
+            lambda: [list(trip.iter_log_sheets()) for trip in trips]
+        )
+        assert sum(len(trip_sheets) for trip_sheets in compact) == sheets
+        del compact
+
+        self.stdout.write(f"{len(trips)} trips, {sheets} log sheets, {entries} duty entries")
+        for name, seconds, retained, peak in (
+            ('dicts', dict_seconds, dict_retained, dict_peak),
+            ('compact', compact_seconds, compact_retained, compact_peak),
+        ):
+            self.stdout.write(
+                f"{name:>7}: {seconds:.3f}s, {retained / 2 ** 20:.1f} MiB retained "
+                f"({retained / entries:.0f} B/entry), {peak / 2 ** 20:.1f} MiB peak"
+            )
+        self.stdout.write(
+            f"compact uses {dict_retained / compact_retained:.1f}x less memory "
+            f"and is {dict_seconds / compact_seconds:.1f}x faster"
+        )
@@ -0,0 +1,65 @@
+import json
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cmvdb.benchmarking import best_of
+from cmvdb.models import Trip
+from cmvdb.serializers import TripRowSerializer, TripSerializer, render_json
+
+
+class Command(BaseCommand):
+    help = ("Compare DRF's TripSerializer with the values_list/orjson TripRowSerializer "
+            "on trip lists. Creates throwaway trips and removes them afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        sizes = sorted(options['rows'])
+        self.make_trips(run_id, sizes[-1])
+        try:
+            for size in sizes:
+                self.compare(run_id, size, options['repeat'])
+        finally:
+            Trip.objects.filter(current_location=f"bench-{run_id}").delete()
+
+    def make_trips(self, run_id, count):
+        # bulk_create skips Trip.save(), so no log sheets are built for these rows
+        now = timezone.now()
+        Trip.objects.bulk_create([
+            Trip(
+                current_location=f"bench-{run_id}",
+                pickup_location=f"Pickup {i % 500}",
+                dropoff_location=f"Dropoff {i % 700}",
+                current_cycle_hours=i % 70,
+                total_distance=(i * 37.5) % 3000 or None,
+                start_time=now - timedelta(minutes=i, microseconds=i),
+                worked_hours=i % 70 + 2,
+                fuel_stops=int((i * 37.5) % 3000 // 1000),
+            )
+            for i in range(count)
+        ], batch_size=2000)
+
+    def compare(self, run_id, size, repeat):
+        # an id range keeps the query itself cheap, so the timings are mostly serialization
+        bench_trips = Trip.objects.filter(current_location=f"bench-{run_id}")
+        first_id = bench_trips.order_by('id').values_list('id', flat=True).first()
+        trips = bench_trips.filter(id__range=(first_id, first_id + size - 1)).order_by('id')
+
+        drf_body, drf_seconds = best_of(repeat, lambda: json.dumps(
+            {"trips": TripSerializer(trips, many=True).data}
+        ).encode())
+        fast_body, fast_seconds = best_of(repeat, lambda: render_json(
+            {"trips": TripRowSerializer(trips).data}
+        ))
+        assert json.loads(drf_body) == json.loads(fast_body), "outputs differ"
+
+        self.stdout.write(f"{size} rows:")
+        for name, seconds in (('drf', drf_seconds), ('fast', fast_seconds)):
+            self.stdout.write(f"{name:>6}: {seconds:.3f}s ({size / seconds:,.0f} rows/s)")
+        self.stdout.write(f"fast path is {drf_seconds / fast_seconds:.1f}x faster")
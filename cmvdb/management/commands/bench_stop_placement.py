@@ -0,0 +1,76 @@
+import math
+import random
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cmvdb.benchmarking import summarize, timed
+from cmvdb.management.commands.make_pois import SAMPLE_POI_PATH, sample_pois
+from cmvdb.road_graph import RoadGraph
+from cmvdb.stops import METERS_PER_DEGREE, POIIndex, STOP_KINDS
+
+
+class Command(BaseCommand):
+    help = ("Build the POI grid index from the synthetic sample POI file (or --pois random "
+            "POIs along the road graph) and time nearest-stop lookups, checking each answer "
+            "against a brute-force scan.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--graph', default=settings.ROAD_GRAPH_PATH)
+        parser.add_argument('--poi-file', default=SAMPLE_POI_PATH)
+        parser.add_argument('--pois', type=int,
+                            help="Generate this many POIs along --graph instead of reading --poi-file.")
+        parser.add_argument('--queries', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['pois']:
+            pois = sample_pois(RoadGraph.load(options['graph']), options['pois'], options['seed'])
+            index = POIIndex(*zip(*pois))
+        else:
+            index = POIIndex.load(options['poi_file'])
+        self.stdout.write(
+            f"Loaded and indexed {len(index)} POIs into {len(index.cells)} cells "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+        rng = random.Random(options['seed'])
+        activities = list(STOP_KINDS)
+        queries = [(rng.uniform(-124, -67), rng.uniform(25, 49), rng.choice(activities))
+                   for _ in range(options['queries'])]
+        max_meters = settings.POI_SNAP_MILES * 1609.34
+
+        latencies, found = [], []
+        started = time.perf_counter()
+        for lon, lat, activity in queries:
+            item, seconds = timed(index.nearest, lon, lat, STOP_KINDS[activity], max_meters)
+            found.append(item)
+            latencies.append(seconds)
+        result = summarize('grid', latencies, time.perf_counter() - started)
+        hits = sum(1 for item in found if item is not None)
+        self.stdout.write(
+            f"grid: {result['throughput']} lookups/s, p50 {result['p50_ms'] * 1000:.0f} us, "
+            f"p99 {result['p99_ms'] * 1000:.0f} us, "
+            f"{hits}/{len(queries)} within {settings.POI_SNAP_MILES:g} miles"
+        )
+
+        # the same lookups as a vectorized scan over every POI
+        lons = np.array(index.lons)
+        lats = np.array(index.lats)
+        kinds = np.array(index.kinds)
+        checked = min(len(queries), 1000)
+        mismatches = 0
+        started = time.perf_counter()
+        for (lon, lat, activity), item in zip(queries[:checked], found):
+            x_scale = math.cos(math.radians(lat)) * METERS_PER_DEGREE
+            meters = np.hypot((lons - lon) * x_scale, (lats - lat) * METERS_PER_DEGREE)
+            meters[~np.isin(kinds, STOP_KINDS[activity])] = np.inf
+            best = float(meters.min())
+            expected = best if best <= max_meters else None
+            if (expected is None) != (item is None) or (item is not None and abs(item[0] - expected) > 1e-6):
+                mismatches += 1
+        scan_ms = (time.perf_counter() - started) / checked * 1000
+        self.stdout.write(f"brute force: {scan_ms:.2f} ms per lookup; mismatches in {checked}: {mismatches}")
@@ -0,0 +1,255 @@
+import json
+import platform
+import random
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import override_settings
+
+from cmvdb.benchmarking import latency_stats, timed
+from cmvdb.management.commands.seed_trips import EPOCH, seed_trips
+from cmvdb.models import GeocodeCacheEntry, RouteCacheEntry, Trip
+from cmvdb.ors_client import async_ors_client, ors_client
+from cmvdb.ors_stub import start_in_thread
+from cmvdb.routing_backends import get_backend
+
+# bump when a result's fields or a case's meaning change, so old files aren't compared against new ones
+# (2: nearest-rank percentiles from cmvdb.benchmarking)
+SCHEMA_VERSION = 2
+BENCHMARKS = ('log_sheets', 'trip_list', 'route')
+DISTANCES = (100, 500, 1500, 3000, 6000)
+
+
+def result(benchmark, case, latencies, elapsed=None, **params):
+    """One result row; throughput is over elapsed when given (concurrent runs), else per call."""
+    stats = latency_stats(latencies)
+    total = elapsed if elapsed is not None else sum(latencies)
+    return {
+        'benchmark': benchmark,
+        'case': case,
+        'params': params,
+        **stats,
+        'ops_per_sec': round(stats['samples'] / total, 1) if total else None,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+    }
+
+
+def compare(baseline, results, threshold):
+    """(result, baseline p50, ratio, regressed) for every (benchmark, case) present in both runs."""
+    if baseline.get('schema') != SCHEMA_VERSION:
+        raise CommandError(f"Baseline has schema {baseline.get('schema')}, expected {SCHEMA_VERSION}")
+    previous = {(row['benchmark'], row['case']): row for row in baseline['results']}
+    rows = []
+    for row in results:
+        before = previous.get((row['benchmark'], row['case']))
+        if before is None or not before['p50_ms']:
+            continue
+        ratio = row['p50_ms'] / before['p50_ms']
+        rows.append((row, before['p50_ms'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+class Command(BaseCommand):
+    help = ("Run the benchmark suite (log sheet generation, trip list/detail throughput, "
+            "/route end to end against a local ORS stub) and optionally write the results as "
+            "JSON. --compare matches each (benchmark, case) with a previous results file and "
+            "flags p50s that got slower by more than --threshold. Seeded rows and throwaway "
+            "trips are removed afterwards unless --keep is given.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS))
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000],
+                            help="Table sizes for trip_list, e.g. --rows 10000 1000000.")
+        parser.add_argument('--iterations', type=int, default=200,
+                            help="Trips per distance for log_sheets.")
+        parser.add_argument('--requests', type=int, default=200,
+                            help="Requests per trip_list case and per route pass.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help="Simulated ORS latency per call, in seconds.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help="Write the results JSON here.")
+        parser.add_argument('--compare', help="A previous results JSON to compare p50s against.")
+        parser.add_argument('--threshold', type=float, default=0.15,
+                            help="Slowdown ratio over which a case counts as a regression.")
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        started_at = datetime.now(timezone.utc)
+        results = []
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name in options['only']:
+                results.extend(getattr(self, f'bench_{name}')(options))
+
+        report = {
+            'schema': SCHEMA_VERSION,
+            'started_at': started_at.isoformat(),
+            'environment': environment(),
+            'options': {name: options[name] for name in (
+                'only', 'rows', 'iterations', 'requests', 'concurrency', 'latency', 'seed',
+            )},
+            'results': results,
+        }
+
+        for row in results:
+            self.stdout.write(
+                f"{row['benchmark']:>10} {row['case']:<32} p50 {row['p50_ms']:>10.3f} ms  "
+                f"p95 {row['p95_ms']:>10.3f} ms  p99 {row['p99_ms']:>10.3f} ms  "
+                f"{row['ops_per_sec']} ops/s"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {len(results)} results to {options['output']}")
+
+        if baseline is not None:
+            self.report_comparison(baseline, results, options)
+
+    def report_comparison(self, baseline, results, options):
+        regressions = 0
+        for row, before, ratio, regressed in compare(baseline, results, options['threshold']):
+            regressions += regressed
+            self.stdout.write(
+                f"{'REGRESSED' if regressed else 'ok':>9} {row['benchmark']}/{row['case']}: "
+                f"p50 {before:.3f} -> {row['p50_ms']:.3f} ms ({ratio:.2f}x)"
+            )
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{regressions} case(s) regressed by more than {options['threshold']:.0%}")
+
+    def bench_log_sheets(self, options):
+        rows = []
+        for miles in DISTANCES:
+            trips = [
+                Trip(current_location='bench', pickup_location='A', dropoff_location='B',
+                     current_cycle_hours=0, total_distance=miles, fuel_stops=int(miles // 1000),
+                     start_time=EPOCH)
+                for _ in range(options['iterations'])
+            ]
+            latencies = []
+            for trip in trips:
+                _, seconds = timed(trip.generate_log_sheets)
+                latencies.append(seconds)
+            rows.append(result('log_sheets', f'miles={miles}', latencies, miles=miles))
+        return rows
+
+    def bench_trip_list(self, options):
+        rng = random.Random(options['seed'])
+        client = Client()
+        rows = []
+        for size in sorted(options['rows']):
+            tag = f"bench-suite-{options['seed']}-{size}"
+            if Trip.objects.filter(current_location=tag).count() != size:
+                Trip.objects.filter(current_location=tag).delete()
+                started = time.perf_counter()
+                seed_trips(size, options['seed'], tag)
+                self.stdout.write(f"Seeded {size} trips in {time.perf_counter() - started:.1f}s")
+            try:
+                rows.extend(self.list_cases(client, rng, tag, size, options['requests']))
+            finally:
+                if not options['keep']:
+                    Trip.objects.filter(current_location=tag).delete()
+        return rows
+
+    def list_cases(self, client, rng, tag, size, requests):
+        def timed_get(url):
+            response, elapsed = timed(client.get, url)
+            assert response.status_code == 200, response.content
+            return elapsed, response
+
+        first_page = [timed_get(f'/trips/?current_location={tag}&limit=100')[0] for _ in range(requests)]
+
+        # walk the table by start_time, page after page
+        deep_pages, cursor = [], ''
+        for _ in range(requests):
+            elapsed, response = timed_get(
+                f'/trips/?current_location={tag}&ordering=start_time&limit=100{cursor}'
+            )
+            deep_pages.append(elapsed)
+            next_cursor = response.json()['next_cursor']
+            cursor = f'&cursor={next_cursor}' if next_cursor else ''
+
+        ids = Trip.objects.filter(current_location=tag).aggregate(low=Min('id'), high=Max('id'))
+        detail = [timed_get(f"/trips/{rng.randint(ids['low'], ids['high'])}")[0] for _ in range(requests)]
+
+        return [
+            result('trip_list', f'first_page rows={size}', first_page, rows=size, limit=100),
+            result('trip_list', f'cursor_walk rows={size}', deep_pages, rows=size, limit=100),
+            result('trip_list', f'detail rows={size}', detail, rows=size),
+        ]
+
+    def bench_route(self, options):
+        stub = start_in_thread(latency=options['latency'])
+        base_urls = (ors_client.base_url, async_ors_client.base_url)
+        ors_client.base_url = async_ors_client.base_url = stub.base_url
+        run_id = uuid.uuid4().hex[:8]
+        last_route_entry = RouteCacheEntry.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        client = Client()
+
+        def call(trip_id):
+            response, seconds = timed(client.get, f'/trips/{trip_id}/route')
+            assert response.status_code == 200, response.content
+            return seconds
+
+        rows = []
+        try:
+            with override_settings(ROUTING_BACKEND='cmvdb.routing_backends.ORSBackend'):
+                get_backend.cache_clear()
+                # unique lanes: the cold pass pays for geocoding and directions, the warm one hits the caches
+                Trip.objects.bulk_create([
+                    Trip(current_location=f"bench-{run_id}",
+                         pickup_location=f"bench-{run_id}-{i}-pickup",
+                         dropoff_location=f"bench-{run_id}-{i}-dropoff",
+                         current_cycle_hours=0, start_time=EPOCH)
+                    for i in range(options['requests'])
+                ])
+                trip_ids = list(Trip.objects.filter(current_location=f"bench-{run_id}").values_list('id', flat=True))
+                for case in ('cold', 'warm'):
+                    started = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                        latencies = list(pool.map(call, trip_ids))
+                    rows.append(result(
+                        'route', f'{case} concurrency={options["concurrency"]}', latencies,
+                        elapsed=time.perf_counter() - started,
+                        concurrency=options['concurrency'], ors_latency=options['latency'],
+                    ))
+        finally:
+            get_backend.cache_clear()
+            ors_client.base_url, async_ors_client.base_url = base_urls
+            stub.shutdown()
+            # routing moves current_location to the dropoff, so match on the pickup
+            Trip.objects.filter(pickup_location__startswith=f"bench-{run_id}-").delete()
+            GeocodeCacheEntry.objects.filter(key__startswith=f"bench {run_id} ").delete()
+            RouteCacheEntry.objects.filter(pk__gt=last_route_entry).delete()
+        return rows
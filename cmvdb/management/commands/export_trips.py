@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cmvdb.export import EXPORT_FORMATS, export_trips
+from cmvdb.listing import ListingError
+
+
+class Command(BaseCommand):
+    help = "Stream every trip (and its log sheets) as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', '-o', help="File to write to (default: stdout).")
+        parser.add_argument('--no-log-sheets', action='store_true',
+                            help="Export trip rows only.")
+        parser.add_argument('--chunk-size', type=int,
+                            help="Rows fetched per query (default: EXPORT_CHUNK_SIZE).")
+        parser.add_argument('--start-after', help="Only trips starting at or after this ISO datetime.")
+        parser.add_argument('--start-before', help="Only trips starting before this ISO datetime.")
+        parser.add_argument('--pickup')
+        parser.add_argument('--dropoff')
+
+    def handle(self, *args, **options):
+        params = {
+            name: options[name]
+            for name in ('start_after', 'start_before', 'pickup', 'dropoff')
+            if options[name]
+        }
+        try:
+            blocks = export_trips(
+                options['format'], params,
+                log_sheets=not options['no_log_sheets'],
+                chunk_size=options['chunk_size'],
+            )
+        except ListingError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as out:
+                for block in blocks:
+                    out.write(block)
+        else:
+            for block in blocks:
+                self.stdout.write(block, ending='')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from cmvdb.geocoding import geocode_cache
+from cmvdb.models import GeocodeCacheEntry
+
+
+class Command(BaseCommand):
+    help = "Inspect or prune the persistent geocode cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--purge-expired', action='store_true',
+                            help="Delete entries whose TTL has passed.")
+        parser.add_argument('--clear', action='store_true',
+                            help="Delete every cached geocode.")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            geocode_cache.clear()
+            self.stdout.write("Geocode cache cleared")
+        elif options['purge_expired']:
+            deleted = geocode_cache.purge_expired()
+            self.stdout.write(f"Purged {deleted} expired entries")
+        self.stdout.write(f"{GeocodeCacheEntry.objects.count()} entries cached")
@@ -0,0 +1,44 @@
+import time
+
+import orjson
+from django.core.management.base import BaseCommand, CommandError
+
+from cmvdb.ingest import ingest_trips, parse_ndjson
+
+
+class Command(BaseCommand):
+    help = "Bulk-load trips from a JSON array or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('json', 'ndjson'),
+                            help="Input format (default: from the file extension).")
+        parser.add_argument('--chunk-size', type=int,
+                            help="Rows per validation/insert transaction (default: INGEST_CHUNK_SIZE).")
+        parser.add_argument('--show-errors', type=int, default=20,
+                            help="How many row errors to print.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'json')
+        started = time.perf_counter()
+
+        try:
+            with open(options['path'], 'rb') as source:
+                if fmt == 'ndjson':
+                    # NDJSON is streamed, so only one chunk is held at a time
+                    result = ingest_trips(parse_ndjson(source), options['chunk_size'])
+                else:
+                    items = orjson.loads(source.read())
+                    if not isinstance(items, list):
+                        raise CommandError("Expected a JSON array of trips")
+                    result = ingest_trips(items, options['chunk_size'])
+        except (OSError, orjson.JSONDecodeError) as e:
+            raise CommandError(str(e))
+
+        seconds = time.perf_counter() - started
+        for error in result['errors'][:options['show_errors']]:
+            self.stderr.write(f"row {error['index']}: {error['errors']}")
+        self.stdout.write(
+            f"Created {result['created']} trips, {result['failed']} failed, in {seconds:.1f}s "
+            f"({result['created'] / seconds * 60:,.0f} trips/min)"
+        )
@@ -0,0 +1,45 @@
+import gzip
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cmvdb.road_graph import RoadGraph
+
+SAMPLE_POI_PATH = str(settings.BASE_DIR / 'cmvdb' / 'data' / 'sample_pois.json.gz')
+KIND_WEIGHTS = {'truck_stop': 3, 'fuel': 5, 'rest_area': 2}
+KIND_LABELS = {'truck_stop': 'Truck Stop', 'fuel': 'Fuel Station', 'rest_area': 'Rest Area'}
+
+
+def sample_pois(graph, count, seed=1):
+    """count POIs at random points along random edges of graph, as [lon, lat, name, kind]."""
+    rng = random.Random(seed)
+    kinds = rng.choices(list(KIND_WEIGHTS), weights=list(KIND_WEIGHTS.values()), k=count)
+    pois = []
+    for i, kind in enumerate(kinds):
+        source = rng.randrange(graph.node_count)
+        start, end = graph.offsets[source], graph.offsets[source + 1]
+        target = graph.targets[rng.randrange(start, end)] if end > start else source
+        t = rng.random()
+        lon = graph.lons[source] + (graph.lons[target] - graph.lons[source]) * t + rng.uniform(-0.01, 0.01)
+        lat = graph.lats[source] + (graph.lats[target] - graph.lats[source]) * t + rng.uniform(-0.01, 0.01)
+        pois.append([round(float(lon), 5), round(float(lat), 5), f"{KIND_LABELS[kind]} #{i + 1}", kind])
+    return pois
+
+
+class Command(BaseCommand):
+    help = ("Write a synthetic truck stop / fuel / rest area POI file for stop placement, "
+            "with the POIs scattered along the edges of a road graph.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--graph', default=settings.ROAD_GRAPH_PATH)
+        parser.add_argument('--output', default=SAMPLE_POI_PATH)
+        parser.add_argument('--count', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        pois = sample_pois(RoadGraph.load(options['graph']), options['count'], options['seed'])
+        with gzip.open(options['output'], 'wt') as f:
+            json.dump({"pois": pois}, f, separators=(',', ':'))
+        self.stdout.write(f"Wrote {len(pois)} POIs to {options['output']}")
@@ -0,0 +1,77 @@
+import gzip
+import json
+import math
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cmvdb.road_graph import distance_meters
+
+# named nodes so LocalGraphBackend can geocode common pickup/dropoff cities
+CITIES = [
+    ("Atlanta", -84.388, 33.749), ("Austin", -97.743, 30.267), ("Baltimore", -76.612, 39.290),
+    ("Billings", -108.501, 45.783), ("Birmingham", -86.802, 33.521), ("Boise", -116.202, 43.615),
+    ("Boston", -71.059, 42.360), ("Charlotte", -80.843, 35.227), ("Chicago", -87.630, 41.878),
+    ("Cincinnati", -84.512, 39.103), ("Cleveland", -81.694, 41.499), ("Dallas", -96.797, 32.777),
+    ("Denver", -104.990, 39.739), ("Detroit", -83.046, 42.331), ("El Paso", -106.485, 31.762),
+    ("Houston", -95.370, 29.760), ("Indianapolis", -86.158, 39.768), ("Jacksonville", -81.656, 30.332),
+    ("Kansas City", -94.579, 39.100), ("Las Vegas", -115.140, 36.170), ("Little Rock", -92.290, 34.746),
+    ("Los Angeles", -118.244, 34.052), ("Louisville", -85.759, 38.253), ("Memphis", -90.049, 35.150),
+    ("Miami", -80.192, 25.762), ("Milwaukee", -87.907, 43.039), ("Minneapolis", -93.265, 44.978),
+    ("Nashville", -86.782, 36.163), ("New Orleans", -90.072, 29.951), ("New York", -74.006, 40.713),
+    ("Oklahoma City", -97.516, 35.468), ("Omaha", -95.934, 41.257), ("Philadelphia", -75.165, 39.953),
+    ("Phoenix", -112.074, 33.448), ("Pittsburgh", -79.996, 40.441), ("Portland", -122.676, 45.523),
+    ("Reno", -119.814, 39.530), ("Sacramento", -121.494, 38.582), ("Salt Lake City", -111.891, 40.761),
+    ("San Antonio", -98.494, 29.424), ("San Diego", -117.161, 32.716), ("San Francisco", -122.419, 37.775),
+    ("Seattle", -122.332, 47.606), ("St. Louis", -90.199, 38.627), ("Tampa", -82.458, 27.951),
+    ("Tulsa", -95.993, 36.154), ("Washington", -77.037, 38.907), ("Wichita", -97.336, 37.687),
+]
+
+
+class Command(BaseCommand):
+    help = ("Write a synthetic road graph covering the continental US: a lattice of nodes "
+            "joined to their 8 neighbours plus one named node per major city. Edge lengths "
+            "are the great-circle distance times a random detour factor, as a road would be.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.ROAD_GRAPH_PATH)
+        parser.add_argument('--spacing', type=float, default=0.5, help="Lattice spacing in degrees.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        spacing = options['spacing']
+        columns = int(57 / spacing) + 1
+        rows = int(24 / spacing) + 1
+
+        def index(column, row):
+            return row * columns + column
+
+        nodes = [
+            [round(-124.0 + column * spacing, 6), round(25.0 + row * spacing, 6), None]
+            for row in range(rows) for column in range(columns)
+        ]
+        edges = []
+
+        def connect(u, v):
+            meters = distance_meters(nodes[u], nodes[v]) * rng.uniform(1.1, 1.6)
+            edges.append([u, v, round(meters, 1)])
+
+        for row in range(rows):
+            for column in range(columns):
+                for d_column, d_row in ((1, 0), (0, 1), (1, 1), (-1, 1)):
+                    if 0 <= column + d_column < columns and row + d_row < rows:
+                        connect(index(column, row), index(column + d_column, row + d_row))
+
+        for name, lon, lat in CITIES:
+            city = len(nodes)
+            nodes.append([lon, lat, name])
+            column = math.floor((lon + 124.0) / spacing)
+            row = math.floor((lat - 25.0) / spacing)
+            for corner_column, corner_row in ((column, row), (column + 1, row), (column, row + 1), (column + 1, row + 1)):
+                connect(city, index(corner_column, corner_row))
+
+        with gzip.open(options['output'], 'wt') as f:
+            json.dump({"nodes": nodes, "edges": edges, "directed": False}, f, separators=(',', ':'))
+        self.stdout.write(f"Wrote {len(nodes)} nodes and {len(edges)} edges to {options['output']}")
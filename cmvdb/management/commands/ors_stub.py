@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from cmvdb.ors_stub import make_server
+
+
+class Command(BaseCommand):
+    help = "Run a local openrouteservice stand-in (point ORS_BASE_URL at it)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help="Seconds to sleep before answering each request.")
+
+    def handle(self, *args, **options):
+        server = make_server(options['host'], options['port'], options['latency'])
+        self.stdout.write(f"ORS stub listening on http://{options['host']}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Requests served: {server.counts}")
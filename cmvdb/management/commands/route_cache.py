@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from cmvdb.models import RouteCacheEntry
+from cmvdb.routing import route_cache
+
+
+class Command(BaseCommand):
+    help = "Inspect or prune the persistent route cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true',
+                            help="Delete expired entries and the least recently used past ROUTE_CACHE_MAX_ENTRIES.")
+        parser.add_argument('--clear', action='store_true',
+                            help="Delete every cached route.")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            route_cache.clear()
+            self.stdout.write("Route cache cleared")
+        elif options['evict']:
+            deleted = route_cache.evict()
+            self.stdout.write(f"Evicted {deleted} entries")
+        self.stdout.write(f"{RouteCacheEntry.objects.count()} entries cached")
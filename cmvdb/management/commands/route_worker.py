@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from cmvdb.jobs import WorkerPool, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued route jobs (POST /trips/<id>/route) with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--max-attempts', type=int, default=3)
+        parser.add_argument('--retry-backoff', type=float, default=5.0,
+                            help="Seconds before retrying a job after an ORS outage, doubling per attempt.")
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help="Requeue jobs left running longer than this many seconds.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once no queued job is due instead of polling.")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(options['stale_after'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs")
+
+        pool = WorkerPool(options['workers'], options['poll_interval'], options['max_attempts'],
+                          options['retry_backoff'])
+        self.stdout.write(f"Starting {options['workers']} route workers")
+        pool.run(exit_when_empty=options['burst'])
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from cmvdb.hos import generate_log_sheets_batch
+from cmvdb.models import LogSheet, Trip, log_sheets_digest
+from cmvdb.response_cache import response_cache
+
+
+class Command(BaseCommand):
+    help = ("Store log sheets for trips that have none (bulk-created before ingest stored them). "
+            "Until then those trips' sheets are generated in memory on every read.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Trips per transaction.")
+
+    def handle(self, *args, **options):
+        missing = Trip.objects.filter(log_sheets_updated_at__isnull=True).order_by('pk')
+        stored = 0
+        while True:
+            trips = list(missing[:options['chunk_size']])
+            if not trips:
+                break
+            sheets = generate_log_sheets_batch(trips)
+            now = timezone.now()
+            for trip, log_sheets in zip(trips, sheets):
+                trip.log_sheets_etag = log_sheets_digest(log_sheets)
+                trip.log_sheets_updated_at = now
+            with transaction.atomic():
+                LogSheet.objects.filter(trip__in=trips).delete()
+                LogSheet.objects.bulk_create([
+                    LogSheet.from_dict(trip, sheet)
+                    for trip, log_sheets in zip(trips, sheets) for sheet in log_sheets
+                ])
+                # bulk_update skips the model signals; cached logs now gain a Last-Modified
+                Trip.objects.bulk_update(trips, ['log_sheets_etag', 'log_sheets_updated_at'])
+                response_cache.invalidate_all()
+            stored += len(trips)
+            self.stdout.write(f"Stored log sheets for {stored} trips")
+        self.stdout.write(f"{Trip.objects.filter(log_sheets_updated_at__isnull=True).count()} trips without stored sheets")
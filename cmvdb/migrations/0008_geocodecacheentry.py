@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0007_trip_start_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('longitude', models.FloatField()),
+                ('latitude', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Geocode cache entry',
+                'verbose_name_plural': 'Geocode cache entries',
+            },
+        ),
+    ]
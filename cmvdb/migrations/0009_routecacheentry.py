@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0008_geocodecacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('profile', models.CharField(default='driving-car', max_length=30)),
+                ('distance', models.FloatField(help_text='Route distance in meters')),
+                ('duration', models.FloatField(default=0, help_text='Route duration in seconds')),
+                ('geometry', models.BinaryField(help_text='zlib-compressed JSON coordinate list')),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Route cache entry',
+                'verbose_name_plural': 'Route cache entries',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0009_routecacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('error_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='route_jobs', to='cmvdb.trip')),
+            ],
+            options={
+                'verbose_name': 'Route job',
+                'verbose_name_plural': 'Route jobs',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='cmvdb_route_status_007915_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0010_routejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='log_sheets_etag',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='log_sheets_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='LogSheet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('start_time', models.CharField(max_length=32)),
+                ('end_time', models.CharField(max_length=32)),
+                ('entries', models.JSONField(default=list)),
+                ('summary', models.JSONField(default=dict)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_sheets', to='cmvdb.trip')),
+            ],
+            options={
+                'verbose_name': 'Log sheet',
+                'verbose_name_plural': 'Log sheets',
+                'constraints': [models.UniqueConstraint(fields=('trip', 'day'), name='unique_trip_log_sheet_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0011_logsheet'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['start_time', 'id'], name='trip_start_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['pickup_location', 'start_time', 'id'], name='trip_pickup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['dropoff_location', 'start_time', 'id'], name='trip_dropoff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['current_location', 'start_time', 'id'], name='trip_current_location_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0012_trip_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Driver',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('cycle_hours', models.JSONField(default=list, help_text='On-duty hours per day, indexed by date ordinal % 8')),
+                ('cycle_day', models.IntegerField(blank=True, help_text='Date ordinal of the newest day in cycle_hours', null=True)),
+                ('cycle_total', models.FloatField(default=0)),
+                ('off_duty_since', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Driver',
+                'verbose_name_plural': 'Drivers',
+            },
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='driver',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trips', to='cmvdb.driver'),
+        ),
+    ]
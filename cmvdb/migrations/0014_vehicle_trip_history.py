@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0013_driver_cycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vehicle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit_number', models.CharField(max_length=50)),
+                ('vin', models.CharField(blank=True, max_length=17)),
+            ],
+            options={
+                'verbose_name': 'Vehicle',
+                'verbose_name_plural': 'Vehicles',
+            },
+        ),
+        migrations.AlterField(
+            model_name='trip',
+            name='driver',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trips', to='cmvdb.driver'),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='vehicle',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trips', to='cmvdb.vehicle'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['driver', 'start_time'], name='trip_driver_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['vehicle', 'start_time'], name='trip_vehicle_start_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0014_vehicle_trip_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='route_duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='route_polyline',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
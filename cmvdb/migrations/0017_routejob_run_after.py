@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmvdb', '0016_store_missing_log_sheets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routejob',
+            name='run_after',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,9 +1,91 @@
 # models.py
-from django.db import models
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from datetime import timedelta, datetime
 from django.utils import timezone
 
+from .metrics import timer
+from .hos import CycleError, DutyCycle, duty_status, iter_cycle_duty_entries, iter_duty_entries, iter_log_sheets
+from .stops import place_route_stops
+
+
+def log_sheets_digest(log_sheets):
+    """The ETag stored in Trip.log_sheets_etag for a list of log sheet dicts."""
+    return hashlib.sha1(json.dumps(log_sheets, cls=DjangoJSONEncoder).encode()).hexdigest()
+
+
+class Driver(models.Model):
+    name = models.CharField(max_length=200)
+
+    # rolling 70-hour/8-day cycle as of the end of the last recorded trip (see hos.DutyCycle)
+    cycle_hours = models.JSONField(default=list, help_text='On-duty hours per day, indexed by date ordinal % 8')
+    cycle_day = models.IntegerField(blank=True, null=True, help_text='Date ordinal of the newest day in cycle_hours')
+    cycle_total = models.FloatField(default=0)
+    off_duty_since = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.name
+
+    def duty_cycle(self):
+        return DutyCycle(self.cycle_hours, self.cycle_day, self.cycle_total, self.off_duty_since)
+
+    def plan_trip(self, trip):
+        """
+        Cycle-aware log sheets for trip, starting from this driver's cycle;
+        returns (log_sheets, cycle after it). Raises CycleError for a trip
+        starting before the driver's last recorded trip ended.
+        """
+        if self.off_duty_since and trip.start_time < self.off_duty_since:
+            raise CycleError("Trip starts before the driver's last recorded trip ended")
+        cycle = self.duty_cycle()
+        if cycle.day is None and trip.current_cycle_hours:
+            # no history yet: the trip's reported cycle hours were worked right before it
+            cycle.charge(trip.start_time - timedelta(hours=trip.current_cycle_hours), trip.current_cycle_hours)
+
+        duty_entries = trip.with_stops(iter_cycle_duty_entries(
+            cycle, trip.start_time, trip.total_distance, trip.fuel_stops,
+            trip.pickup_location, trip.dropoff_location,
+        ))
+        log_sheets = [sheet.to_dict() for sheet in iter_log_sheets(trip.start_time, duty_entries)]
+        return log_sheets, cycle
+
+    def store_cycle(self, cycle):
+        self.cycle_hours = cycle.hours
+        self.cycle_day = cycle.day
+        self.cycle_total = cycle.total
+        self.off_duty_since = cycle.off_since
+        self.save(update_fields=['cycle_hours', 'cycle_day', 'cycle_total', 'off_duty_since'])
+
+    class Meta:
+        verbose_name = "Driver"
+        verbose_name_plural = "Drivers"
+
+
+class Vehicle(models.Model):
+    unit_number = models.CharField(max_length=50)
+    vin = models.CharField(max_length=17, blank=True)
+
+    def __str__(self):
+        return self.unit_number
+
+    class Meta:
+        verbose_name = "Vehicle"
+        verbose_name_plural = "Vehicles"
+
+
 class Trip(models.Model):
+    # fields generate_log_sheets() reads; sheets are rebuilt when any of them change
+    SCHEDULE_FIELDS = ('total_distance', 'fuel_stops', 'start_time', 'pickup_location', 'dropoff_location',
+                       'route_polyline')
+    # derived field -> the fields it is computed from (itself included, so it can't drift)
+    DERIVED_FIELDS = {
+        'fuel_stops': ('total_distance', 'fuel_stops'),
+        'worked_hours': ('current_cycle_hours', 'pickup_dropoff_time', 'worked_hours'),
+    }
+
     current_location = models.CharField(max_length=200)
     pickup_location = models.CharField(max_length=200)
     dropoff_location = models.CharField(max_length=200)
@@ -14,180 +96,263 @@ class Trip(models.Model):
     worked_hours = models.FloatField(default=0)
     fuel_stops = models.IntegerField(default=0)
     pickup_dropoff_time = models.FloatField(default=2)
+    # indexed together with start_time in Meta.indexes
+    driver = models.ForeignKey(Driver, on_delete=models.SET_NULL, related_name='trips',
+                               blank=True, null=True, db_index=False)
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.SET_NULL, related_name='trips',
+                                blank=True, null=True, db_index=False)
+
+    log_sheets_etag = models.CharField(max_length=40, blank=True, default='')
+    log_sheets_updated_at = models.DateTimeField(blank=True, null=True)
+
+    # set by route planning; the geometry is an encoded polyline (see polyline.py)
+    route_duration = models.FloatField(blank=True, null=True)
+    route_polyline = models.TextField(blank=True, default='')
 
     def __str__(self):
         return f"{self.pickup_location} to {self.dropoff_location}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._current_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        if fields is None or getattr(self, '_loaded_values', None) is None:
+            self._loaded_values = self._current_values()
+        else:
+            self._loaded_values.update({name: self.__dict__[name] for name in fields if name in self.__dict__})
+        self._log_sheets = None
+
+    def _current_values(self):
+        # deferred fields aren't in __dict__ and so are never reported dirty
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields if field.attname in self.__dict__
+        }
+
+    def dirty_fields(self):
+        """Fields changed since the trip was loaded or last saved; None if it never was."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return {
+            name for name, value in self._current_values().items()
+            if name not in loaded or loaded[name] != value
+        }
+
     def save(self, *args, **kwargs):
-        if self.total_distance is not None:
-            self.fuel_stops = int(self.total_distance // 1000)
-        self.worked_hours = round(self.current_cycle_hours + self.pickup_dropoff_time, 2)
-        super().save(*args, **kwargs)
+        dirty = None if self._state.adding else self.dirty_fields()
+        if dirty is None or dirty & set(self.DERIVED_FIELDS['fuel_stops']):
+            if self.total_distance is not None:
+                self.fuel_stops = int(self.total_distance // 1000)
+        if dirty is None or dirty & set(self.DERIVED_FIELDS['worked_hours']):
+            self.worked_hours = round(self.current_cycle_hours + self.pickup_dropoff_time, 2)
 
-    def generate_log_sheets(self):
-        log_sheets = []
-        time = timedelta(hours=0)
-        drive_speed = 60 
-        max_drive_hours = 11
-        break_after = 8  
-        off_duty_reset = 10  
-        max_on_duty = 14  
-
-        if not self.total_distance:
-            return log_sheets
-
-        total_drive_hours = self.total_distance / drive_speed
-        remaining_drive_hours = total_drive_hours
-        current_on_duty = 0
-        current_drive = 0
-        day_counter = 1
-        remaining_fuel_stops = self.fuel_stops
-
-        # first day's log
-        current_day_entries = []
-        current_day_start = time
-        current_day_drive = 0
-        current_day_on_duty = 0
-
-        # 1 hour ON-duty for pickup
-        current_day_entries.append({
-            'time': str(time),
-            'status': 'ON',
-            'duration': 1.0,
-            'activity': 'Pickup',
-            'location': self.pickup_location
-        })
-        time += timedelta(hours=1)
-        current_on_duty += 1
-        current_day_on_duty += 1
-
-        while remaining_drive_hours > 0:
-            # 30-min break requirement
-            if current_drive >= break_after:
-                current_day_entries.append({
-                    'time': str(time),
-                    'status': 'OFF',
-                    'duration': 0.5,
-                    'activity': '30-min break'
-                })
-                time += timedelta(minutes=30)
-                current_on_duty += 0.5
-                current_day_on_duty += 0.5
-                current_drive = 0
-
-            # 14-hour on-duty limit
-            if current_on_duty >= max_on_duty:
-                # current day's log
-                log_sheets.append(self._create_log_sheet(
-                    day_counter,
-                    current_day_entries,
-                    current_day_start,
-                    time
-                ))
-                
-                # Start new day
-                day_counter += 1
-                current_day_entries = []
-                current_day_start = time
-                current_day_drive = 0
-                current_day_on_duty = 0
-                
-                # 10-hour reset
-                current_day_entries.append({
-                    'time': str(time),
-                    'status': 'OFF',
-                    'duration': off_duty_reset,
-                    'activity': '10-hour reset'
-                })
-                time += timedelta(hours=off_duty_reset)
-                current_on_duty = 0
-                current_drive = 0
-
-            # next driving segment
-            drive_chunk = min(
-                max_drive_hours - current_drive,
-                max_on_duty - current_on_duty,
-                remaining_drive_hours
-            )
-
-            if drive_chunk <= 0:
-                break
-
-            # driving segment
-            progress = 1 - (remaining_drive_hours / total_drive_hours)
-            location = f"Route {progress:.1%}"
-            current_day_entries.append({
-                'time': str(time),
-                'status': 'DR',
-                'duration': drive_chunk,
-                'location': location
-            })
-            time += timedelta(hours=drive_chunk)
-            current_on_duty += drive_chunk
-            current_day_on_duty += drive_chunk
-            current_drive += drive_chunk
-            current_day_drive += drive_chunk
-            remaining_drive_hours -= drive_chunk
-
-            # fuel stops
-            if (remaining_fuel_stops > 0 and 
-                (total_drive_hours - remaining_drive_hours) >= 
-                (self.fuel_stops - remaining_fuel_stops + 1) * (1000/drive_speed)):
-                current_day_entries.append({
-                    'time': str(time),
-                    'status': 'ON',
-                    'duration': 0.25,
-                    'activity': 'Fuel stop',
-                    'location': location
-                })
-                time += timedelta(minutes=15)
-                current_on_duty += 0.25
-                current_day_on_duty += 0.25
-                remaining_fuel_stops -= 1
-
-        # Drop-off 1 hour
-        current_day_entries.append({
-            'time': str(time),
-            'status': 'ON',
-            'duration': 1.0,
-            'activity': 'Drop-off',
-            'location': self.dropoff_location
-        })
-        time += timedelta(hours=1)
-        
-        # last day's log
-        log_sheets.append(self._create_log_sheet(
-            day_counter,
-            current_day_entries,
-            current_day_start,
-            time
+        if dirty is not None:
+            # recomputing may have put a derived field back to its stored value
+            dirty = self.dirty_fields()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *(dirty & set(self.DERIVED_FIELDS))}
+            elif not kwargs.get('force_insert'):
+                # write only the changed columns; an empty set skips the query entirely
+                kwargs['update_fields'] = dirty
+
+        if dirty is not None and not dirty & set(self.SCHEDULE_FIELDS) and self.log_sheets_updated_at:
+            super().save(*args, **kwargs)
+            self._loaded_values = self._current_values()
+            return
+
+        with timer('log_sheets'):
+            log_sheets = self.generate_log_sheets()
+        self.log_sheets_etag = log_sheets_digest(log_sheets)
+        self.log_sheets_updated_at = timezone.now()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'log_sheets_etag', 'log_sheets_updated_at'}
+
+        with transaction.atomic():
+            if not self._state.adding:
+                # the sheets are replaced wholesale, so concurrent saves of a trip take turns
+                Trip.objects.select_for_update().filter(pk=self.pk).exists()
+            super().save(*args, **kwargs)
+            self._store_log_sheets(log_sheets)
+        self._loaded_values = self._current_values()
+        self._log_sheets = log_sheets
+
+    def _store_log_sheets(self, log_sheets):
+        LogSheet.objects.filter(trip=self).delete()
+        LogSheet.objects.bulk_create([LogSheet.from_dict(self, sheet) for sheet in log_sheets])
+
+    def stored_log_sheets(self):
+        """
+        Persisted log sheets. Trips bulk-created without them get them
+        generated in memory; nothing is written on a read.
+        """
+        if getattr(self, '_log_sheets', None) is not None:
+            return self._log_sheets
+        if self.log_sheets_updated_at is None:
+            return self.generate_log_sheets()
+        return [sheet.to_dict() for sheet in self.log_sheets.order_by('day')]
+
+    def iter_duty_entries(self):
+        return self.with_stops(iter_duty_entries(
+            self.total_distance, self.fuel_stops, self.pickup_location, self.dropoff_location
         ))
 
-        return log_sheets
-
-    def _create_log_sheet(self, day, entries, start_time, end_time):
-   
-        drive_hours = sum(e['duration'] for e in entries if e['status'] == 'DR')
-        on_duty_hours = sum(e['duration'] for e in entries if e['status'] in ('DR', 'ON'))
-        off_duty_hours = sum(e['duration'] for e in entries if e['status'] in ('OFF', 'SB'))
-        
-        # Calculate date based on trip start time
-        sheet_date = (self.start_time + start_time).date()
-        
+    def with_stops(self, duty_entries):
+        """duty_entries with stops placed at POIs along the stored route, if the trip has one."""
+        return place_route_stops(duty_entries, self.route_polyline, self.total_distance)
+
+    def iter_log_sheets(self):
+        return iter_log_sheets(self.start_time, self.iter_duty_entries())
+
+    def generate_log_sheets(self):
+        return [sheet.to_dict() for sheet in self.iter_log_sheets()]
+
+    def duty_status(self, now=None):
+        return duty_status(self.start_time, self.iter_duty_entries(), now or timezone.now())
+
+    class Meta:
+        verbose_name = "Trip"
+        verbose_name_plural = "Trips"
+        indexes = [
+            models.Index(fields=['start_time', 'id'], name='trip_start_time_idx'),
+            models.Index(fields=['pickup_location', 'start_time', 'id'], name='trip_pickup_idx'),
+            models.Index(fields=['dropoff_location', 'start_time', 'id'], name='trip_dropoff_idx'),
+            models.Index(fields=['current_location', 'start_time', 'id'], name='trip_current_location_idx'),
+            models.Index(fields=['driver', 'start_time'], name='trip_driver_start_idx'),
+            models.Index(fields=['vehicle', 'start_time'], name='trip_vehicle_start_idx'),
+        ]
+
+class GeocodeCacheEntry(models.Model):
+    key = models.CharField(max_length=200, unique=True)
+    longitude = models.FloatField()
+    latitude = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.longitude}, {self.latitude})"
+
+    @property
+    def coords(self):
+        return [self.longitude, self.latitude]
+
+    class Meta:
+        verbose_name = "Geocode cache entry"
+        verbose_name_plural = "Geocode cache entries"
+
+
+class RouteCacheEntry(models.Model):
+    key = models.CharField(max_length=100, unique=True)
+    profile = models.CharField(max_length=30, default='driving-car')
+    distance = models.FloatField(help_text='Route distance in meters')
+    duration = models.FloatField(default=0, help_text='Route duration in seconds')
+    geometry = models.BinaryField(help_text='zlib-compressed JSON coordinate list')
+    hits = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.distance} m)"
+
+    class Meta:
+        verbose_name = "Route cache entry"
+        verbose_name_plural = "Route cache entries"
+
+
+class RouteJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='route_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    error_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # not claimed before this time: set when a job is put back while upstream is down
+    run_after = models.DateTimeField(blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Route job {self.pk} for trip {self.trip_id} ({self.status})"
+
+    def to_dict(self, include_result=False):
+        data = {
+            'job_id': self.pk,
+            'trip_id': self.trip_id,
+            'status': self.status,
+            'status_url': f"/jobs/{self.pk}",
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if self.status == self.QUEUED and self.run_after:
+            data['run_after'] = self.run_after.isoformat()
+        if include_result and self.status == self.DONE:
+            data.update(self.result)
+        if self.status == self.FAILED:
+            data['error'] = self.error
+            data['error_status'] = self.error_status
+        return data
+
+    class Meta:
+        verbose_name = "Route job"
+        verbose_name_plural = "Route jobs"
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+
+class LogSheet(models.Model):
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='log_sheets')
+    day = models.PositiveIntegerField()
+    date = models.DateField()
+    start_time = models.CharField(max_length=32)
+    end_time = models.CharField(max_length=32)
+    entries = models.JSONField(default=list)
+    summary = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Trip {self.trip_id} day {self.day}"
+
+    @classmethod
+    def from_dict(cls, trip, sheet):
+        return cls(
+            trip=trip,
+            day=sheet['day'],
+            date=sheet['date'],
+            start_time=sheet['start_time'],
+            end_time=sheet['end_time'],
+            entries=sheet['entries'],
+            summary=sheet['summary'],
+        )
+
+    def to_dict(self):
         return {
-            'day': day,
-            'date': sheet_date.strftime('%Y-%m-%d'),
-            'start_time': str(start_time),
-            'end_time': str(end_time),
-            'entries': entries,
-            'summary': {
-                'drive_hours': round(drive_hours, 2),
-                'on_duty_hours': round(on_duty_hours, 2),
-                'off_duty_hours': round(off_duty_hours, 2),
-                'fuel_stops': sum(1 for e in entries if e.get('activity') == 'Fuel stop')
-            }
+            'day': self.day,
+            'date': self.date.strftime('%Y-%m-%d'),
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'entries': self.entries,
+            'summary': self.summary,
         }
 
     class Meta:
-        verbose_name = "Trip"
-        verbose_name_plural = "Trips"
\ No newline at end of file
+        verbose_name = "Log sheet"
+        verbose_name_plural = "Log sheets"
+        constraints = [
+            models.UniqueConstraint(fields=['trip', 'day'], name='unique_trip_log_sheet_day'),
+        ]
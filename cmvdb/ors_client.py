@@ -0,0 +1,203 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RoutingError(Exception):
+    def __init__(self, status_code, message="Failed to fetch route information"):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class ServiceUnavailable(RoutingError):
+    def __init__(self, message="Routing service unavailable"):
+        super().__init__(503, message)
+
+
+class CircuitOpen(ServiceUnavailable):
+    """Rejected by the circuit breaker without calling upstream; retry_after is in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__()
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; lets one probe through after `reset_timeout`."""
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def retry_after(self):
+        """Seconds until an open breaker lets a probe through."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+            return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0)
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class ORSClient:
+    """Keep-alive, connection-pooled session shared by every ORS call in the process."""
+
+    def __init__(self, base_url, api_key, timeout, pool_size, max_retries, backoff, breaker):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.breaker = breaker
+        self.session = requests.Session()
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='ors')
+
+    def get(self, path, params):
+        if not self.breaker.allow():
+            raise CircuitOpen(self.breaker.retry_after())
+
+        params = {"api_key": self.api_key, **params}
+        try:
+            response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise ServiceUnavailable()
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def map(self, fn, items):
+        """Run fn over items concurrently on the shared pool, preserving order."""
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        return list(self.executor.map(fn, items))
+
+
+class AsyncORSClient:
+    """httpx-based counterpart of ORSClient for the async views.
+
+    httpx clients are bound to the event loop that created them, so one is kept
+    per running loop. The circuit breaker is shared with the sync client.
+    """
+
+    def __init__(self, base_url, api_key, timeout, pool_size, max_retries, backoff, breaker):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        self.limits = httpx.Limits(max_connections=pool_size * 10, max_keepalive_connections=pool_size)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker
+        self._clients = {}
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            for stale in [l for l in self._clients if l.is_closed()]:
+                del self._clients[stale]
+            client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._clients[loop] = client
+        return client
+
+    async def get(self, path, params):
+        if not self.breaker.allow():
+            raise CircuitOpen(self.breaker.retry_after())
+
+        params = {"api_key": self.api_key, **params}
+        client = self._client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.get(f"{self.base_url}{path}", params=params)
+            except httpx.HTTPError:
+                response = None
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                break
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+
+        if response is None:
+            self.breaker.record_failure()
+            raise ServiceUnavailable()
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+
+ors_client = ORSClient(
+    base_url=settings.ORS_BASE_URL,
+    api_key=settings.ORS_API_KEY,
+    timeout=(settings.ORS_CONNECT_TIMEOUT, settings.ORS_READ_TIMEOUT),
+    pool_size=settings.ORS_POOL_SIZE,
+    max_retries=settings.ORS_MAX_RETRIES,
+    backoff=settings.ORS_RETRY_BACKOFF,
+    breaker=CircuitBreaker(settings.ORS_BREAKER_THRESHOLD, settings.ORS_BREAKER_RESET),
+)
+
+async_ors_client = AsyncORSClient(
+    base_url=settings.ORS_BASE_URL,
+    api_key=settings.ORS_API_KEY,
+    timeout=(settings.ORS_CONNECT_TIMEOUT, settings.ORS_READ_TIMEOUT),
+    pool_size=settings.ORS_POOL_SIZE,
+    max_retries=settings.ORS_MAX_RETRIES,
+    backoff=settings.ORS_RETRY_BACKOFF,
+    breaker=ors_client.breaker,
+)
@@ -0,0 +1,156 @@
+"""
+Local stand-in for the openrouteservice endpoints used by trip_route.
+
+Geocoding is deterministic (the same text always maps to the same point in
+the continental US) and directions return a straight-line route, so it can be
+used for local development and benchmarks with ORS_BASE_URL pointed at it.
+"""
+
+import hashlib
+import json
+import math
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def stub_coords(text):
+    digest = hashlib.sha1(text.strip().lower().encode()).digest()
+    lon = -124.0 + (int.from_bytes(digest[:4], 'big') / 2 ** 32) * 57.0
+    lat = 25.0 + (int.from_bytes(digest[4:8], 'big') / 2 ** 32) * 24.0
+    return [round(lon, 6), round(lat, 6)]
+
+
+def haversine_meters(start, end):
+    lon1, lat1, lon2, lat2 = map(math.radians, (*start, *end))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+
+def stub_route(start, end, points=50):
+    # road distance is roughly 1.2x the great-circle distance
+    distance = round(haversine_meters(start, end) * 1.2, 1)
+    coordinates = [
+        [round(start[0] + (end[0] - start[0]) * i / points, 6),
+         round(start[1] + (end[1] - start[1]) * i / points, 6)]
+        for i in range(points + 1)
+    ]
+    return {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": coordinates},
+            "properties": {
+                "summary": {"distance": distance, "duration": round(distance / 26.8, 1)},
+            },
+        }],
+    }
+
+
+class ORSStubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    counts = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.latency:
+            time.sleep(self.latency)
+
+        if url.path == '/geocode/search':
+            self._count('geocode')
+            text = params.get('text', '')
+            if not text:
+                return self._send(400, {"error": "text is required"})
+            return self._send(200, {
+                "type": "FeatureCollection",
+                "features": [{
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": stub_coords(text)},
+                    "properties": {"label": text},
+                }],
+            })
+
+        if url.path.startswith('/v2/directions/'):
+            self._count('directions')
+            try:
+                start = [float(v) for v in params['start'].split(',')]
+                end = [float(v) for v in params['end'].split(',')]
+            except (KeyError, ValueError):
+                return self._send(400, {"error": "start and end are required"})
+            return self._send(200, stub_route(start, end))
+
+        self._send(404, {"error": "Not found"})
+
+    def _count(self, name):
+        with self.server.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ORSStubServer(ThreadingHTTPServer):
+    # the default listen backlog of 5 makes bursts of connections wait out SYN retries
+    request_queue_size = 1024
+
+
+def make_server(host='127.0.0.1', port=0, latency=0.0):
+    """Build a stub server; port 0 picks a free port (see server.server_port)."""
+    handler = type('Handler', (ORSStubHandler,), {'latency': latency, 'counts': {}})
+    server = ORSStubServer((host, port), handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.counts = handler.counts
+    return server
+
+
+def start_in_thread(**kwargs):
+    server = make_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    server.base_url = f"http://{host}:{port}"
+    return server
+
+
+def _serve(conn, kwargs):
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn.send(server.server_address[:2])
+    conn.recv()
+    server.shutdown()
+    conn.send(dict(server.counts))
+
+
+class StubProcess:
+    """An ors_stub server in a child process, so it doesn't share the GIL with the app under test."""
+
+    def __init__(self, **kwargs):
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.get_context('spawn').Process(
+            target=_serve, args=(child_conn, kwargs), daemon=True)
+        self._process.start()
+        host, port = self._conn.recv()
+        self.base_url = f"http://{host}:{port}"
+        self.counts = {}
+
+    def shutdown(self):
+        self._conn.send('stop')
+        self.counts = self._conn.recv()
+        self._process.join()
+
+
+def start_in_process(**kwargs):
+    return StubProcess(**kwargs)
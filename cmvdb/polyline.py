@@ -0,0 +1,108 @@
+"""
+Route geometry storage and simplification.
+
+Trip routes are stored in the encoded polyline format (the one Google Maps,
+OSRM and ORS use): each point's lat/lon delta from the previous point, scaled
+to integers and written as base64-like variable-length chunks. At precision 5
+a point costs 2-8 bytes instead of ~40 as JSON. Coordinates go in and come
+out as [lon, lat] like the rest of the app; the encoded string is lat-first
+per the format, so standard decoders read it directly.
+
+simplify() is Douglas-Peucker; tolerance_for_zoom() picks the tolerance that
+keeps the line within a pixel at a web map zoom level.
+"""
+
+import math
+
+import numpy as np
+
+PRECISION = 5
+MAX_ZOOM = 22
+# below this many points a plain loop beats NumPy's per-call overhead
+SHORT_SEGMENT = 64
+
+
+def _encode_value(value, chunks):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+
+
+def encode(coordinates, precision=PRECISION):
+    if not len(coordinates):
+        return ''
+    scaled = np.rint(np.asarray(coordinates, dtype=np.float64)[:, ::-1] * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=[[0, 0]])
+    chunks = []
+    for value in deltas.ravel().tolist():
+        _encode_value(value, chunks)
+    return ''.join(chunks)
+
+
+def decode(text, precision=PRECISION):
+    values = []
+    value = shift = 0
+    for char in text:
+        byte = ord(char) - 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    if not values:
+        return []
+    points = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0)[:, ::-1] / 10 ** precision
+    return points.round(precision).tolist()
+
+
+def _farthest(xs, ys, x_list, y_list, first, last):
+    # (distance, index) of the point between first and last farthest from the chord
+    x0, y0 = x_list[first], y_list[first]
+    dx, dy = x_list[last] - x0, y_list[last] - y0
+    length = math.hypot(dx, dy)
+    if last - first > SHORT_SEGMENT:
+        inner_x, inner_y = xs[first + 1:last] - x0, ys[first + 1:last] - y0
+        if length == 0:
+            distances = np.hypot(inner_x, inner_y)
+        else:
+            distances = np.abs(dx * inner_y - dy * inner_x) / length
+        index = int(np.argmax(distances))
+        return float(distances[index]), first + 1 + index
+
+    best, best_index = -1.0, first
+    for i in range(first + 1, last):
+        px, py = x_list[i] - x0, y_list[i] - y0
+        distance = math.hypot(px, py) if length == 0 else abs(dx * py - dy * px) / length
+        if distance > best:
+            best, best_index = distance, i
+    return best, best_index
+
+
+def simplify(coordinates, tolerance):
+    """Douglas-Peucker: drop points closer than tolerance (in degrees) to the simplified line."""
+    points = np.asarray(coordinates, dtype=np.float64)
+    if len(points) < 3 or tolerance <= 0:
+        return points.tolist()
+
+    xs, ys = points[:, 0], points[:, 1]
+    x_list, y_list = xs.tolist(), ys.tolist()
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distance, split = _farthest(xs, ys, x_list, y_list, first, last)
+        if distance > tolerance:
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return points[keep].tolist()
+
+
+def tolerance_for_zoom(zoom):
+    # degrees of longitude covered by one 256px-tile pixel at this zoom
+    return 360 / (256 * 2 ** zoom)
@@ -0,0 +1,248 @@
+"""
+Response cache for the trip read endpoints: GET /trips/, /trips/<id> and
+/trips/<id>/logs/.
+
+    @api_view(['GET', 'PUT', 'DELETE'])
+    @cached_response('id')
+    def trip_detail(request, id):
+
+keeps the view's 200 GET responses in the 'responses' cache (settings.CACHES)
+keyed by view, trip and query string. Rather than being deleted, keys embed
+version tokens: saving or deleting a trip replaces that trip's token and the
+list token once the transaction commits, so the old entries can no longer be
+reached and age out after RESPONSE_CACHE_TTL. This works the same on every
+backend, none of which can delete by key pattern.
+
+The tokens are only seen by processes sharing the cache: a locmem cache would
+never learn of trips written by route_worker, ingest_trips or another web
+worker, so a system check refuses RESPONSE_CACHE_ENABLED with the locmem backend.
+
+Every cached response carries an ETag (the view's own, or a hash of the body)
+and If-None-Match / If-Modified-Since are answered with a bodiless 304 from
+the cache, without touching the database.
+"""
+
+import functools
+import hashlib
+import threading
+import uuid
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from .asyncdb import database_sync_to_async
+from .metrics import timer
+from .models import Driver, Trip, Vehicle
+
+GLOBAL_VERSION = 'responses:version'
+LIST_VERSION = 'responses:trips:version'
+# past this many trips changed in one transaction (a bulk delete), start over instead
+MAX_PENDING_KEYS = 1000
+
+
+def trip_version_key(trip_id):
+    return f'responses:trip:{trip_id}:version'
+
+
+class ResponseCache:
+    def __init__(self, alias='responses'):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, view, trip_id, params):
+        """Cache key for view's response to params, for one trip or (trip_id None) the list."""
+        query = urlencode(sorted(params.lists()), doseq=True)
+        digest = hashlib.sha1(f'{view}:{trip_id}:{query}'.encode()).hexdigest()
+        scope = LIST_VERSION if trip_id is None else trip_version_key(trip_id)
+        return f'responses:{digest}:{self._versions(GLOBAL_VERSION, scope)}'
+
+    def _versions(self, *keys):
+        cache = self.cache
+        versions = cache.get_many(keys)
+        missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+        if missing:
+            # a new token (first use, or evicted) only orphans entries, it never revives them
+            cache.set_many(missing, timeout=None)
+            versions.update(missing)
+        return ':'.join(versions[key] for key in keys)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def store(self, key, response):
+        """Cache response under key, giving it an ETag if the view didn't; returns the entry."""
+        if not response.has_header('ETag'):
+            response['ETag'] = f'"{hashlib.sha1(response.content).hexdigest()}"'
+        last_modified = response.get('Last-Modified')
+        entry = (
+            response.content,
+            response['Content-Type'],
+            response['ETag'],
+            parse_http_date_safe(last_modified) if last_modified else None,
+        )
+        self.cache.set(key, entry)
+        return entry
+
+    def invalidate(self, *keys):
+        # replaced on commit: a request served between the write and the commit
+        # would otherwise cache the old rows under the new token
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = set()
+        pending.update(keys)
+        transaction.on_commit(self._flush)
+
+    def _flush(self):
+        pending = getattr(self._local, 'pending', None)
+        if not pending:
+            return
+        self._local.pending = set()
+        if len(pending) > MAX_PENDING_KEYS:
+            pending = {GLOBAL_VERSION}
+        self.cache.set_many({key: uuid.uuid4().hex for key in pending}, timeout=None)
+
+    def invalidate_trip(self, trip_id):
+        self.invalidate(trip_version_key(trip_id), LIST_VERSION)
+
+    def invalidate_list(self):
+        """For writes that skip the model signals, e.g. bulk_create()."""
+        self.invalidate(LIST_VERSION)
+
+    def invalidate_all(self):
+        self.invalidate(GLOBAL_VERSION)
+
+    def record(self, hit, not_modified):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if not_modified:
+                self.not_modified += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': settings.RESPONSE_CACHE_BACKEND,
+                'enabled': settings.RESPONSE_CACHE_ENABLED,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def _entry_response(entry):
+    content, content_type, etag, last_modified = entry
+    response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def cached_response(trip_kwarg=None):
+    """
+    Serve a view's GETs through response_cache. trip_kwarg names the URL
+    kwarg holding the trip id; without one the view is cached as the list.
+    Only 200 responses are stored; other methods go straight to the view.
+    Async views are supported, with the cache used through asyncdb's pool.
+    """
+    def decorator(view):
+        name = f'{view.__module__}.{view.__qualname__}'
+
+        def lookup(request, kwargs):
+            with timer('response_cache'):
+                key = response_cache.key(name, kwargs[trip_kwarg] if trip_kwarg else None, request.GET)
+                return key, response_cache.get(key)
+
+        def respond(request, entry, response=None):
+            # no response: entry is a cache hit
+            hit = response is None
+            if hit:
+                response = _entry_response(entry)
+            _, _, etag, last_modified = entry
+            conditional = get_conditional_response(request, etag=etag, last_modified=last_modified,
+                                                   response=response)
+            response_cache.record(hit, conditional is not response)
+            return conditional
+
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method != 'GET' or not settings.RESPONSE_CACHE_ENABLED:
+                    return await view(request, *args, **kwargs)
+
+                key, entry = await database_sync_to_async(lookup)(request, kwargs)
+                if entry is not None:
+                    return respond(request, entry)
+                response = await view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                entry = await database_sync_to_async(response_cache.store)(key, response)
+                return respond(request, entry, response)
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or not settings.RESPONSE_CACHE_ENABLED:
+                return view(request, *args, **kwargs)
+
+            key, entry = lookup(request, kwargs)
+            if entry is not None:
+                return respond(request, entry)
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            entry = response_cache.store(key, response)
+            return respond(request, entry, response)
+
+        return wrapper
+    return decorator
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_backend(app_configs, **kwargs):
+    if settings.RESPONSE_CACHE_ENABLED and settings.RESPONSE_CACHE_BACKEND == 'locmem':
+        return [checks.Error(
+            'RESPONSE_CACHE_ENABLED needs a cache shared between processes.',
+            hint="Set RESPONSE_CACHE_BACKEND to 'file' or 'redis': a locmem cache "
+                 'misses invalidations from writes made by other processes.',
+            id='cmvdb.E001',
+        )]
+    return []
+
+
+@receiver(post_save, sender=Trip)
+@receiver(post_delete, sender=Trip)
+def _trip_changed(sender, instance, **kwargs):
+    response_cache.invalidate_trip(instance.pk)
+
+
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=Vehicle)
+def _trips_reassigned(sender, **kwargs):
+    # on_delete=SET_NULL updates the trips with a query, which sends no Trip signals
+    response_cache.invalidate_all()
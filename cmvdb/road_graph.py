@@ -0,0 +1,158 @@
+"""
+A road network held in compressed sparse row (CSR) form for offline routing.
+
+The file format is JSON (optionally gzipped):
+
+    {"nodes": [[lon, lat, name_or_null], ...],
+     "edges": [[from, to, meters], ...],
+     "directed": false}
+
+Node i's outgoing edges are targets[offsets[i]:offsets[i + 1]] with the
+matching lengths, all kept in flat typed arrays (4 bytes per target, 8 per
+length) instead of per-node Python lists. Queries use A* with a great-circle
+heuristic scaled by the graph's smallest length-to-straight-line ratio, so it
+never overestimates the remaining distance.
+"""
+
+import gzip
+import heapq
+import json
+import math
+import re
+from array import array
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
+
+
+def distance_meters(start, end):
+    """Great-circle distance between two [lon, lat] points in degrees."""
+    return _haversine(*(math.radians(float(value)) for value in (start[0], start[1], end[0], end[1])))
+
+
+def place_key(name):
+    return re.sub(r'[\W_]+', ' ', name.lower()).strip()
+
+
+def _haversine(lon1, lat1, lon2, lat2):
+    # radians in, meters out
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class RoadGraph:
+    def __init__(self, lons, lats, sources, targets, lengths, names=None):
+        order = np.argsort(sources, kind='stable')
+        counts = np.bincount(sources, minlength=len(lons))
+
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.offsets = array('q', np.concatenate(([0], np.cumsum(counts))).astype(np.int64).tobytes())
+        self.targets = array('i', np.asarray(targets, dtype=np.int32)[order].tobytes())
+        self.lengths = array('d', np.asarray(lengths, dtype=np.float64)[order].tobytes())
+        # radians for the heuristic, as plain floats for the search loop
+        self._lon_rad = array('d', np.radians(self.lons).tobytes())
+        self._lat_rad = array('d', np.radians(self.lats).tobytes())
+        self.names = names or {}
+        self.detour = self._min_detour(np.asarray(sources), np.asarray(targets), np.asarray(lengths))
+
+    def _min_detour(self, sources, targets, lengths):
+        # smallest edge length / straight-line ratio: the heuristic scaled by it is
+        # still a lower bound on the remaining distance, but a much tighter one
+        lon = np.radians(self.lons)
+        lat = np.radians(self.lats)
+        a = (np.sin((lat[targets] - lat[sources]) / 2) ** 2 +
+             np.cos(lat[sources]) * np.cos(lat[targets]) * np.sin((lon[targets] - lon[sources]) / 2) ** 2)
+        straight = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        ratios = lengths[straight > 0] / straight[straight > 0]
+        if not len(ratios):
+            return 1.0
+        # a hair under the minimum so float rounding can't make it overestimate
+        return float(ratios.min()) * (1 - 1e-9)
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if str(path).endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            data = json.load(f)
+
+        nodes = data['nodes']
+        edges = np.asarray(data['edges'], dtype=np.float64).reshape(-1, 3)
+        sources = edges[:, 0].astype(np.int64)
+        targets = edges[:, 1].astype(np.int64)
+        lengths = edges[:, 2]
+        if not data.get('directed', False):
+            sources, targets = np.concatenate((sources, targets)), np.concatenate((targets, sources))
+            lengths = np.concatenate((lengths, lengths))
+
+        names = {place_key(node[2]): i for i, node in enumerate(nodes) if len(node) > 2 and node[2]}
+        return cls([node[0] for node in nodes], [node[1] for node in nodes],
+                   sources, targets, lengths, names)
+
+    @property
+    def node_count(self):
+        return len(self.lons)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def nbytes(self):
+        arrays = (self.offsets, self.targets, self.lengths, self._lon_rad, self._lat_rad)
+        return self.lons.nbytes + self.lats.nbytes + sum(a.itemsize * len(a) for a in arrays)
+
+    def find_place(self, text):
+        """Node named text, trying "Chicago, IL" as a whole and then "Chicago"."""
+        for candidate in (text, text.split(',')[0]):
+            node = self.names.get(place_key(candidate))
+            if node is not None:
+                return node
+        return None
+
+    def nearest_node(self, lon, lat):
+        """Closest node to (lon, lat), by equirectangular distance over every node."""
+        dx = (self.lons - lon) * math.cos(math.radians(lat))
+        dy = self.lats - lat
+        return int(np.argmin(dx * dx + dy * dy))
+
+    def shortest_path(self, source, target, heuristic=True):
+        """(meters, [node, ...]) from source to target, or None if unreachable.
+
+        heuristic=False runs plain Dijkstra (used by the benchmark).
+        """
+        offsets, targets, lengths = self.offsets, self.targets, self.lengths
+        lon_rad, lat_rad = self._lon_rad, self._lat_rad
+        goal_lon, goal_lat = lon_rad[target], lat_rad[target]
+        detour = self.detour
+
+        def estimate(node):
+            return detour * _haversine(lon_rad[node], lat_rad[node], goal_lon, goal_lat) if heuristic else 0.0
+
+        best = [math.inf] * self.node_count
+        best[source] = 0.0
+        previous = {}
+        heap = [(estimate(source), 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                path = [node]
+                while node in previous:
+                    node = previous[node]
+                    path.append(node)
+                path.reverse()
+                return cost, path
+            if cost > best[node]:
+                continue
+            for i in range(offsets[node], offsets[node + 1]):
+                neighbour = targets[i]
+                new_cost = cost + lengths[i]
+                if new_cost < best[neighbour]:
+                    best[neighbour] = new_cost
+                    previous[neighbour] = node
+                    heapq.heappush(heap, (new_cost + estimate(neighbour), new_cost, neighbour))
+        return None
+
+    def coordinates(self, path):
+        return [[round(float(self.lons[node]), 6), round(float(self.lats[node]), 6)] for node in path]
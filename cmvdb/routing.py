@@ -0,0 +1,281 @@
+import json
+import threading
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .asyncdb import database_sync_to_async
+from .geocoding import ageocode_locations, geocode_locations
+from . import polyline
+from .metrics import timer
+from .models import RouteCacheEntry
+from .ors_client import RoutingError
+from .routing_backends import get_backend
+
+DEFAULT_PROFILE = 'driving-car'
+GEOMETRY_FORMATS = ('polyline', 'geojson')
+
+
+def meters_to_miles(meters):
+    return round(meters / 1609.34, 2)
+
+
+def round_coords(coords, precision=None):
+    if precision is None:
+        precision = settings.ROUTE_CACHE_PRECISION
+    return [round(float(coords[0]), precision), round(float(coords[1]), precision)]
+
+
+def route_key(pickup_coords, dropoff_coords, profile=DEFAULT_PROFILE):
+    start = round_coords(pickup_coords)
+    end = round_coords(dropoff_coords)
+    return f"{get_backend().key_prefix}{profile}:{start[0]},{start[1]}:{end[0]},{end[1]}"
+
+
+def compress_geometry(coordinates):
+    return zlib.compress(json.dumps(coordinates, separators=(',', ':')).encode())
+
+
+def decompress_geometry(blob):
+    return json.loads(zlib.decompress(bytes(blob)))
+
+
+def route_feature(route):
+    """GeoJSON FeatureCollection in the shape ORS directions responses use."""
+    return {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": route['coordinates']},
+            "properties": {
+                "summary": {"distance": route['distance'], "duration": route['duration']},
+            },
+        }],
+    }
+
+
+def apply_route(trip, route, encoded=None):
+    """Copy a route's distance, duration and geometry onto trip (not saved)."""
+    trip.total_distance = meters_to_miles(route['distance'])
+    trip.current_location = trip.dropoff_location
+    trip.route_duration = route['duration']
+    trip.route_polyline = polyline.encode(route['coordinates']) if encoded is None else encoded
+
+
+def wants_geometry(params):
+    return params.get('geometry', 'false').lower() not in ('0', 'false', 'no')
+
+
+def route_summary(trip, route):
+    """Payload for /route: the summary plus a link to the stored geometry."""
+    return {
+        "distance": route['distance'],
+        "duration": route['duration'],
+        "points": len(route['coordinates']),
+        "geometry": f"/trips/{trip.pk}/route/geometry",
+    }
+
+
+def route_geometry(trip_id, encoded, fmt='polyline', zoom=None):
+    """Payload for /route/geometry: the stored line, Douglas-Peucker simplified for zoom if given."""
+    if zoom is not None:
+        coordinates = polyline.simplify(polyline.decode(encoded), polyline.tolerance_for_zoom(zoom))
+        encoded = polyline.encode(coordinates)
+    elif fmt == 'geojson':
+        coordinates = polyline.decode(encoded)
+
+    properties = {"trip_id": trip_id, "zoom": zoom}
+    if fmt == 'polyline':
+        return {**properties, "precision": polyline.PRECISION, "polyline": encoded}
+    return {
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+        "properties": {**properties, "points": len(coordinates)},
+    }
+
+
+class RouteCache:
+    """
+    Directions results in the RouteCacheEntry table. A hit is a single
+    SELECT: its hit count and last_used_at are only written back once
+    touch_interval has passed since the last write, so serving cached lanes
+    doesn't take SQLite's write lock on every request. Eviction runs from
+    set() at most once per evict_interval (or with `manage.py route_cache
+    --evict`), so max_entries can be overshot by what one interval adds.
+    """
+
+    def __init__(self, ttl, max_entries, touch_interval=0, evict_interval=0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # hits not yet written back, by entry pk
+        self._pending_hits = {}
+        self._evicted_at = None
+
+    def get(self, key):
+        now = timezone.now()
+        entry = RouteCacheEntry.objects.filter(key=key, expires_at__gt=now).first()
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            pending = self._pending_hits.pop(entry.pk, 0) + 1
+            if entry.last_used_at > now - timedelta(seconds=self.touch_interval):
+                if len(self._pending_hits) >= self.max_entries:
+                    # entries that were never hit again; their counts are only approximate anyway
+                    self._pending_hits.clear()
+                self._pending_hits[entry.pk] = pending
+                pending = 0
+        if pending:
+            RouteCacheEntry.objects.filter(pk=entry.pk).update(hits=F('hits') + pending, last_used_at=now)
+        return {
+            'distance': entry.distance,
+            'duration': entry.duration,
+            'coordinates': decompress_geometry(entry.geometry),
+        }
+
+    def set(self, key, profile, route):
+        entry = RouteCacheEntry(
+            key=key,
+            profile=profile,
+            distance=route['distance'],
+            duration=route['duration'],
+            geometry=compress_geometry(route['coordinates']),
+            expires_at=timezone.now() + timedelta(seconds=self.ttl),
+        )
+        RouteCacheEntry.objects.bulk_create(
+            [entry],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['profile', 'distance', 'duration', 'geometry', 'last_used_at', 'expires_at'],
+        )
+        with self._lock:
+            due = self._evicted_at is None or time.monotonic() - self._evicted_at >= self.evict_interval
+            if due:
+                self._evicted_at = time.monotonic()
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Delete expired entries, then the least recently used past max_entries; returns how many."""
+        deleted, _ = RouteCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        overflow = RouteCacheEntry.objects.count() - self.max_entries
+        if overflow > 0:
+            stale = RouteCacheEntry.objects.order_by('last_used_at').values_list('pk', flat=True)[:overflow]
+            deleted += RouteCacheEntry.objects.filter(pk__in=list(stale)).delete()[0]
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self._pending_hits.clear()
+        RouteCacheEntry.objects.all().delete()
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'entries': RouteCacheEntry.objects.count(),
+            'max_entries': self.max_entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+route_cache = RouteCache(settings.ROUTE_CACHE_TTL, settings.ROUTE_CACHE_MAX_ENTRIES,
+                         settings.ROUTE_CACHE_TOUCH_INTERVAL, settings.ROUTE_CACHE_EVICT_INTERVAL)
+
+
+def fetch_directions(start, end, profile=DEFAULT_PROFILE):
+    backend = get_backend()
+    with timer(f'{backend.name}_directions'):
+        return backend.directions(start, end, profile)
+
+
+async def afetch_directions(start, end, profile=DEFAULT_PROFILE):
+    backend = get_backend()
+    with timer(f'{backend.name}_directions'):
+        return await backend.adirections(start, end, profile)
+
+
+def get_route(pickup_coords, dropoff_coords, profile=DEFAULT_PROFILE):
+    """Distance/duration/coordinates for a lane, from the cache when possible."""
+    key = route_key(pickup_coords, dropoff_coords, profile)
+    route = route_cache.get(key)
+    if route is not None:
+        return route
+
+    route = fetch_directions(round_coords(pickup_coords), round_coords(dropoff_coords), profile)
+    route_cache.set(key, profile, route)
+    return route
+
+
+async def aget_route(pickup_coords, dropoff_coords, profile=DEFAULT_PROFILE):
+    key = route_key(pickup_coords, dropoff_coords, profile)
+    route = await database_sync_to_async(route_cache.get)(key)
+    if route is not None:
+        return route
+
+    route = await afetch_directions(round_coords(pickup_coords), round_coords(dropoff_coords), profile)
+    await database_sync_to_async(route_cache.set)(key, profile, route)
+    return route
+
+
+def plan_route(trip, geometry=False):
+    """Geocode and route a trip, save it and return the /route payload.
+
+    The route is a summary with a link to GET /trips/<id>/route/geometry unless
+    geometry=True, which embeds the full GeoJSON as earlier versions did.
+    """
+    with timer('geocode'):
+        pickup_coords, dropoff_coords = geocode_locations(
+            [trip.pickup_location, trip.dropoff_location]
+        )
+    if not pickup_coords or not dropoff_coords:
+        raise RoutingError(400, "Failed to geocode one or both locations")
+
+    with timer('directions'):
+        route = get_route(pickup_coords, dropoff_coords)
+
+    return finish_route(trip, route, geometry)
+
+
+async def aplan_route(trip, geometry=False):
+    """plan_route for the async views; upstream calls are awaited and DB work runs on asyncdb's pool."""
+    with timer('geocode'):
+        pickup_coords, dropoff_coords = await ageocode_locations(
+            [trip.pickup_location, trip.dropoff_location]
+        )
+    if not pickup_coords or not dropoff_coords:
+        raise RoutingError(400, "Failed to geocode one or both locations")
+
+    with timer('directions'):
+        route = await aget_route(pickup_coords, dropoff_coords)
+
+    return await database_sync_to_async(finish_route)(trip, route, geometry)
+
+
+def finish_route(trip, route, geometry=False):
+    apply_route(trip, route)
+    with timer('save'):
+        trip.save()
+
+    # multiple log sheets, stored by save()
+    log_sheets = trip.stored_log_sheets()
+
+    return {
+        "route": route_feature(route) if geometry else route_summary(trip, route),
+        "log_sheets": log_sheets,
+        "total_days": len(log_sheets)
+    }
@@ -0,0 +1,150 @@
+"""
+Where directions and geocodes come from, selected with settings.ROUTING_BACKEND.
+
+    cmvdb.routing_backends.ORSBackend         OpenRouteService over HTTP (default)
+    cmvdb.routing_backends.LocalGraphBackend  shortest paths on the road graph at
+                                              ROAD_GRAPH_PATH, no network needed
+
+Every backend returns routes as {'distance': meters, 'duration': seconds,
+'coordinates': [[lon, lat], ...]} and geocodes as [lon, lat] or None, and
+raises RoutingError when a route can't be found. key_prefix keeps route cache
+entries from different backends apart.
+"""
+
+import functools
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .ors_client import RoutingError, async_ors_client, ors_client
+from .road_graph import RoadGraph, distance_meters
+
+
+class RoutingBackend:
+    name = None
+    key_prefix = ''
+
+    def directions(self, start, end, profile):
+        raise NotImplementedError
+
+    def geocode(self, location):
+        raise NotImplementedError
+
+    # no ORM access, so there's no need to queue on sync_to_async's shared thread
+    async def adirections(self, start, end, profile):
+        return await sync_to_async(self.directions, thread_sensitive=False)(start, end, profile)
+
+    async def ageocode(self, location):
+        return await sync_to_async(self.geocode, thread_sensitive=False)(location)
+
+    def map(self, fn, items):
+        return [fn(item) for item in items]
+
+
+class ORSBackend(RoutingBackend):
+    name = 'ors'
+
+    @staticmethod
+    def _directions_params(start, end):
+        return {
+            "start": f"{start[0]},{start[1]}",
+            "end": f"{end[0]},{end[1]}",
+        }
+
+    @staticmethod
+    def _parse_directions(route_response):
+        if route_response.status_code != 200:
+            raise RoutingError(route_response.status_code)
+
+        feature = route_response.json()['features'][0]
+        summary = feature['properties']['summary']
+        return {
+            'distance': summary['distance'],
+            'duration': summary.get('duration', 0),
+            'coordinates': feature['geometry']['coordinates'],
+        }
+
+    @staticmethod
+    def _parse_geocode(response):
+        if response.status_code == 200:
+            data = response.json()
+            coords = data['features'][0]['geometry']['coordinates']
+            return coords
+        else:
+            return None
+
+    def directions(self, start, end, profile):
+        route_response = ors_client.get(f"/v2/directions/{profile}", self._directions_params(start, end))
+        return self._parse_directions(route_response)
+
+    async def adirections(self, start, end, profile):
+        route_response = await async_ors_client.get(f"/v2/directions/{profile}", self._directions_params(start, end))
+        return self._parse_directions(route_response)
+
+    def geocode(self, location):
+        return self._parse_geocode(ors_client.get("/geocode/search", {"text": location, "size": 1}))
+
+    async def ageocode(self, location):
+        return self._parse_geocode(await async_ors_client.get("/geocode/search", {"text": location, "size": 1}))
+
+    def map(self, fn, items):
+        return ors_client.map(fn, items)
+
+
+class LocalGraphBackend(RoutingBackend):
+    """A* over a CSR road graph loaded once per process, on first use.
+
+    Locations geocode to the graph node of the same name ("Chicago, IL" falls
+    back to "Chicago"); route endpoints snap to the nearest node. Every profile
+    uses the same graph, and duration assumes LOCAL_ROUTING_SPEED m/s.
+    """
+
+    name = 'local'
+    key_prefix = 'local:'
+
+    def __init__(self, path=None, speed=None):
+        self.path = path or settings.ROAD_GRAPH_PATH
+        self.speed = speed or settings.LOCAL_ROUTING_SPEED
+        self._graph = None
+        self._lock = threading.Lock()
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            with self._lock:
+                if self._graph is None:
+                    self._graph = RoadGraph.load(self.path)
+        return self._graph
+
+    def directions(self, start, end, profile):
+        graph = self.graph
+        source = graph.nearest_node(start[0], start[1])
+        target = graph.nearest_node(end[0], end[1])
+        found = graph.shortest_path(source, target)
+        if found is None:
+            raise RoutingError(404, "No route found")
+
+        meters, path = found
+        coordinates = graph.coordinates(path)
+        # legs from the requested points to the snapped nodes
+        meters += distance_meters(start, coordinates[0]) + distance_meters(coordinates[-1], end)
+        coordinates = [list(start)] + coordinates + [list(end)]
+        return {
+            'distance': round(meters, 1),
+            'duration': round(meters / self.speed, 1),
+            'coordinates': coordinates,
+        }
+
+    def geocode(self, location):
+        graph = self.graph
+        node = graph.find_place(location)
+        if node is None:
+            return None
+        return graph.coordinates([node])[0]
+
+
+@functools.cache
+def get_backend():
+    return import_string(settings.ROUTING_BACKEND)()
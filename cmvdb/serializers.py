@@ -1,8 +1,37 @@
+import orjson
 from rest_framework import serializers
+from .metrics import timer
 from .models import Trip
 
 class TripSerializer(serializers.ModelSerializer):
  
     class Meta:
         model = Trip
-        fields = '__all__'
\ No newline at end of file
+        exclude = ('log_sheets_etag', 'log_sheets_updated_at', 'route_duration', 'route_polyline')
+
+
+# TripSerializer's fields, in the same order (values_list() gives the driver's pk, as DRF does)
+TRIP_FIELDS = tuple(TripSerializer().fields)
+
+
+class TripRowSerializer:
+    """
+    Read-only fast path for trip lists. Rows come straight from values_list()
+    and are encoded by orjson, skipping DRF's per-field to_representation();
+    the output matches TripSerializer(trips, many=True).data.
+    """
+
+    def __init__(self, queryset, fields=None):
+        self.queryset = queryset
+        self.fields = tuple(fields) if fields is not None else TRIP_FIELDS
+
+    @property
+    def data(self):
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in self.queryset.values_list(*fields)]
+
+
+def render_json(data):
+    # OPT_UTC_Z writes UTC datetimes with a trailing Z, like DRF's DateTimeField
+    with timer('serialize'):
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -20,6 +21,80 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 ORS_API_KEY = os.getenv('ORS_API_KEY')
+ORS_BASE_URL = os.getenv('ORS_BASE_URL', 'https://api.openrouteservice.org').rstrip('/')
+
+# pooled ORS client: timeouts in seconds, retries with exponential backoff
+ORS_CONNECT_TIMEOUT = float(os.getenv('ORS_CONNECT_TIMEOUT', 3.05))
+ORS_READ_TIMEOUT = float(os.getenv('ORS_READ_TIMEOUT', 10))
+ORS_POOL_SIZE = int(os.getenv('ORS_POOL_SIZE', 20))
+ORS_MAX_RETRIES = int(os.getenv('ORS_MAX_RETRIES', 2))
+ORS_RETRY_BACKOFF = float(os.getenv('ORS_RETRY_BACKOFF', 0.3))
+ORS_BREAKER_THRESHOLD = int(os.getenv('ORS_BREAKER_THRESHOLD', 5))
+ORS_BREAKER_RESET = float(os.getenv('ORS_BREAKER_RESET', 30))
+
+# where directions and geocodes come from; LocalGraphBackend routes offline on
+# the graph at ROAD_GRAPH_PATH, assuming LOCAL_ROUTING_SPEED m/s (about 60 mph)
+ROUTING_BACKEND = os.getenv('ROUTING_BACKEND', 'cmvdb.routing_backends.ORSBackend')
+ROAD_GRAPH_PATH = os.getenv('ROAD_GRAPH_PATH', str(BASE_DIR / 'cmvdb' / 'data' / 'sample_road_graph.json.gz'))
+LOCAL_ROUTING_SPEED = float(os.getenv('LOCAL_ROUTING_SPEED', 26.8))
+
+# stop placement: fuel stops, breaks and resets on routed trips snap to the
+# nearest suitable POI within POI_SNAP_MILES of the route. Off unless POI_PATH points at
+# a real POI file: cmvdb/data/sample_pois.json.gz is synthetic, for benchmarks only
+POI_PATH = os.getenv('POI_PATH', '')
+POI_SNAP_MILES = float(os.getenv('POI_SNAP_MILES', 15))
+
+# request/stage latency histograms served at /metrics, and the Server-Timing header
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+SERVER_TIMING = os.getenv('SERVER_TIMING', '1') != '0'
+
+# geocode cache: in-process LRU in front of the GeocodeCacheEntry table
+GEOCODE_CACHE_SIZE = int(os.getenv('GEOCODE_CACHE_SIZE', 1024))
+GEOCODE_CACHE_TTL = int(os.getenv('GEOCODE_CACHE_TTL', 60 * 60 * 24 * 30))
+
+# route cache: directions results keyed on rounded (pickup, dropoff, profile)
+ROUTE_CACHE_PRECISION = int(os.getenv('ROUTE_CACHE_PRECISION', 4))
+ROUTE_CACHE_TTL = int(os.getenv('ROUTE_CACHE_TTL', 60 * 60 * 24 * 7))
+ROUTE_CACHE_MAX_ENTRIES = int(os.getenv('ROUTE_CACHE_MAX_ENTRIES', 50000))
+# hits write an entry's hit count and last_used_at back at most this often (seconds), and
+# set() evicts expired and overflow entries at most this often per process
+ROUTE_CACHE_TOUCH_INTERVAL = int(os.getenv('ROUTE_CACHE_TOUCH_INTERVAL', 600))
+ROUTE_CACHE_EVICT_INTERVAL = int(os.getenv('ROUTE_CACHE_EVICT_INTERVAL', 300))
+
+# response cache for GET /trips/, /trips/<id> and /trips/<id>/logs/ (see response_cache.py):
+# RESPONSE_CACHE_BACKEND is locmem, file (RESPONSE_CACHE_LOCATION is a directory) or
+# redis (RESPONSE_CACHE_LOCATION is a redis:// URL; any Redis-compatible server will do).
+# Off by default; turning it on needs file or redis, which every process writing trips shares
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', '0') != '0'
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'locmem')
+RESPONSE_CACHE_LOCATION = os.getenv('RESPONSE_CACHE_LOCATION', '')
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 10000))
+
+# GET /trips/ keyset pagination
+TRIP_LIST_PAGE_SIZE = int(os.getenv('TRIP_LIST_PAGE_SIZE', 100))
+TRIP_LIST_MAX_PAGE_SIZE = int(os.getenv('TRIP_LIST_MAX_PAGE_SIZE', 1000))
+
+# GET /trips/export and manage.py export_trips
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+# POST /trips/bulk and manage.py ingest_trips
+INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', 1000))
+INGEST_MAX_ROWS = int(os.getenv('INGEST_MAX_ROWS', 100000))
+
+# /drivers/<id>/log-sheets and /vehicles/<id>/log-sheets windows, in days
+HISTORY_DEFAULT_DAYS = int(os.getenv('HISTORY_DEFAULT_DAYS', 7))
+HISTORY_MAX_DAYS = int(os.getenv('HISTORY_MAX_DAYS', 31))
+
+# threads (each with its own DB connection) running the /async/ views' ORM and cache work
+ASYNC_DB_WORKERS = int(os.getenv('ASYNC_DB_WORKERS', 8))
+
+# /trips/<id>/status and its server-sent event stream: seconds between pushes
+TRIP_STATUS_INTERVAL = float(os.getenv('TRIP_STATUS_INTERVAL', 5))
+
+# POST /trips/route/batch
+ROUTE_BATCH_MAX_TRIPS = int(os.getenv('ROUTE_BATCH_MAX_TRIPS', 1000))
+ROUTE_BATCH_WORKERS = int(os.getenv('ROUTE_BATCH_WORKERS', 8))
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY")
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -50,6 +125,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cmvdb.metrics.TimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -84,11 +160,70 @@ WSGI_APPLICATION = 'cmvdb.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgres switches to PostgreSQL with persistent, health-checked
+# connections; otherwise SQLite, tuned for concurrent writers unless
+# SQLITE_TUNED=0 (WAL lets readers run alongside the single writer, and
+# IMMEDIATE transactions take the write lock up front instead of failing with
+# "database is locked" when a read transaction tries to upgrade)
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'cmvdb'),
+            'USER': os.getenv('POSTGRES_USER', 'cmvdb'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            # keep connections open: asyncdb's pool threads would otherwise reconnect
+            # and rerun the PRAGMAs below on every call
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        }
     }
+    if os.getenv('SQLITE_TUNED', '1') != '0':
+        DATABASES['default']['OPTIONS'] = {
+            'transaction_mode': 'IMMEDIATE',
+            # busy timeout, in seconds
+            'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 256 * 2 ** 20))};"
+            ),
+        }
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': CACHE_BACKENDS[RESPONSE_CACHE_BACKEND],
+        'LOCATION': RESPONSE_CACHE_LOCATION or {
+            'locmem': 'responses',
+            'file': os.path.join(tempfile.gettempdir(), 'cmvdb-responses'),
+            'redis': 'redis://localhost:6379/0',
+        }[RESPONSE_CACHE_BACKEND],
+        'TIMEOUT': RESPONSE_CACHE_TTL,
+        'KEY_PREFIX': 'cmvdb',
+        # Redis evicts by its own maxmemory policy
+        'OPTIONS': {} if RESPONSE_CACHE_BACKEND == 'redis' else {'MAX_ENTRIES': RESPONSE_CACHE_MAX_ENTRIES},
+    },
 }
 
 
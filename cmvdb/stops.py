@@ -0,0 +1,174 @@
+"""
+Stop placement: snap a trip's fuel stops, breaks and resets to real truck
+stops, fuel stations and rest areas along its stored route.
+
+Off unless POI_PATH is set; POIs are loaded once per process from it (JSON,
+optionally gzipped):
+
+    {"pois": [[lon, lat, name, kind], ...]}
+
+with kind one of POI_KINDS. They are bucketed into a fixed grid of
+GRID_DEGREES cells, stored flat and sorted by cell, so a lookup reads the
+cells in rings around the query point and stops as soon as no unread cell can
+hold anything closer. With ~1 POI per cell that is a few dozen candidates,
+well under a millisecond, regardless of how many POIs are loaded.
+"""
+
+import functools
+import gzip
+import json
+import math
+
+import numpy as np
+from django.conf import settings
+
+from . import polyline
+from .hos import DRIVE_SPEED
+from .road_graph import EARTH_RADIUS_M
+
+POI_KINDS = ('truck_stop', 'fuel', 'rest_area')
+# which POIs each scheduled stop may use
+STOP_KINDS = {
+    'Fuel stop': ('truck_stop', 'fuel'),
+    '30-min break': ('truck_stop', 'fuel', 'rest_area'),
+    '10-hour reset': ('truck_stop', 'rest_area'),
+    '34-hour restart': ('truck_stop', 'rest_area'),
+}
+GRID_DEGREES = 0.1
+METERS_PER_DEGREE = 111195
+
+
+class POIIndex:
+    def __init__(self, lons, lats, names, kinds, cell=GRID_DEGREES):
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        cell_x = np.floor(lons / cell).astype(np.int64)
+        cell_y = np.floor(lats / cell).astype(np.int64)
+        order = np.lexsort((cell_y, cell_x))
+
+        self.cell = cell
+        self.lons = lons[order].tolist()
+        self.lats = lats[order].tolist()
+        self.names = [names[i] for i in order]
+        self.kinds = [kinds[i] for i in order]
+        # (cell_x, cell_y) -> (start, end) into the sorted lists
+        self.cells = {}
+        keys = list(zip(cell_x[order].tolist(), cell_y[order].tolist()))
+        self.bounds = tuple(int(v) for v in (cell_x.min(), cell_x.max(), cell_y.min(), cell_y.max())) if keys else (0, 0, 0, 0)
+        start = 0
+        for i in range(1, len(keys) + 1):
+            if i == len(keys) or keys[i] != keys[start]:
+                self.cells[keys[start]] = (start, i)
+                start = i
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if str(path).endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            pois = json.load(f)['pois']
+        return cls([poi[0] for poi in pois], [poi[1] for poi in pois],
+                   [poi[2] for poi in pois], [poi[3] for poi in pois])
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, lon, lat, kinds=POI_KINDS, max_meters=math.inf):
+        """(meters, poi) for the closest POI of one of kinds within max_meters, else None."""
+        x_scale = math.cos(math.radians(lat)) * METERS_PER_DEGREE
+        center_x, center_y = math.floor(lon / self.cell), math.floor(lat / self.cell)
+        # a cell r rings out is at least this far away, per ring
+        ring_meters = self.cell * min(x_scale, METERS_PER_DEGREE)
+        lons, lats, kinds_of, cells = self.lons, self.lats, self.kinds, self.cells
+
+        min_x, max_x, min_y, max_y = self.bounds
+        last_ring = max(center_x - min_x, max_x - center_x, center_y - min_y, max_y - center_y)
+
+        best, best_index = math.inf, None
+        ring = 0
+        while ring <= last_ring and (ring - 1) * ring_meters <= min(best, max_meters):
+            for cell_x in range(center_x - ring, center_x + ring + 1):
+                edge = abs(cell_x - center_x) == ring
+                for cell_y in (range(center_y - ring, center_y + ring + 1) if edge
+                               else (center_y - ring, center_y + ring)):
+                    bounds = cells.get((cell_x, cell_y))
+                    if bounds is None:
+                        continue
+                    for i in range(*bounds):
+                        if kinds_of[i] not in kinds:
+                            continue
+                        dx = (lons[i] - lon) * x_scale
+                        dy = (lats[i] - lat) * METERS_PER_DEGREE
+                        meters = math.sqrt(dx * dx + dy * dy)
+                        if meters < best:
+                            best, best_index = meters, i
+            ring += 1
+
+        if best_index is None or best > max_meters:
+            return None
+        return best, {
+            'name': self.names[best_index],
+            'kind': kinds_of[best_index],
+            'coordinates': [lons[best_index], lats[best_index]],
+        }
+
+
+@functools.cache
+def get_poi_index():
+    """The POI index from POI_PATH, or None when stop placement is turned off."""
+    if not settings.POI_PATH:
+        return None
+    return POIIndex.load(settings.POI_PATH)
+
+
+class RouteLine:
+    """Points along a route geometry by fraction of its length."""
+
+    def __init__(self, coordinates):
+        points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        lon, lat = np.radians(points[:, 0]), np.radians(points[:, 1])
+        a = (np.sin(np.diff(lat) / 2) ** 2 +
+             np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2)
+        legs = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        self.points = points
+        self.cumulative = np.concatenate(([0.0], np.cumsum(legs)))
+
+    def point_at(self, fraction):
+        target = self.cumulative[-1] * min(max(fraction, 0.0), 1.0)
+        i = int(np.searchsorted(self.cumulative, target, side='right'))
+        if i >= len(self.points):
+            return self.points[-1].tolist()
+        leg = self.cumulative[i] - self.cumulative[i - 1]
+        t = (target - self.cumulative[i - 1]) / leg if leg else 0.0
+        return (self.points[i - 1] + (self.points[i] - self.points[i - 1]) * t).tolist()
+
+
+def place_stops(duty_entries, coordinates, total_drive_hours, index, max_meters=None):
+    """
+    Pass duty_entries through, giving each fuel stop, break and reset the
+    location and coordinates of the nearest suitable POI to where the driver
+    is on the route at that point (the share of drive time already done).
+    Stops with no POI within max_meters keep their original location.
+    """
+    if max_meters is None:
+        max_meters = settings.POI_SNAP_MILES * 1609.34
+    line = RouteLine(coordinates) if len(coordinates) > 1 else None
+    driven = 0.0
+    for entry in duty_entries:
+        if entry.status == 'DR':
+            driven += entry.duration
+        elif line is not None and entry.activity in STOP_KINDS:
+            lon, lat = line.point_at(driven / total_drive_hours)
+            found = index.nearest(lon, lat, STOP_KINDS[entry.activity], max_meters)
+            if found is not None:
+                _, poi = found
+                entry.location = poi['name']
+                entry.coordinates = poi['coordinates']
+        yield entry
+
+
+def place_route_stops(duty_entries, encoded, total_distance):
+    """place_stops() for a trip's stored polyline; duty_entries untouched without a route or POIs."""
+    index = get_poi_index() if encoded and total_distance else None
+    if index is None:
+        return duty_entries
+    return place_stops(duty_entries, polyline.decode(encoded), total_distance / DRIVE_SPEED, index)
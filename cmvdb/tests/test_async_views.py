@@ -0,0 +1,84 @@
+import json
+import threading
+
+from django.test import override_settings
+
+from cmvdb.asyncdb import database_sync_to_async
+from cmvdb.geocoding import geocode_cache
+from cmvdb.response_cache import response_cache
+
+from .utils import ORSStubTransactionTestCase, make_trip
+
+
+class AsyncViewTests(ORSStubTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        geocode_cache.clear()
+
+    async def test_db_work_runs_on_the_pool(self):
+        names = await database_sync_to_async(lambda: threading.current_thread().name)()
+        self.assertTrue(names.startswith('db'))
+
+    async def test_route_matches_sync(self):
+        sync_trip, async_trip = make_trip(None), make_trip(None)
+        await database_sync_to_async(sync_trip.save)()
+        await database_sync_to_async(async_trip.save)()
+
+        expected = (await database_sync_to_async(self.client.get)(f'/trips/{sync_trip.pk}/route')).json()
+        response = await self.async_client.get(f'/async/trips/{async_trip.pk}/route')
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['route'].pop('geometry'), f'/trips/{async_trip.pk}/route/geometry')
+        expected['route'].pop('geometry')
+        self.assertEqual(payload, expected)
+        self.assertEqual(self.stub.counts, {'geocode': 2, 'directions': 1})
+        for trip in (sync_trip, async_trip):
+            await database_sync_to_async(trip.refresh_from_db)()
+        self.assertEqual(async_trip.total_distance, sync_trip.total_distance)
+
+    async def test_route_not_found(self):
+        response = await self.async_client.get('/async/trips/0/route')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_logs_match_sync_with_conditional_requests(self):
+        trip = make_trip(2600)
+        await database_sync_to_async(trip.save)()
+        url = f'/trips/{trip.pk}/logs/'
+
+        expected = await database_sync_to_async(self.client.get)(url)
+        response = await self.async_client.get(f'/async{url}')
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response['ETag'], expected['ETag'])
+        self.assertEqual(response['Last-Modified'], expected['Last-Modified'])
+
+        not_modified = await self.async_client.get(f'/async{url}', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = await self.async_client.get(
+            f'/async{url}', headers={'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(not_modified.status_code, 304)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    async def test_logs_and_list_use_the_response_cache(self):
+        trip = make_trip(640)
+        await database_sync_to_async(trip.save)()
+        await database_sync_to_async(response_cache.cache.clear)()
+
+        for url in (f'/async/trips/{trip.pk}/logs/', '/async/trips/'):
+            with self.subTest(url=url):
+                first = await self.async_client.get(url)
+                hits = response_cache.hits
+                second = await self.async_client.get(url)
+                self.assertEqual(response_cache.hits, hits + 1)
+                self.assertEqual(second.content, first.content)
+
+    async def test_status_stream_ends_with_the_trip(self):
+        trip = make_trip(640)
+        await database_sync_to_async(trip.save)()
+        response = await self.async_client.get(f'/async/trips/{trip.pk}/status/stream')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        retry, event = body.strip().split('\n\n')
+        self.assertTrue(retry.startswith('retry: '))
+        self.assertTrue(event.startswith('event: status\ndata: '))
+        self.assertEqual(json.loads(event.split('data: ', 1)[1])['state'], 'completed')
+        self.assertEqual((await self.async_client.get('/async/trips/0/status/stream')).status_code, 404)
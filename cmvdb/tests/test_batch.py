@@ -0,0 +1,80 @@
+import json
+from unittest import mock
+
+from cmvdb.geocoding import geocode_cache
+from cmvdb.models import Trip
+
+from .utils import ORSStubTestCase, make_trip
+
+URL = '/trips/route/batch'
+
+
+def payload(pickup='Chicago, IL', dropoff='Dallas, TX'):
+    return {'current_location': 'test', 'pickup_location': pickup, 'dropoff_location': dropoff,
+            'current_cycle_hours': 0}
+
+
+class RouteBatchTests(ORSStubTestCase):
+    def setUp(self):
+        super().setUp()
+        geocode_cache.clear()
+
+    def post(self, trips, stream=True):
+        response = self.client.post(URL, {'trips': trips, 'stream': stream}, content_type='application/json')
+        if not stream:
+            return response.json()
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        return lines[:-1], lines[-1]
+
+    def test_lanes_and_addresses_are_deduplicated(self):
+        existing = make_trip(None)
+        existing.save()
+        results, done = self.post([existing.pk, payload(), payload(' chicago, il', 'DALLAS, TX'),
+                                   payload('Chicago, IL', 'Denver, CO')])
+        self.assertEqual(self.stub.counts, {'geocode': 3, 'directions': 2})
+        self.assertEqual(sorted(result['index'] for result in results), [0, 1, 2, 3])
+        self.assertTrue(all(result['status'] == 'ok' for result in results))
+        self.assertEqual((done['saved'], done['failed']), (4, 0))
+
+        # every ok line carries the id of a committed trip
+        by_index = {result['index']: result['trip_id'] for result in results}
+        self.assertEqual(by_index[0], existing.pk)
+        self.assertEqual({int(index): pk for index, pk in done['created'].items()},
+                         {index: by_index[index] for index in (1, 2, 3)})
+        self.assertEqual(Trip.objects.filter(pk__in=by_index.values(), total_distance__gt=0).count(), 4)
+
+    def test_partial_failure(self):
+        results, done = self.post([0, 'x', {'pickup_location': 'Chicago, IL'}, payload()])
+        statuses = {result['index']: (result['status'], result.get('status_code')) for result in results}
+        self.assertEqual(statuses, {0: ('error', 404), 1: ('error', 400), 2: ('error', 400), 3: ('ok', None)})
+        self.assertEqual((done['saved'], done['failed']), (1, 3))
+
+    def test_save_errors_are_reported(self):
+        save = Trip.save
+
+        def failing_save(trip, *args, **kwargs):
+            if trip.dropoff_location == 'Denver, CO':
+                raise ValueError("disk full")
+            return save(trip, *args, **kwargs)
+
+        with mock.patch.object(Trip, 'save', autospec=True, side_effect=failing_save), \
+                self.assertLogs('cmvdb.batch', 'ERROR'):
+            results, done = self.post([payload(), payload('Chicago, IL', 'Denver, CO')])
+        by_index = {result['index']: result for result in results}
+        self.assertEqual(by_index[0]['status'], 'ok')
+        self.assertEqual((by_index[1]['status'], by_index[1]['status_code'], by_index[1]['trip_id']),
+                         ('error', 500, None))
+        self.assertEqual((done['saved'], done['failed']), (1, 1))
+        self.assertEqual(list(Trip.objects.values_list('dropoff_location', flat=True)), ['Dallas, TX'])
+
+    def test_non_stream_mode(self):
+        data = self.post([payload(), 0], stream=False)
+        self.assertEqual(sorted(result['index'] for result in data['results']), [0, 1])
+        self.assertEqual((data['done'], data['saved'], data['failed']), (True, 1, 1))
+        self.assertEqual(data['created'], {'0': Trip.objects.get().pk})
+
+    def test_validation(self):
+        self.assertEqual(self.client.post(URL, {'trips': []}, content_type='application/json').status_code, 400)
+        with self.settings(ROUTE_BATCH_MAX_TRIPS=1):
+            response = self.client.post(URL, {'trips': [1, 2]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from cmvdb.export import SHEET_COLUMNS, TRIP_COLUMNS, export_trips
+from cmvdb.models import Trip
+from cmvdb.polyline import encode
+
+from .test_hos import dumps
+from .utils import make_trip
+
+
+class TripExportTests(TestCase):
+    def setUp(self):
+        routed = make_trip(640, route_polyline=encode([[-87.63, 41.88], [-96.8, 32.78]]))
+        Trip.objects.bulk_create([make_trip(0), make_trip(2600), routed])
+        self.trips = list(Trip.objects.order_by('id'))
+
+    def export(self, **params):
+        response = self.client.get('/trips/export', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        lines = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([line['id'] for line in lines], [trip.pk for trip in self.trips])
+        for line, trip in zip(lines, self.trips):
+            with self.subTest(miles=trip.total_distance):
+                self.assertEqual(list(line), TRIP_COLUMNS + ['log_sheets', 'total_days'])
+                self.assertEqual(dumps(line['log_sheets']), dumps(trip.generate_log_sheets()))
+                self.assertEqual(line['total_days'], len(line['log_sheets']))
+                self.assertEqual(line['start_time'], '2024-03-04T06:00:00Z')
+
+    def test_ndjson_without_log_sheets(self):
+        lines = [json.loads(line) for line in self.export(log_sheets='false').splitlines()]
+        self.assertEqual({tuple(line) for line in lines}, {tuple(TRIP_COLUMNS)})
+
+    def test_csv_has_a_row_per_sheet(self):
+        response = self.client.get('/trips/export', {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="trips.csv"')
+        header, *rows = csv.reader(io.StringIO(b''.join(response.streaming_content).decode()))
+        self.assertEqual(header, TRIP_COLUMNS + SHEET_COLUMNS)
+
+        empty, *sheets = self.trips
+        expected = [(empty.pk, '')] + [(trip.pk, str(sheet['day'])) for trip in sheets
+                                       for sheet in trip.generate_log_sheets()]
+        self.assertEqual([(int(row[0]), row[len(TRIP_COLUMNS)]) for row in rows], expected)
+        # a trip without a schedule gets one row with the sheet columns blank
+        self.assertEqual(rows[0][len(TRIP_COLUMNS):], [''] * len(SHEET_COLUMNS))
+        last = sheets[-1].generate_log_sheets()[-1]
+        self.assertEqual(json.loads(rows[-1][-1]), last['entries'])
+
+    def test_filters_and_errors(self):
+        self.assertEqual(self.export(start_after='2030-01-01T00:00:00'), '')
+        self.assertEqual(self.client.get('/trips/export', {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get('/trips/export', {'start_before': 'soon'}).status_code, 400)
+
+    def test_command_matches_endpoint(self):
+        out = StringIO()
+        call_command('export_trips', '--format', 'csv', '--chunk-size', '1', stdout=out)
+        self.assertEqual(out.getvalue(), ''.join(export_trips('csv')))
+        self.assertEqual(out.getvalue(), self.export(format='csv'))
@@ -0,0 +1,45 @@
+from django.utils import timezone
+
+from cmvdb.geocoding import geocode_cache, geocode_locations, normalize_location
+from cmvdb.models import GeocodeCacheEntry
+
+from .utils import ORSStubTestCase
+
+
+class GeocodeCacheTests(ORSStubTestCase):
+    def setUp(self):
+        super().setUp()
+        geocode_cache.clear()
+
+    def test_normalized_keys(self):
+        self.assertEqual(normalize_location(' Chicago,  IL '), normalize_location('chicago il'))
+
+    def test_miss_then_memory_hit(self):
+        first = geocode_locations(['Chicago, IL', 'Dallas, TX'])
+        self.assertEqual(self.stub.counts, {'geocode': 2})
+        # both spellings are the same cache entry
+        self.assertEqual(geocode_locations(['chicago il', 'Dallas, TX']), first)
+        self.assertEqual(self.stub.counts, {'geocode': 2})
+
+    def test_duplicates_in_one_call_are_fetched_once(self):
+        pickup, dropoff = geocode_locations(['Chicago, IL', 'chicago, il'])
+        self.assertEqual(pickup, dropoff)
+        self.assertEqual(self.stub.counts, {'geocode': 1})
+
+    def test_hit_from_table(self):
+        coords = geocode_locations(['Chicago, IL'])
+        with geocode_cache._lock:
+            geocode_cache._entries.clear()
+        db_hits = geocode_cache.db_hits
+        self.assertEqual(geocode_locations(['Chicago, IL']), coords)
+        self.assertEqual(geocode_cache.db_hits, db_hits + 1)
+        self.assertEqual(self.stub.counts, {'geocode': 1})
+
+    def test_expired_entries_are_refetched(self):
+        geocode_locations(['Chicago, IL'])
+        GeocodeCacheEntry.objects.update(expires_at=timezone.now())
+        with geocode_cache._lock:
+            geocode_cache._entries.clear()
+        geocode_locations(['Chicago, IL'])
+        self.assertEqual(self.stub.counts, {'geocode': 2})
+        self.assertEqual(geocode_cache.purge_expired(), 0)
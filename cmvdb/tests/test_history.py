@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.test import TestCase
+
+from cmvdb.models import Driver, Trip, Vehicle
+
+from .test_hos import dumps
+from .utils import START, make_trip
+
+
+class LogSheetHistoryTests(TestCase):
+    def setUp(self):
+        self.driver = Driver.objects.create(name='Test')
+        self.vehicle = Vehicle.objects.create(unit_number='T1')
+        self.window = {'since': (START - timedelta(days=1)).isoformat(),
+                       'until': (START + timedelta(days=6)).isoformat()}
+
+    def add_trips(self, count, offset=0):
+        for day in range(offset, offset + count):
+            make_trip(640 + 500 * day, driver=self.driver, vehicle=self.vehicle,
+                      start_time=START + timedelta(days=day)).save()
+
+    def get(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, self.window)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_is_flat(self):
+        # the driver, the trips with driver and vehicle joined, and one prefetch of their sheets
+        self.add_trips(2)
+        self.assertEqual(len(self.get(f'/drivers/{self.driver.pk}/log-sheets', 3)['trips']), 2)
+        self.add_trips(3, offset=2)
+        Trip.objects.bulk_create([make_trip(900, driver=self.driver, start_time=START + timedelta(hours=1))])
+        self.assertEqual(len(self.get(f'/drivers/{self.driver.pk}/log-sheets', 3)['trips']), 6)
+        self.assertEqual(len(self.get(f'/vehicles/{self.vehicle.pk}/log-sheets', 3)['trips']), 5)
+
+    def test_sheets_match_the_trips(self):
+        self.add_trips(2)
+        Trip.objects.bulk_create([make_trip(900, driver=self.driver, start_time=START + timedelta(hours=1))])
+        data = self.get(f'/drivers/{self.driver.pk}/log-sheets', 3)
+        self.assertEqual(data['driver'], {'id': self.driver.pk, 'name': 'Test'})
+        trips = Trip.objects.filter(driver=self.driver).order_by('start_time')
+        self.assertEqual([trip['id'] for trip in data['trips']], [trip.pk for trip in trips])
+        for entry, trip in zip(data['trips'], trips):
+            with self.subTest(trip=trip.pk):
+                self.assertEqual(dumps(entry['log_sheets']), dumps(trip.generate_log_sheets()))
+                self.assertEqual(entry['total_days'], len(entry['log_sheets']))
+
+    def test_window_validation(self):
+        url = f'/drivers/{self.driver.pk}/log-sheets'
+        self.assertEqual(self.client.get(url, {'since': START.isoformat(), 'until': START.isoformat()}).status_code,
+                         400)
+        self.assertEqual(self.client.get(url, {'since': (START - timedelta(days=60)).isoformat(),
+                                               'until': START.isoformat()}).status_code, 400)
+        self.assertEqual(self.client.get('/drivers/0/log-sheets').status_code, 404)
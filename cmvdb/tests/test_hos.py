@@ -0,0 +1,297 @@
+import json
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import SimpleTestCase, TestCase
+
+from cmvdb.hos import (
+    CYCLE_LIMIT_HOURS, BatchSchedule, CycleError, DailyLog, DutyCycle, DutyEntry, duty_status,
+    generate_log_sheets_batch, iter_cycle_duty_entries, iter_duty_entries,
+)
+from cmvdb.management.commands.bench_log_entries import dict_log_sheets
+from cmvdb.models import Driver, LogSheet
+from cmvdb.polyline import encode
+
+from .utils import START, make_trip
+
+# around the fuel interval, the 11/14-hour limits and multi-week hauls
+MILES = [0, 50, 640, 660, 999, 1000, 1001, 1500, 2600, 3000, 5400, 11000]
+
+
+def dumps(log_sheets):
+    # json compares 1 and 1.0 as different, unlike ==
+    return json.dumps(log_sheets, cls=DjangoJSONEncoder)
+
+
+def original_log_sheets(trip):
+    """Trip.generate_log_sheets() as it was before iter_duty_entries, re-checking every chunk."""
+    log_sheets = []
+    if not trip.total_distance:
+        return log_sheets
+
+    def sheet(day, entries, start_time, end_time):
+        return {
+            'day': day,
+            'date': (trip.start_time + start_time).date().strftime('%Y-%m-%d'),
+            'start_time': str(start_time),
+            'end_time': str(end_time),
+            'entries': entries,
+            'summary': {
+                'drive_hours': round(sum(e['duration'] for e in entries if e['status'] == 'DR'), 2),
+                'on_duty_hours': round(sum(e['duration'] for e in entries if e['status'] in ('DR', 'ON')), 2),
+                'off_duty_hours': round(sum(e['duration'] for e in entries if e['status'] in ('OFF', 'SB')), 2),
+                'fuel_stops': sum(1 for e in entries if e.get('activity') == 'Fuel stop'),
+            },
+        }
+
+    time = timedelta(0)
+    total_drive_hours = trip.total_distance / 60
+    remaining = total_drive_hours
+    on_duty = drive = 0
+    day = 1
+    fuel_left = trip.fuel_stops
+    entries = [{'time': str(time), 'status': 'ON', 'duration': 1.0, 'activity': 'Pickup',
+                'location': trip.pickup_location}]
+    day_start = time
+    time += timedelta(hours=1)
+    on_duty += 1
+
+    while remaining > 0:
+        if drive >= 8:
+            entries.append({'time': str(time), 'status': 'OFF', 'duration': 0.5, 'activity': '30-min break'})
+            time += timedelta(minutes=30)
+            on_duty += 0.5
+            drive = 0
+        if on_duty >= 14:
+            log_sheets.append(sheet(day, entries, day_start, time))
+            day += 1
+            day_start = time
+            entries = [{'time': str(time), 'status': 'OFF', 'duration': 10, 'activity': '10-hour reset'}]
+            time += timedelta(hours=10)
+            on_duty = drive = 0
+
+        chunk = min(11 - drive, 14 - on_duty, remaining)
+        if chunk <= 0:
+            break
+        location = f"Route {1 - (remaining / total_drive_hours):.1%}"
+        entries.append({'time': str(time), 'status': 'DR', 'duration': chunk, 'location': location})
+        time += timedelta(hours=chunk)
+        on_duty += chunk
+        drive += chunk
+        remaining -= chunk
+
+        if fuel_left > 0 and (total_drive_hours - remaining) >= (trip.fuel_stops - fuel_left + 1) * (1000 / 60):
+            entries.append({'time': str(time), 'status': 'ON', 'duration': 0.25, 'activity': 'Fuel stop',
+                            'location': location})
+            time += timedelta(minutes=15)
+            on_duty += 0.25
+            fuel_left -= 1
+
+    entries.append({'time': str(time), 'status': 'ON', 'duration': 1.0, 'activity': 'Drop-off',
+                    'location': trip.dropoff_location})
+    log_sheets.append(sheet(day, entries, day_start, time + timedelta(hours=1)))
+    return log_sheets
+
+
+def sample_trips():
+    return [make_trip(miles, start_time=START + timedelta(minutes=37 * i)) for i, miles in enumerate(MILES)]
+
+
+class BatchScheduleTests(SimpleTestCase):
+    def test_matches_scalar(self):
+        trips = sample_trips()
+        self.assertEqual(dumps(generate_log_sheets_batch(trips)),
+                         dumps([trip.generate_log_sheets() for trip in trips]))
+
+    def test_schedule_iterator_matches_scalar(self):
+        trips = sample_trips()
+        schedule = BatchSchedule.from_trips(trips)
+        self.assertEqual(len(schedule), len(trips))
+        self.assertEqual(dumps(list(schedule)), dumps([trip.generate_log_sheets() for trip in trips]))
+        self.assertEqual(schedule.days.tolist(), [len(trip.generate_log_sheets()) for trip in trips])
+
+    def test_routed_trips_take_the_scalar_path(self):
+        trips = sample_trips()
+        trips[3].route_polyline = encode([[-87.63, 41.88], [-96.8, 32.78]])
+        self.assertEqual(dumps(generate_log_sheets_batch(trips)),
+                         dumps([trip.generate_log_sheets() for trip in trips]))
+
+
+class DutyEntryGeneratorTests(SimpleTestCase):
+    def test_matches_original_loop(self):
+        for trip in sample_trips():
+            with self.subTest(miles=trip.total_distance):
+                self.assertEqual(dumps(trip.generate_log_sheets()), dumps(original_log_sheets(trip)))
+
+    def test_yields_lazily(self):
+        # a million miles is over 1,200 days; the first day mustn't need the rest
+        entries = iter_duty_entries(1_000_000, 1000, 'A', 'B')
+        first_day = [next(entries) for _ in range(6)]
+        self.assertEqual([entry.status for entry in first_day], ['ON', 'DR', 'OFF', 'DR', 'OFF', 'DR'])
+        self.assertEqual(first_day[4].activity, '10-hour reset')
+
+    def test_entries_scale_with_days(self):
+        trip = make_trip(6000)
+        days = len(trip.generate_log_sheets())
+        entries = list(trip.iter_duty_entries())
+        # pickup and drop-off, four per day (drive, break, drive, reset) and the fuel stops
+        self.assertLessEqual(len(entries), 2 + 4 * days + trip.fuel_stops)
+
+
+class SlottedEntryTests(TestCase):
+    def test_no_instance_dicts(self):
+        entry = DutyEntry(timedelta(0), 'ON', 1.0, 'Pickup', 'A')
+        sheet = DailyLog(START, 1, [entry], timedelta(0), timedelta(hours=1))
+        for obj in (entry, sheet):
+            with self.assertRaises(AttributeError):
+                obj.__dict__
+
+    def test_to_dict(self):
+        self.assertEqual(DutyEntry(timedelta(hours=1), 'DR', 2.5, location='Route 0.0%').to_dict(),
+                         {'time': '1:00:00', 'status': 'DR', 'duration': 2.5, 'location': 'Route 0.0%'})
+        # breaks and resets have no location key unless placed at a POI
+        self.assertEqual(DutyEntry(timedelta(0), 'OFF', 0.5, '30-min break').to_dict(),
+                         {'time': '0:00:00', 'status': 'OFF', 'duration': 0.5, 'activity': '30-min break'})
+
+    def test_matches_dict_builder(self):
+        for trip in sample_trips():
+            with self.subTest(miles=trip.total_distance):
+                self.assertEqual(dumps(trip.generate_log_sheets()), dumps(dict_log_sheets(trip)))
+
+    def test_stored_sheets_match_iter_log_sheets(self):
+        trip = make_trip(2600)
+        trip.save()
+        self.assertEqual(dumps([sheet.to_dict() for sheet in trip.iter_log_sheets()]),
+                         dumps(trip.stored_log_sheets()))
+        self.assertEqual(LogSheet.objects.filter(trip=trip).count(), len(trip.generate_log_sheets()))
+
+
+class DutyStatusTests(TestCase):
+    def status(self, trip, hours):
+        return trip.duty_status(START + timedelta(hours=hours))
+
+    def test_before_the_start_and_without_a_distance(self):
+        self.assertEqual(self.status(make_trip(640), -1), {'state': 'scheduled', 'starts_at': START})
+        self.assertEqual(self.status(make_trip(None), 1), {'state': 'unscheduled'})
+
+    def test_in_progress(self):
+        trip = make_trip(2600)
+        self.assertEqual(self.status(trip, 0.5), {
+            'state': 'in_progress', 'day': 1, 'status': 'ON', 'activity': 'Pickup',
+            'since': START, 'until': START + timedelta(hours=1),
+            'remaining_drive_hours': 11.0, 'remaining_on_duty_hours': 13.5, 'location': 'Chicago, IL',
+        })
+        driving = self.status(trip, 6)
+        self.assertEqual((driving['status'], driving['location']), ('DR', 'Route 0.0%'))
+        self.assertEqual((driving['remaining_drive_hours'], driving['remaining_on_duty_hours']), (6, 8))
+
+        # off-duty entries have no location; a reset starts the next day
+        on_break = self.status(trip, 12.25)
+        self.assertEqual((on_break['activity'], on_break['remaining_on_duty_hours']), ('30-min break', 1.75))
+        self.assertNotIn('location', on_break)
+        reset = self.status(trip, 15)
+        self.assertEqual((reset['day'], reset['status'], reset['activity']), (2, 'OFF', '10-hour reset'))
+        self.assertEqual(reset['until'], START + timedelta(hours=24))
+
+        next_day = self.status(trip, 25)
+        self.assertEqual((next_day['day'], next_day['remaining_drive_hours'], next_day['remaining_on_duty_hours']),
+                         (2, 10, 13))
+
+    def test_completed(self):
+        self.assertEqual(self.status(make_trip(2600), 80),
+                         {'state': 'completed', 'finished_at': START + timedelta(days=3, hours=5, minutes=20)})
+
+    def test_only_consumes_entries_up_to_now(self):
+        entries = iter_duty_entries(1_000_000, 1000, 'A', 'B')
+        self.assertEqual(duty_status(START, entries, START + timedelta(hours=2))['status'], 'DR')
+        self.assertEqual(next(entries).activity, '30-min break')
+
+    def test_endpoint(self):
+        trip = make_trip(640)
+        trip.save()
+        data = self.client.get(f'/trips/{trip.pk}/status').json()
+        self.assertEqual((data['trip_id'], data['state']), (trip.pk, 'completed'))
+        self.assertEqual(self.client.get('/trips/0/status').status_code, 404)
+
+
+class DutyCycleTests(TestCase):
+    def test_charge_splits_at_midnight(self):
+        cycle = DutyCycle()
+        cycle.charge(START.replace(hour=20), 6)
+        self.assertEqual(cycle.summary()['daily_on_duty_hours'][-2:], [4, 2])
+        self.assertEqual(cycle.total, 6)
+
+    def test_backdated_charge_rolls_off_on_its_own_day(self):
+        cycle = DutyCycle()
+        cycle.charge(START, 10)
+        cycle.charge(START - timedelta(days=2), 5)
+        self.assertEqual(cycle.available(START), CYCLE_LIMIT_HOURS - 15)
+        # the backdated hours leave the window two days before the others
+        self.assertEqual(cycle.available(START + timedelta(days=6)), CYCLE_LIMIT_HOURS - 10)
+        self.assertEqual(cycle.available(START + timedelta(days=8)), CYCLE_LIMIT_HOURS)
+        self.assertEqual(cycle.off_since, START + timedelta(hours=10))
+
+    def test_charge_outside_window_is_rejected(self):
+        cycle = DutyCycle()
+        cycle.charge(START, 10)
+        with self.assertRaises(CycleError):
+            cycle.charge(START - timedelta(days=8), 1)
+
+    def test_restart_after_34_hours_off(self):
+        cycle = DutyCycle()
+        cycle.charge(START, 14)
+        cycle.rest(START + timedelta(hours=14 + 34))
+        self.assertEqual(cycle.total, 0)
+
+    def test_cycle_carries_over_between_trips(self):
+        driver = Driver.objects.create(name='Test')
+        first = make_trip(640, driver=driver, current_cycle_hours=20)
+        log_sheets, cycle = driver.plan_trip(first)
+        driver.store_cycle(cycle)
+        on_duty = sum(sheet['summary']['on_duty_hours'] for sheet in log_sheets)
+        self.assertAlmostEqual(driver.cycle_total, 20 + on_duty, places=2)
+
+        second = make_trip(640, driver=driver, start_time=cycle.off_since + timedelta(hours=10))
+        _, cycle = driver.plan_trip(second)
+        self.assertAlmostEqual(cycle.total, 20 + 2 * on_duty, places=1)
+
+    def test_cycle_limit_forces_a_restart(self):
+        cycle = DutyCycle()
+        cycle.charge(START - timedelta(hours=66), 65)
+        driver = Driver.objects.create(name='Test', cycle_hours=cycle.hours, cycle_day=cycle.day,
+                                       cycle_total=cycle.total, off_duty_since=cycle.off_since)
+        log_sheets, _ = driver.plan_trip(make_trip(640))
+        activities = [entry.get('activity') for sheet in log_sheets for entry in sheet['entries']]
+        self.assertIn('34-hour restart', activities)
+
+    def test_fuel_stop_after_a_cut_drive_restarts_once(self):
+        # the cycle runs out on the drive that earns a fuel stop, so the stop needs the restart
+        cycle = DutyCycle()
+        cycle.charge(START - timedelta(hours=42.125), 32.125)
+        trip = make_trip(2200)
+        entries = list(iter_cycle_duty_entries(cycle, START, trip.total_distance, trip.fuel_stops,
+                                               trip.pickup_location, trip.dropoff_location))
+        activities = [entry.activity for entry in entries]
+        self.assertEqual(activities.count('34-hour restart'), 1)
+        restart = activities.index('34-hour restart')
+        self.assertEqual(activities[restart + 1], 'Fuel stop')
+        self.assertEqual([entry.status for entry in entries[restart + 2:]], ['DR', 'ON'])
+        self.assertAlmostEqual(sum(entry.duration for entry in entries if entry.status == 'DR'), 2200 / 60)
+        # no gaps or overlaps
+        for entry, following in zip(entries, entries[1:]):
+            self.assertEqual(entry.time + timedelta(hours=entry.duration), following.time)
+
+    def test_trip_cycle_endpoint(self):
+        driver = Driver.objects.create(name='Test')
+        later = make_trip(640, driver=driver)
+        later.save()
+        earlier = make_trip(640, driver=driver, start_time=START - timedelta(days=1))
+        earlier.save()
+
+        response = self.client.post(f'/trips/{later.pk}/cycle')
+        self.assertEqual(response.status_code, 200)
+        driver.refresh_from_db()
+        self.assertGreater(driver.cycle_total, 0)
+        # neither previewing nor recording a trip from before the last one
+        self.assertEqual(self.client.get(f'/trips/{earlier.pk}/cycle').status_code, 409)
+        self.assertEqual(self.client.post(f'/trips/{earlier.pk}/cycle').status_code, 409)
@@ -0,0 +1,61 @@
+import json
+
+from django.test import TestCase
+
+from cmvdb.ingest import ingest_trips
+from cmvdb.models import LogSheet, Trip, log_sheets_digest
+
+from .test_hos import dumps
+from .utils import START, make_trip
+
+
+def row(miles, **fields):
+    return {'current_location': 'test', 'pickup_location': 'Chicago, IL', 'dropoff_location': 'Dallas, TX',
+            'current_cycle_hours': 5, 'total_distance': miles, 'start_time': START.isoformat(), **fields}
+
+
+class IngestTests(TestCase):
+    def test_row_errors_carry_their_index(self):
+        items = [row(640), 'oops', row(1200, current_cycle_hours='many'), row(2600), {'pickup_location': 'A'}]
+        result = ingest_trips(items, chunk_size=2)
+        self.assertEqual((result['created'], result['failed']), (2, 3))
+        self.assertEqual([error['index'] for error in result['errors']], [1, 2, 4])
+        self.assertIn('current_cycle_hours', result['errors'][1]['errors'])
+        self.assertEqual(list(Trip.objects.order_by('id').values_list('id', flat=True)), result['ids'])
+
+    def test_derived_fields_match_save(self):
+        result = ingest_trips([row(miles) for miles in (None, 0, 999, 2600)])
+        for pk, miles in zip(result['ids'], (None, 0, 999, 2600)):
+            ingested = Trip.objects.get(pk=pk)
+            saved = make_trip(miles, current_cycle_hours=5)
+            saved.save()
+            with self.subTest(miles=miles):
+                self.assertEqual((ingested.fuel_stops, ingested.worked_hours), (saved.fuel_stops, saved.worked_hours))
+
+    def test_log_sheets_are_stored(self):
+        [pk] = ingest_trips([row(2600)])['ids']
+        trip = Trip.objects.get(pk=pk)
+        log_sheets = trip.generate_log_sheets()
+        self.assertIsNotNone(trip.log_sheets_updated_at)
+        self.assertEqual(trip.log_sheets_etag, log_sheets_digest(log_sheets))
+        self.assertEqual(LogSheet.objects.filter(trip=trip).count(), len(log_sheets))
+        self.assertEqual(dumps(trip.stored_log_sheets()), dumps(log_sheets))
+
+    def test_endpoint_accepts_json_and_ndjson(self):
+        response = self.client.post('/trips/bulk', [row(640)], content_type='application/json')
+        self.assertEqual((response.status_code, response.json()['created']), (201, 1))
+
+        body = '\n'.join([json.dumps(row(640)), '{not json', '', json.dumps(row(1200))])
+        response = self.client.post('/trips/bulk', body, content_type='application/x-ndjson')
+        data = response.json()
+        self.assertEqual((response.status_code, data['created'], data['failed']), (201, 2, 1))
+        self.assertEqual(data['errors'][0]['index'], 1)
+
+    def test_endpoint_rejects_bad_bodies(self):
+        self.assertEqual(self.client.post('/trips/bulk', {'trips': 'x'}, content_type='application/json').status_code,
+                         400)
+        response = self.client.post('/trips/bulk', ['oops'], content_type='application/json')
+        self.assertEqual((response.status_code, response.json()['created']), (400, 0))
+        with self.settings(INGEST_MAX_ROWS=1):
+            response = self.client.post('/trips/bulk', [row(1), row(2)], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from cmvdb.geocoding import geocode_cache
+from cmvdb.jobs import claim_next_job, requeue_stale_jobs, run_job
+from cmvdb.models import RouteJob
+from cmvdb.ors_client import CircuitOpen, ServiceUnavailable
+
+from .utils import ORSStubTestCase, make_trip
+
+
+class RouteJobTests(ORSStubTestCase):
+    def setUp(self):
+        super().setUp()
+        geocode_cache.clear()
+        self.trip = make_trip(None)
+        self.trip.save()
+
+    def queue(self, **fields):
+        return RouteJob.objects.create(trip=self.trip, **fields)
+
+    def test_claims_oldest_job_once(self):
+        first, second = self.queue(), self.queue()
+        claimed = claim_next_job('w1')
+        self.assertEqual((claimed.pk, claimed.status, claimed.worker, claimed.attempts),
+                         (first.pk, RouteJob.RUNNING, 'w1', 1))
+        self.assertEqual(claim_next_job('w2').pk, second.pk)
+        self.assertIsNone(claim_next_job('w3'))
+
+    def test_claim_skips_jobs_not_due(self):
+        self.queue(run_after=timezone.now() + timedelta(minutes=1))
+        due = self.queue(run_after=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_next_job('w1').pk, due.pk)
+        self.assertIsNone(claim_next_job('w1'))
+
+    def test_run_stores_the_route(self):
+        self.queue()
+        run_job(claim_next_job('w1'))
+        job = RouteJob.objects.get()
+        self.assertEqual(job.status, RouteJob.DONE)
+        self.assertEqual(job.result['total_days'], len(job.result['log_sheets']))
+        self.assertEqual(self.stub.counts, {'geocode': 2, 'directions': 1})
+
+    @mock.patch('cmvdb.jobs.plan_route', side_effect=ServiceUnavailable())
+    def test_outage_requeues_with_backoff(self, plan_route):
+        self.queue()
+        before = timezone.now()
+        run_job(claim_next_job('w1'), max_attempts=3, retry_backoff=10)
+        job = RouteJob.objects.get()
+        self.assertEqual((job.status, job.worker, job.attempts), (RouteJob.QUEUED, '', 1))
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=10))
+        self.assertIsNone(claim_next_job('w1'))
+
+        RouteJob.objects.update(run_after=None)
+        run_job(claim_next_job('w1'), max_attempts=3, retry_backoff=10)
+        # doubled for the second attempt
+        self.assertGreaterEqual(RouteJob.objects.get().run_after, before + timedelta(seconds=20))
+
+    @mock.patch('cmvdb.jobs.plan_route', side_effect=ServiceUnavailable())
+    def test_fails_after_max_attempts(self, plan_route):
+        self.queue(attempts=2)
+        run_job(claim_next_job('w1'), max_attempts=3)
+        job = RouteJob.objects.get()
+        self.assertEqual((job.status, job.error_status), (RouteJob.FAILED, 503))
+
+    @mock.patch('cmvdb.jobs.plan_route', side_effect=CircuitOpen(retry_after=30))
+    def test_breaker_rejection_is_not_an_attempt(self, plan_route):
+        self.queue(attempts=2)
+        before = timezone.now()
+        for _ in range(3):
+            RouteJob.objects.update(run_after=None)
+            run_job(claim_next_job('w1'), max_attempts=3, retry_backoff=1)
+        job = RouteJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (RouteJob.QUEUED, 2))
+        # waits out the breaker rather than the shorter backoff
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=30))
+
+    def test_requeue_stale_jobs(self):
+        stale = self.queue(status=RouteJob.RUNNING, worker='gone', started_at=timezone.now() - timedelta(minutes=10))
+        self.queue(status=RouteJob.RUNNING, worker='busy', started_at=timezone.now())
+        self.assertEqual(requeue_stale_jobs(timeout=300), 1)
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.worker), (RouteJob.QUEUED, ''))
+
+    def test_post_then_poll(self):
+        response = self.client.post(f'/trips/{self.trip.pk}/route')
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], RouteJob.QUEUED)
+
+        run_job(claim_next_job('w1'))
+        data = self.client.get(status_url).json()
+        self.assertEqual(data['status'], RouteJob.DONE)
+        self.assertEqual(data['trip_id'], self.trip.pk)
+        self.assertIn('log_sheets', data)
+        self.assertEqual(self.client.get('/jobs/0').status_code, 404)
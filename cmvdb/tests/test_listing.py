@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+
+from cmvdb.listing import encode_cursor
+from cmvdb.models import Trip
+from cmvdb.serializers import TRIP_FIELDS, TripSerializer
+
+from .utils import START, make_trip
+
+
+@override_settings(TRIP_LIST_PAGE_SIZE=20, TRIP_LIST_MAX_PAGE_SIZE=50)
+class TripListTests(TestCase):
+    def setUp(self):
+        # repeated start times, so start_time orderings have to break ties on id
+        Trip.objects.bulk_create([make_trip(100 * i, start_time=START + timedelta(hours=i // 3)) for i in range(10)])
+
+    def walk(self, **params):
+        """Every page of GET /trips/ with params, following next_cursor."""
+        pages, cursor = [], None
+        while True:
+            response = self.client.get('/trips/', {**params, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200, response.content)
+            data = response.json()
+            pages.append(data['trips'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_cursor_walk_covers_every_trip_once(self):
+        for ordering, order_by in [('id', ('id',)), ('-id', ('-id',)),
+                                   ('start_time', ('start_time', 'id')), ('-start_time', ('-start_time', '-id'))]:
+            with self.subTest(ordering=ordering):
+                pages = self.walk(ordering=ordering, limit=3)
+                self.assertEqual([len(page) for page in pages], [3, 3, 3, 1])
+                self.assertEqual([trip['id'] for page in pages for trip in page],
+                                 list(Trip.objects.order_by(*order_by).values_list('id', flat=True)))
+
+    def test_rows_match_the_serializer(self):
+        [page] = self.walk(limit=10)
+        self.assertEqual(page, [dict(row) for row in TripSerializer(Trip.objects.order_by('id'), many=True).data])
+        self.assertEqual(tuple(page[0]), TRIP_FIELDS)
+
+    def test_sparse_fields_still_page(self):
+        pages = self.walk(fields='total_distance', ordering='-start_time', limit=4)
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertEqual({tuple(trip) for page in pages for trip in page}, {('total_distance',)})
+
+    def test_filters(self):
+        [page] = self.walk(start_after=(START + timedelta(hours=1)).isoformat(),
+                           start_before=(START + timedelta(hours=3)).isoformat())
+        self.assertEqual(len(page), 6)
+
+    def test_invalid_parameters(self):
+        mismatched = encode_cursor('id', {'id': 1})
+        for params in [{'cursor': 'not-a-cursor'}, {'cursor': 'e30'}, {'cursor': mismatched, 'ordering': '-id'},
+                       {'ordering': 'distance'}, {'limit': 0}, {'limit': 51}, {'limit': 'ten'},
+                       {'fields': 'id,secret'}, {'start_after': 'yesterday'}]:
+            with self.subTest(params=params):
+                response = self.client.get('/trips/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
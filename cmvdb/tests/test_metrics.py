@@ -0,0 +1,89 @@
+import re
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from cmvdb.metrics import BUCKETS, REQUEST_FAMILY, Histogram, Registry, registry, server_timing, timer
+
+from .utils import make_trip
+
+SAMPLE = re.compile(r'^([a-z_]+)(?:\{((?:[a-z_]+="(?:[^"\\]|\\.)*",?)+)\})? (-?[0-9.e+-]+)$')
+
+
+class HistogramTests(SimpleTestCase):
+    def test_quantiles_are_within_a_bucket(self):
+        histogram = Histogram()
+        for ms in range(1, 1001):
+            histogram.observe(ms / 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.sum, 500.5, places=6)
+        for q in (0.5, 0.95, 0.99):
+            with self.subTest(q=q):
+                self.assertAlmostEqual(histogram.quantile(q), q, delta=q * 0.2)
+
+    def test_empty_and_overflow(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.quantile(0.5), 0.0)
+        histogram.observe(BUCKETS[-1] * 10)
+        self.assertEqual(histogram.quantile(0.99), BUCKETS[-1])
+
+    def test_render_is_prometheus_text(self):
+        metrics = Registry()
+        metrics.histogram('app_seconds', route='a"b\\c', method='GET').observe(0.01)
+        metrics.histogram('app_seconds', route='other', method='GET').observe(0.02)
+        metrics.histogram('bare_seconds').observe(0.5)
+        lines = metrics.render().splitlines()
+
+        self.assertEqual([line for line in lines if line.startswith('#')], [
+            '# HELP app_seconds app_seconds', '# TYPE app_seconds summary',
+            '# HELP bare_seconds bare_seconds', '# TYPE bare_seconds summary',
+        ])
+        samples = [SAMPLE.match(line) for line in lines if not line.startswith('#')]
+        self.assertTrue(all(samples), lines)
+        # three quantiles, _sum and _count per series
+        self.assertEqual(len(samples), 15)
+        self.assertIn('app_seconds_count{method="GET",route="a\\"b\\\\c"} 1', lines)
+        self.assertIn('bare_seconds_sum 0.500000', lines)
+
+    def test_server_timing_value(self):
+        self.assertEqual(server_timing({'db': 0.0012, 'geocode': 0.25}, 0.3),
+                         'db;dur=1.2, geocode;dur=250.0, total;dur=300.0')
+
+
+class TimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip(640)
+        self.trip.save()
+        self.url = f'/trips/{self.trip.pk}/logs/'
+
+    def test_server_timing_header(self):
+        stages = [part.split(';dur=') for part in self.client.get(self.url)['Server-Timing'].split(', ')]
+        self.assertEqual([name for name, _ in stages][-1], 'total')
+        self.assertIn('db', [name for name, _ in stages])
+        self.assertTrue(all(float(ms) >= 0 for _, ms in stages))
+
+    def test_timers_outside_a_request_stay_out_of_the_header(self):
+        with timer('outside'):
+            pass
+        self.assertNotIn('outside', self.client.get(self.url)['Server-Timing'])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_header_can_be_turned_off(self):
+        count = registry.histogram(REQUEST_FAMILY, route='trips/<int:trip_id>/logs/', method='GET').count
+        self.assertNotIn('Server-Timing', self.client.get(self.url))
+        # still recorded
+        self.assertEqual(
+            registry.histogram(REQUEST_FAMILY, route='trips/<int:trip_id>/logs/', method='GET').count, count + 1)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_can_be_turned_off(self):
+        self.assertNotIn('Server-Timing', self.client.get(self.url))
+
+    def test_metrics_endpoint(self):
+        self.client.get(self.url)
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        lines = response.content.decode().splitlines()
+        self.assertIn(f'# TYPE {REQUEST_FAMILY} summary', lines)
+        self.assertTrue(any(line.startswith(f'{REQUEST_FAMILY}_count{{method="GET",route="trips/<int:trip_id>/logs/"}}')
+                            for line in lines))
+        self.assertTrue(all(SAMPLE.match(line) for line in lines if not line.startswith('#')))
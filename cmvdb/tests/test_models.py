@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cmvdb.models import LogSheet, Trip, log_sheets_digest
+
+from .utils import make_trip
+
+
+class DirtyFieldTests(TestCase):
+    def setUp(self):
+        make_trip(640).save()
+        self.trip = Trip.objects.get()
+
+    def save(self):
+        """The UPDATE statements self.trip.save() runs."""
+        with CaptureQueriesContext(connection) as captured:
+            self.trip.save()
+        return [query['sql'] for query in captured.captured_queries if query['sql'].startswith('UPDATE')]
+
+    def test_new_trip_is_not_dirty_tracked(self):
+        self.assertIsNone(make_trip(640).dirty_fields())
+        self.assertEqual(self.trip.dirty_fields(), set())
+
+    def test_clean_save_runs_no_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.trip.save()
+        self.assertEqual(captured.captured_queries, [])
+
+    def test_writes_only_changed_columns(self):
+        self.trip.current_location = 'Denver, CO'
+        [sql] = self.save()
+        self.assertIn('"current_location"', sql)
+        self.assertNotIn('"total_distance"', sql)
+        self.assertNotIn('"log_sheets_etag"', sql)
+        self.assertEqual(self.trip.dirty_fields(), set())
+
+    def test_derived_fields_follow_their_inputs(self):
+        self.trip.current_cycle_hours = 12
+        [sql] = self.save()
+        self.assertIn('"worked_hours"', sql)
+        self.assertEqual(Trip.objects.get().worked_hours, 14)
+
+    def test_derived_fields_cant_drift(self):
+        self.trip.fuel_stops = 7
+        self.save()
+        self.assertEqual(Trip.objects.get().fuel_stops, 0)
+
+    def test_schedule_change_rebuilds_sheets(self):
+        etag = self.trip.log_sheets_etag
+        self.trip.total_distance = 2600
+        [sql] = self.save()
+        self.assertIn('"fuel_stops"', sql)
+        self.assertIn('"log_sheets_etag"', sql)
+        self.assertNotEqual(self.trip.log_sheets_etag, etag)
+        self.assertEqual(self.trip.stored_log_sheets(), Trip.objects.get().stored_log_sheets())
+
+    def test_explicit_update_fields_gain_derived_fields(self):
+        self.trip.current_cycle_hours = 3
+        self.trip.current_location = 'Denver, CO'
+        with CaptureQueriesContext(connection) as captured:
+            self.trip.save(update_fields=['current_cycle_hours'])
+        [sql] = [query['sql'] for query in captured.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertIn('"worked_hours"', sql)
+        self.assertNotIn('"current_location"', sql)
+
+    def test_deferred_fields_are_left_alone(self):
+        trip = Trip.objects.only('id', 'current_location').get()
+        trip.current_location = 'Denver, CO'
+        self.assertEqual(trip.dirty_fields(), {'current_location'})
+
+
+class StoreLogSheetsCommandTests(TestCase):
+    def test_backfills_bulk_created_trips(self):
+        Trip.objects.bulk_create([make_trip(miles) for miles in (0, 640, 2600)])
+        saved = make_trip(1200)
+        saved.save()
+        expected = {trip.pk: trip.generate_log_sheets() for trip in Trip.objects.all()}
+
+        call_command('store_log_sheets', '--chunk-size', '2', stdout=StringIO())
+
+        self.assertFalse(Trip.objects.filter(log_sheets_updated_at__isnull=True).exists())
+        self.assertEqual(LogSheet.objects.count(), sum(map(len, expected.values())))
+        for trip in Trip.objects.all():
+            self.assertEqual(trip.log_sheets_etag, log_sheets_digest(expected[trip.pk]))
+            self.assertEqual(trip.stored_log_sheets(), expected[trip.pk])
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from cmvdb.ors_client import AsyncORSClient, CircuitBreaker, CircuitOpen, ORSClient, ServiceUnavailable
+from cmvdb.ors_stub import start_in_thread
+
+
+def flaky_stub(failures):
+    """An ors_stub server answering its first `failures` requests with 503."""
+    server = start_in_thread()
+    stub_handler = server.RequestHandlerClass
+    left = [failures]
+
+    def do_GET(self):
+        with server.lock:
+            fail = left[0] > 0
+            left[0] -= fail
+            server.counts['requests'] = server.counts.get('requests', 0) + 1
+        if fail:
+            return self._send(503, {"error": "unavailable"})
+        return stub_handler.do_GET(self)
+
+    server.RequestHandlerClass = type('FlakyHandler', (stub_handler,), {'do_GET': do_GET})
+    return server
+
+
+def make_client(cls, base_url, max_retries=2, breaker=None):
+    return cls(base_url=base_url, api_key='test', timeout=(1, 2), pool_size=4, max_retries=max_retries,
+               backoff=0, breaker=breaker or CircuitBreaker(threshold=2, reset_timeout=60))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'closed')
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+
+    def test_success_resets_the_count(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_half_open_lets_one_probe_through(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertEqual(breaker.state, 'half-open')
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+
+
+class ORSClientTests(SimpleTestCase):
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_retries_then_succeeds(self):
+        self.server = flaky_stub(failures=2)
+        client = make_client(ORSClient, self.server.base_url)
+        response = client.get('/geocode/search', {'text': 'Chicago, IL'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.counts['requests'], 3)
+        self.assertEqual(client.breaker.failures, 0)
+
+    def test_exhausted_retries_count_one_failure(self):
+        self.server = flaky_stub(failures=10)
+        client = make_client(ORSClient, self.server.base_url, max_retries=1)
+        self.assertEqual(client.get('/geocode/search', {'text': 'Chicago, IL'}).status_code, 503)
+        self.assertEqual(self.server.counts['requests'], 2)
+        self.assertEqual(client.breaker.failures, 1)
+
+    def test_open_breaker_rejects_without_a_request(self):
+        self.server = flaky_stub(failures=10)
+        client = make_client(ORSClient, self.server.base_url, max_retries=0)
+        for _ in range(2):
+            client.get('/geocode/search', {'text': 'Chicago, IL'})
+        with self.assertRaises(CircuitOpen) as raised:
+            client.get('/geocode/search', {'text': 'Chicago, IL'})
+        self.assertEqual(self.server.counts['requests'], 2)
+        self.assertTrue(0 < raised.exception.retry_after <= 60)
+
+    def test_connection_errors_are_service_unavailable(self):
+        self.server = start_in_thread()
+        client = make_client(ORSClient, 'http://127.0.0.1:9', max_retries=0)
+        with self.assertRaises(ServiceUnavailable):
+            client.get('/geocode/search', {'text': 'Chicago, IL'})
+        self.assertEqual(client.breaker.failures, 1)
+
+    def test_map_runs_concurrently_in_order(self):
+        self.server = start_in_thread(latency=0.1)
+        client = make_client(ORSClient, self.server.base_url)
+        threads = set()
+
+        def geocode(text):
+            threads.add(threading.get_ident())
+            return client.get('/geocode/search', {'text': text}).json()['features'][0]['properties']['label']
+
+        started = time.perf_counter()
+        self.assertEqual(client.map(geocode, ['A', 'B', 'C', 'D']), ['A', 'B', 'C', 'D'])
+        self.assertLess(time.perf_counter() - started, 0.3)
+        self.assertGreater(len(threads), 1)
+
+
+class AsyncORSClientTests(SimpleTestCase):
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_retries_then_succeeds(self):
+        self.server = flaky_stub(failures=2)
+        client = make_client(AsyncORSClient, self.server.base_url)
+        response = asyncio.run(client.get('/geocode/search', {'text': 'Chicago, IL'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.counts['requests'], 3)
+
+    def test_open_breaker_rejects(self):
+        self.server = start_in_thread()
+        breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        client = make_client(AsyncORSClient, self.server.base_url, breaker=breaker)
+        with self.assertRaises(ServiceUnavailable):
+            asyncio.run(client.get('/geocode/search', {'text': 'Chicago, IL'}))
+        self.assertEqual(self.server.counts, {})
@@ -0,0 +1,101 @@
+import math
+import random
+
+from django.test import SimpleTestCase, TestCase
+
+from cmvdb import polyline
+
+from .utils import make_trip
+
+
+def reference_simplify(points, tolerance):
+    """Textbook recursive Douglas-Peucker."""
+    if len(points) < 3:
+        return list(points)
+    (x0, y0), (x1, y1) = points[0], points[-1]
+    length = math.hypot(x1 - x0, y1 - y0)
+    distances = [
+        math.hypot(x - x0, y - y0) if length == 0 else abs((x1 - x0) * (y - y0) - (y1 - y0) * (x - x0)) / length
+        for x, y in points[1:-1]
+    ]
+    index = max(range(len(distances)), key=distances.__getitem__)
+    if distances[index] <= tolerance:
+        return [points[0], points[-1]]
+    split = index + 1
+    return reference_simplify(points[:split + 1], tolerance)[:-1] + reference_simplify(points[split:], tolerance)
+
+
+def random_walk(count, seed=1):
+    rng = random.Random(seed)
+    lon, lat = -87.63, 41.88
+    points = []
+    for _ in range(count):
+        lon += rng.uniform(-0.01, 0.03)
+        lat += rng.uniform(-0.02, 0.01)
+        points.append([round(lon, 5), round(lat, 5)])
+    return points
+
+
+class PolylineTests(SimpleTestCase):
+    def test_reference_example(self):
+        # the format's documented example, given lat-first there
+        coordinates = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+        self.assertEqual(polyline.encode(coordinates), '_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+        self.assertEqual(polyline.decode('_p~iF~ps|U_ulLnnqC_mqNvxq`@'), coordinates)
+
+    def test_round_trip(self):
+        for count in (0, 1, 2, 500):
+            with self.subTest(count=count):
+                points = random_walk(count)
+                self.assertEqual(polyline.decode(polyline.encode(points)), points)
+        # rounded to the precision on the way in
+        self.assertEqual(polyline.decode(polyline.encode([[-87.6298371, 41.8781136]])), [[-87.62984, 41.87811]])
+
+    def test_simplify_matches_reference(self):
+        # both sides of SHORT_SEGMENT, where _farthest switches to NumPy
+        for count in (3, 40, polyline.SHORT_SEGMENT + 10, 2000):
+            for tolerance in (0.001, 0.01, 0.1):
+                with self.subTest(count=count, tolerance=tolerance):
+                    points = random_walk(count, seed=count)
+                    self.assertEqual(polyline.simplify(points, tolerance), reference_simplify(points, tolerance))
+
+    def test_simplify_edge_cases(self):
+        line = [[float(i), 2.0 * i] for i in range(100)]
+        self.assertEqual(polyline.simplify(line, 0.01), [line[0], line[-1]])
+        loop = [[0.0, 0.0], [1.0, 1.0], [2.0, 0.0], [0.0, 0.0]]
+        self.assertEqual(polyline.simplify(loop, 0.5), loop)
+        self.assertEqual(polyline.simplify(loop, 0), loop)
+        self.assertEqual(polyline.simplify(loop[:2], 10), loop[:2])
+
+    def test_tolerance_halves_per_zoom(self):
+        self.assertAlmostEqual(polyline.tolerance_for_zoom(0), 360 / 256)
+        self.assertAlmostEqual(polyline.tolerance_for_zoom(5) / polyline.tolerance_for_zoom(6), 2)
+
+
+class RouteGeometryTests(TestCase):
+    def setUp(self):
+        self.points = random_walk(1000)
+        self.trip = make_trip(640, route_polyline=polyline.encode(self.points))
+        self.trip.save()
+        self.url = f'/trips/{self.trip.pk}/route/geometry'
+
+    def test_formats_and_zoom(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(polyline.decode(data['polyline']), self.points)
+        feature = self.client.get(self.url, {'format': 'geojson'}).json()
+        self.assertEqual(feature['geometry']['coordinates'], self.points)
+
+        zoomed = self.client.get(self.url, {'format': 'geojson', 'zoom': 6}).json()
+        expected = polyline.simplify(self.points, polyline.tolerance_for_zoom(6))
+        self.assertEqual(zoomed['geometry']['coordinates'], expected)
+        self.assertEqual(zoomed['properties']['points'], len(expected))
+        self.assertLess(len(expected), len(self.points))
+
+    def test_errors(self):
+        for params in ({'format': 'kml'}, {'zoom': 'x'}, {'zoom': polyline.MAX_ZOOM + 1}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        self.assertEqual(self.client.get('/trips/0/route/geometry').status_code, 404)
+        unrouted = make_trip(640)
+        unrouted.save()
+        self.assertEqual(self.client.get(f'/trips/{unrouted.pk}/route/geometry').status_code, 404)
@@ -0,0 +1,106 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from cmvdb.models import Driver
+from cmvdb.response_cache import check_shared_backend, response_cache
+
+from .utils import make_trip
+
+
+@override_settings(
+    RESPONSE_CACHE_ENABLED=True,
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+    },
+)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip(640)
+        self.other = make_trip(1200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trip.save()
+            self.other.save()
+        response_cache.cache.clear()
+
+    def get(self, url, **headers):
+        hits = response_cache.hits
+        response = self.client.get(url, headers=headers)
+        return response, response_cache.hits > hits
+
+    def change(self, trip, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, value in fields.items():
+                setattr(trip, name, value)
+            trip.save()
+
+    def test_detail_is_cached_until_the_trip_changes(self):
+        url = f'/trips/{self.trip.pk}'
+        first, hit = self.get(url)
+        self.assertFalse(hit)
+        second, hit = self.get(url)
+        self.assertTrue(hit)
+        self.assertEqual(second.content, first.content)
+
+        self.change(self.trip, dropoff_location='Houston, TX')
+        third, hit = self.get(url)
+        self.assertFalse(hit)
+        self.assertIn(b'Houston, TX', third.content)
+
+    def test_other_trips_stay_cached(self):
+        self.get(f'/trips/{self.other.pk}')
+        self.change(self.trip, current_location='Denver, CO')
+        self.assertTrue(self.get(f'/trips/{self.other.pk}')[1])
+        self.assertFalse(self.get('/trips/')[1])
+
+    def test_list_is_invalidated_by_any_trip(self):
+        self.get('/trips/')
+        self.assertTrue(self.get('/trips/')[1])
+        self.change(self.other, current_location='Denver, CO')
+        response, hit = self.get('/trips/')
+        self.assertFalse(hit)
+        self.assertIn(b'Denver, CO', response.content)
+
+    def test_not_modified_until_invalidated(self):
+        url = f'/trips/{self.trip.pk}/logs/'
+        etag = self.get(url)[0]['ETag']
+        self.assertEqual(self.get(url, if_none_match=etag)[0].status_code, 304)
+
+        self.change(self.trip, total_distance=2600)
+        response, hit = self.get(url, if_none_match=etag)
+        self.assertFalse(hit)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_uncommitted_writes_keep_the_token(self):
+        url = f'/trips/{self.trip.pk}'
+        self.get(url)
+        self.trip.current_location = 'Denver, CO'
+        self.trip.save()
+        # on_commit hasn't run: the write isn't visible to other connections yet
+        self.assertTrue(self.get(url)[1])
+
+    def test_disabled(self):
+        with override_settings(RESPONSE_CACHE_ENABLED=False):
+            self.get(f'/trips/{self.trip.pk}')
+            self.assertFalse(self.get(f'/trips/{self.trip.pk}')[1])
+
+    def test_deleting_a_driver_invalidates_everything(self):
+        driver = Driver.objects.create(name='Test')
+        self.change(self.trip, driver=driver)
+        url = f'/trips/{self.trip.pk}'
+        self.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            driver.delete()
+        response, hit = self.get(url)
+        self.assertFalse(hit)
+        self.assertEqual(response.json()['trip']['driver'], None)
+
+
+class SharedBackendCheckTests(SimpleTestCase):
+    def test_locmem_is_refused_when_enabled(self):
+        with override_settings(RESPONSE_CACHE_ENABLED=True, RESPONSE_CACHE_BACKEND='locmem'):
+            self.assertEqual([error.id for error in check_shared_backend(None)], ['cmvdb.E001'])
+        with override_settings(RESPONSE_CACHE_ENABLED=True, RESPONSE_CACHE_BACKEND='file'):
+            self.assertEqual(check_shared_backend(None), [])
+        with override_settings(RESPONSE_CACHE_ENABLED=False, RESPONSE_CACHE_BACKEND='locmem'):
+            self.assertEqual(check_shared_backend(None), [])
@@ -0,0 +1,60 @@
+import random
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from cmvdb.road_graph import RoadGraph
+from cmvdb.routing_backends import LocalGraphBackend
+
+
+class RoadGraphTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = str(Path(cls.tmp.name) / 'graph.json.gz')
+        call_command('make_road_graph', '--output', cls.path, '--spacing', '2', stdout=StringIO())
+        cls.graph = RoadGraph.load(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def edge_length(self, u, v):
+        graph = self.graph
+        return min(graph.lengths[i] for i in range(graph.offsets[u], graph.offsets[u + 1]) if graph.targets[i] == v)
+
+    def test_astar_matches_dijkstra(self):
+        rng = random.Random(7)
+        for _ in range(25):
+            source, target = rng.randrange(self.graph.node_count), rng.randrange(self.graph.node_count)
+            with self.subTest(source=source, target=target):
+                meters, path = self.graph.shortest_path(source, target)
+                dijkstra_meters, _ = self.graph.shortest_path(source, target, heuristic=False)
+                self.assertAlmostEqual(meters, dijkstra_meters, places=6)
+                self.assertEqual((path[0], path[-1]), (source, target))
+                self.assertAlmostEqual(sum(self.edge_length(u, v) for u, v in zip(path, path[1:])), meters, places=6)
+
+    def test_unreachable_and_trivial_paths(self):
+        graph = RoadGraph([0.0, 1.0, 2.0], [0.0, 0.0, 0.0], [0, 1], [1, 0], [120000.0, 120000.0])
+        self.assertIsNone(graph.shortest_path(0, 2))
+        self.assertEqual(graph.shortest_path(1, 1), (0.0, [1]))
+        self.assertEqual(graph.shortest_path(0, 1), (120000.0, [0, 1]))
+
+    def test_places_and_nearest_node(self):
+        chicago = self.graph.find_place('Chicago, IL')
+        self.assertEqual(self.graph.find_place('chicago'), chicago)
+        self.assertIsNone(self.graph.find_place('Atlantis'))
+        self.assertEqual(self.graph.nearest_node(-87.63, 41.88), chicago)
+
+    def test_local_backend(self):
+        backend = LocalGraphBackend(path=self.path, speed=25)
+        start, end = backend.geocode('Chicago, IL'), backend.geocode('Dallas, TX')
+        route = backend.directions(start, end, 'driving-hgv')
+        self.assertEqual((route['coordinates'][0], route['coordinates'][-1]), (start, end))
+        self.assertAlmostEqual(route['duration'], route['distance'] / 25, places=0)
+        self.assertGreater(route['distance'], 1_200_000)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cmvdb.geocoding import geocode_cache, geocode_locations
+from cmvdb.models import RouteCacheEntry
+from cmvdb.routing import RouteCache, get_route, route_cache, route_key
+
+from .utils import ORSStubTestCase
+
+
+class RouteCacheTests(ORSStubTestCase):
+    def setUp(self):
+        super().setUp()
+        geocode_cache.clear()
+        self.pickup, self.dropoff = geocode_locations(['Chicago, IL', 'Dallas, TX'])
+
+    def test_miss_then_hit(self):
+        hits, misses = route_cache.hits, route_cache.misses
+        first = get_route(self.pickup, self.dropoff)
+        second = get_route(self.pickup, self.dropoff)
+        self.assertEqual(self.stub.counts['directions'], 1)
+        self.assertEqual((route_cache.hits, route_cache.misses), (hits + 1, misses + 1))
+        self.assertEqual(second['distance'], first['distance'])
+        self.assertEqual(second['coordinates'], first['coordinates'])
+
+    def test_nearby_coordinates_share_a_key(self):
+        nudged = [self.pickup[0] + 1e-6, self.pickup[1] - 1e-6]
+        self.assertEqual(route_key(nudged, self.dropoff), route_key(self.pickup, self.dropoff))
+        get_route(self.pickup, self.dropoff)
+        get_route(nudged, self.dropoff)
+        self.assertEqual(self.stub.counts['directions'], 1)
+
+    def test_profiles_are_kept_apart(self):
+        self.assertNotEqual(route_key(self.pickup, self.dropoff, 'driving-hgv'),
+                            route_key(self.pickup, self.dropoff, 'driving-car'))
+
+    def test_size_bounded(self):
+        cache = RouteCache(ttl=60, max_entries=2)
+        route = get_route(self.pickup, self.dropoff)
+        for offset in range(4):
+            cache.set(f'lane-{offset}', 'driving-car', route)
+        self.assertEqual(RouteCacheEntry.objects.count(), 2)
+        self.assertEqual(cache.get('lane-0'), None)
+        self.assertIsNotNone(cache.get('lane-3'))
+
+
+class RouteCacheWriteTests(TestCase):
+    ROUTE = {'distance': 1000.0, 'duration': 60.0, 'coordinates': [[-87.63, 41.88], [-96.8, 32.78]]}
+
+    def setUp(self):
+        self.cache = RouteCache(ttl=60, max_entries=2, touch_interval=600, evict_interval=300)
+        self.cache.set('lane', 'driving-car', self.ROUTE)
+
+    def updates(self, fn, *args):
+        with CaptureQueriesContext(connection) as captured:
+            fn(*args)
+        return [query['sql'] for query in captured.captured_queries if not query['sql'].startswith('SELECT')]
+
+    def test_hits_are_read_only(self):
+        for _ in range(3):
+            self.assertEqual(self.updates(self.cache.get, 'lane'), [])
+        self.assertEqual(self.cache.hits, 3)
+
+    def test_hits_are_written_back_after_touch_interval(self):
+        self.cache.get('lane')
+        self.cache.get('lane')
+        RouteCacheEntry.objects.update(last_used_at=timezone.now() - timedelta(seconds=601))
+        [sql] = self.updates(self.cache.get, 'lane')
+        self.assertTrue(sql.startswith('UPDATE'))
+        entry = RouteCacheEntry.objects.get()
+        self.assertEqual(entry.hits, 3)
+        self.assertGreater(entry.last_used_at, timezone.now() - timedelta(seconds=60))
+
+    def test_set_evicts_once_per_interval(self):
+        # the first set() in setUp evicted; these only upsert
+        for offset in range(3):
+            self.assertEqual(len(self.updates(self.cache.set, f'lane-{offset}', 'driving-car', self.ROUTE)), 1)
+        self.assertEqual(RouteCacheEntry.objects.count(), 4)
+        self.assertEqual(self.cache.evict(), 2)
+        self.assertEqual(RouteCacheEntry.objects.count(), 2)
+
+    def test_expired_entries_are_evicted(self):
+        RouteCacheEntry.objects.update(expires_at=timezone.now())
+        self.assertIsNone(self.cache.get('lane'))
+        call_command('route_cache', '--evict', stdout=StringIO())
+        self.assertFalse(RouteCacheEntry.objects.exists())
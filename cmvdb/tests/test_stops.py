@@ -0,0 +1,67 @@
+import gzip
+import json
+import math
+import random
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from cmvdb.stops import METERS_PER_DEGREE, POI_KINDS, POIIndex
+
+
+def brute_force(pois, lon, lat, kinds=POI_KINDS, max_meters=math.inf):
+    """nearest() by measuring every POI with the same equirectangular distance."""
+    x_scale = math.cos(math.radians(lat)) * METERS_PER_DEGREE
+    candidates = [
+        (math.hypot((poi_lon - lon) * x_scale, (poi_lat - lat) * METERS_PER_DEGREE), name)
+        for poi_lon, poi_lat, name, kind in pois if kind in kinds
+    ]
+    meters, name = min(candidates, default=(math.inf, None))
+    return (meters, name) if meters <= max_meters else None
+
+
+class POIIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(3)
+        cls.pois = [[rng.uniform(-124, -67), rng.uniform(25, 49), f'poi-{i}', rng.choice(POI_KINDS)]
+                    for i in range(3000)]
+        cls.index = POIIndex(*zip(*cls.pois))
+
+    def nearest(self, *args, **kwargs):
+        found = self.index.nearest(*args, **kwargs)
+        return found and (found[0], found[1]['name'])
+
+    def test_matches_brute_force(self):
+        rng = random.Random(4)
+        for _ in range(200):
+            lon, lat = rng.uniform(-126, -65), rng.uniform(24, 50)
+            kinds = rng.choice([POI_KINDS, ('rest_area',), ('truck_stop', 'fuel')])
+            with self.subTest(lon=lon, lat=lat, kinds=kinds):
+                meters, name = self.nearest(lon, lat, kinds)
+                expected_meters, expected_name = brute_force(self.pois, lon, lat, kinds)
+                self.assertAlmostEqual(meters, expected_meters, places=6)
+                self.assertEqual(name, expected_name)
+
+    def test_max_meters(self):
+        lon, lat = -100.05, 38.05
+        meters, _ = brute_force(self.pois, lon, lat)
+        self.assertIsNone(self.index.nearest(lon, lat, max_meters=meters * 0.99))
+        self.assertEqual(self.nearest(lon, lat, max_meters=meters * 1.01), brute_force(self.pois, lon, lat))
+
+    def test_outside_the_grid_and_empty(self):
+        self.assertEqual(self.nearest(-130.0, 20.0), brute_force(self.pois, -130.0, 20.0))
+        self.assertIsNone(POIIndex([], [], [], []).nearest(-100.0, 38.0))
+        self.assertIsNone(self.index.nearest(-100.0, 38.0, kinds=('weigh_station',)))
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'pois.json.gz'
+            with gzip.open(path, 'wt') as f:
+                json.dump({'pois': self.pois[:50]}, f)
+            index = POIIndex.load(path)
+        self.assertEqual(len(index), 50)
+        meters, poi = index.nearest(*self.pois[7][:2])
+        self.assertEqual((meters, poi['name'], poi['kind']), (0, 'poi-7', self.pois[7][3]))
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from cmvdb.models import Trip
+from cmvdb.ors_client import async_ors_client, ors_client
+from cmvdb.ors_stub import start_in_thread
+from cmvdb.routing_backends import get_backend
+
+START = datetime(2024, 3, 4, 6, tzinfo=timezone.utc)
+
+
+def make_trip(miles, **kwargs):
+    """An unsaved trip from Chicago to Dallas; keyword arguments override any field."""
+    fields = {
+        'current_location': 'test', 'pickup_location': 'Chicago, IL', 'dropoff_location': 'Dallas, TX',
+        'current_cycle_hours': 0, 'total_distance': miles, 'start_time': START,
+    }
+    fields.update(kwargs)
+    trip = Trip(**fields)
+    if trip.total_distance is not None:
+        trip.fuel_stops = int(trip.total_distance // 1000)
+    return trip
+
+
+class ORSStubMixin:
+    """Points both ORS clients at a local ors_stub server; its call counts are in self.stub.counts."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = start_in_thread()
+        cls.base_urls = (ors_client.base_url, async_ors_client.base_url)
+        ors_client.base_url = async_ors_client.base_url = cls.stub.base_url
+
+    @classmethod
+    def tearDownClass(cls):
+        ors_client.base_url, async_ors_client.base_url = cls.base_urls
+        cls.stub.shutdown()
+        super().tearDownClass()
+
+    def setUp(self):
+        get_backend.cache_clear()
+        self.stub.counts.clear()
+
+    def tearDown(self):
+        get_backend.cache_clear()
+
+
+@override_settings(ROUTING_BACKEND='cmvdb.routing_backends.ORSBackend')
+class ORSStubTestCase(ORSStubMixin, TestCase):
+    pass
+
+
+@override_settings(ROUTING_BACKEND='cmvdb.routing_backends.ORSBackend')
+class ORSStubTransactionTestCase(ORSStubMixin, TransactionTestCase):
+    """For the async views, whose DB work runs on other threads and so can't see a TestCase's transaction."""
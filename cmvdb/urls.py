@@ -17,7 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from django.views.generic.base import RedirectView
-from cmvdb import views
+from cmvdb import async_views, views
 
 
 
@@ -27,5 +27,20 @@ urlpatterns = [
     path('trips/', views.trip_list),
     path('trips/<int:id>', views.trip_detail),
     path('trips/<int:id>/route', views.trip_route),
+    path('trips/<int:id>/route/geometry', views.trip_route_geometry),
+    path('trips/route/batch', views.trip_route_batch),
+    path('trips/export', views.trip_export),
+    path('trips/bulk', views.trip_bulk),
     path('trips/<int:trip_id>/logs/', views.TripLogView.as_view(), name='trip_log_view'),  
+    path('trips/<int:id>/cycle', views.trip_cycle),
+    path('trips/<int:trip_id>/status', views.trip_status),
+    path('drivers/<int:id>/log-sheets', views.driver_log_sheets),
+    path('vehicles/<int:id>/log-sheets', views.vehicle_log_sheets),
+    path('jobs/<int:id>', views.route_job_detail),
+    path('cache/stats', views.cache_stats),
+    path('metrics', views.metrics),
+    path('async/trips/', async_views.trip_list),
+    path('async/trips/<int:id>/route', async_views.trip_route),
+    path('async/trips/<int:trip_id>/logs/', async_views.trip_logs),
+    path('async/trips/<int:trip_id>/status/stream', async_views.trip_status_stream),
 ]
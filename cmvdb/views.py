@@ -1,19 +1,39 @@
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
-from cmvdb import settings
-from .models import Trip
-from .serializers import TripSerializer
+from .batch import plan_routes_batch
+from .export import CONTENT_TYPES, EXPORT_FORMATS, export_trips
+from .geocoding import geocode_cache
+from .history import recent_log_sheets
+from .hos import CycleError
+from .ingest import ingest_trips, parse_ndjson
+from .listing import ListingError, trip_page
+from .metrics import registry, timer
+from .models import Driver, RouteJob, Trip, Vehicle, log_sheets_digest
+from .ors_client import ors_client
+from .polyline import MAX_ZOOM
+from .response_cache import cached_response, response_cache
+from .routing import GEOMETRY_FORMATS, RoutingError, plan_route, route_cache, route_geometry, wants_geometry
+from .serializers import TripSerializer, render_json
 from rest_framework.decorators import api_view         
-import requests
 
 @api_view(['GET', 'POST'])
+@cached_response()
 def trip_list(request):
     if request.method == 'GET':
-        trips = Trip.objects.all()
-        serializer = TripSerializer(trips, many=True)
-        return JsonResponse({"trips": serializer.data})
+        try:
+            return HttpResponse(render_json(trip_page(request.query_params)), content_type='application/json')
+        except ListingError as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
     if request.method == 'POST':
         serializer = TripSerializer(data=request.data)
@@ -22,7 +42,23 @@ def trip_list(request):
             return JsonResponse({"trip": serializer.data}, status=201)
         return JsonResponse(serializer.errors, status=400)
 
+@api_view(['POST'])
+def trip_bulk(request):
+    # NDJSON bodies are parsed here; DRF only parses the JSON array form
+    if request.content_type == 'application/x-ndjson':
+        items = list(parse_ndjson(request.body.splitlines()))
+    else:
+        items = request.data.get('trips') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list):
+            return JsonResponse({"error": "Expected a JSON array of trips"}, status=400)
+    if len(items) > settings.INGEST_MAX_ROWS:
+        return JsonResponse({"error": f"At most {settings.INGEST_MAX_ROWS} trips per request"}, status=400)
+
+    result = ingest_trips(items)
+    return JsonResponse(result, status=201 if result["created"] else 400)
+
 @api_view(['GET', 'PUT', 'DELETE'])
+@cached_response('id')
 def trip_detail(request, id):
     try:
         trip = Trip.objects.get(pk=id)
@@ -44,81 +80,212 @@ def trip_detail(request, id):
         trip.delete()
         return JsonResponse({"message": "Trip deleted"}, status=204) 
     
-@api_view(['GET'])
+@api_view(['GET', 'POST'])
 def trip_route(request, id):
     try:
         trip = Trip.objects.get(pk=id)
     except Trip.DoesNotExist:
         return JsonResponse({"error": "Trip not found"}, status=404)
 
-    ORS_API_KEY = settings.ORS_API_KEY
-
-    def geocode_location(location):
-        geo_url = f"https://api.openrouteservice.org/geocode/search"
-        params = {
-            "api_key": ORS_API_KEY,
-            "text": location,
-            "size": 1
-        }
-        response = requests.get(geo_url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            coords = data['features'][0]['geometry']['coordinates'] 
-            return coords
-        else:
-            return None
+    if request.method == 'POST':
+        job = RouteJob.objects.create(trip=trip)
+        return JsonResponse(job.to_dict(), status=202)
 
-    pickup_coords = geocode_location(trip.pickup_location)
-    dropoff_coords = geocode_location(trip.dropoff_location)
+    try:
+        payload = plan_route(trip, geometry=wants_geometry(request.GET))
+    except RoutingError as e:
+        return JsonResponse({"error": e.message}, status=e.status_code)
 
-    if not pickup_coords or not dropoff_coords:
-        return JsonResponse({"error": "Failed to geocode one or both locations"}, status=400)
+    with timer('serialize'):
+        return JsonResponse(payload)
 
-    # route URL
-    directions_url = (
-        f"https://api.openrouteservice.org/v2/directions/driving-car"
-        f"?api_key={ORS_API_KEY}"
-        f"&start={pickup_coords[0]},{pickup_coords[1]}"
-        f"&end={dropoff_coords[0]},{dropoff_coords[1]}"
-    )
+# plain Django view, like trip_export, so ?format= reaches it
+@require_GET
+def trip_route_geometry(request, id):
+    fmt = request.GET.get('format', 'polyline')
+    if fmt not in GEOMETRY_FORMATS:
+        return JsonResponse({"error": f"'format' must be one of {', '.join(GEOMETRY_FORMATS)}"}, status=400)
+    zoom = request.GET.get('zoom')
+    if zoom is not None:
+        if not zoom.isdigit() or int(zoom) > MAX_ZOOM:
+            return JsonResponse({"error": f"'zoom' must be an integer from 0 to {MAX_ZOOM}"}, status=400)
+        zoom = int(zoom)
 
-    route_response = requests.get(directions_url)
+    polyline = Trip.objects.filter(pk=id).values_list('route_polyline', flat=True).first()
+    if polyline is None:
+        return JsonResponse({"error": "Trip not found"}, status=404)
+    if not polyline:
+        return JsonResponse({"error": "Trip has no planned route"}, status=404)
 
-    if route_response.status_code == 200:
-        route_info = route_response.json()
-        distance = route_info['features'][0]['properties']['summary']['distance']
-        total_distance = round(distance / 1609.34, 2)
-        trip.total_distance = total_distance
-        trip.current_location = trip.dropoff_location
-        trip.save()
+    return HttpResponse(render_json(route_geometry(id, polyline, fmt, zoom)), content_type='application/json')
 
-        # multiple log sheets
-        log_sheets = trip.generate_log_sheets()
+@api_view(['POST'])
+def trip_route_batch(request):
+    items = request.data.get('trips') if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        return JsonResponse({"error": "Expected a non-empty 'trips' list"}, status=400)
+    if len(items) > settings.ROUTE_BATCH_MAX_TRIPS:
+        return JsonResponse(
+            {"error": f"At most {settings.ROUTE_BATCH_MAX_TRIPS} trips per batch"}, status=400
+        )
 
-        return JsonResponse({
-            "route": route_info,
-            "log_sheets": log_sheets,
-            "total_days": len(log_sheets)
-        })
+    results = plan_routes_batch(items)
+    if request.data.get('stream', True):
+        lines = (json.dumps(result) + "\n" for result in results)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    results = list(results)
+    return JsonResponse({"results": results[:-1], **results[-1]})
+
+# plain Django view: DRF would treat ?format=csv as a renderer override
+@require_GET
+def trip_export(request):
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({"error": f"'format' must be one of {', '.join(EXPORT_FORMATS)}"}, status=400)
+    log_sheets = request.GET.get('log_sheets', 'true').lower() not in ('0', 'false', 'no')
+
+    try:
+        blocks = export_trips(fmt, request.GET, log_sheets=log_sheets)
+    except ListingError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    response = StreamingHttpResponse(blocks, content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="trips.{fmt}"'
+    return response
+
+def trip_log_response(request, trip_id):
+    """GET /trips/<id>/logs/, shared with the async view."""
+    try:
+        trip = Trip.objects.get(pk=trip_id)
+    except Trip.DoesNotExist:
+        return JsonResponse({"error": "Trip not found"}, status=404)
+
+    if trip.log_sheets_updated_at is None:
+        # bulk-created without stored sheets: built for this response, nothing is written on a GET
+        log_sheets = trip.generate_log_sheets()
+        etag, last_modified = f'"{log_sheets_digest(log_sheets)}"', None
     else:
-        return JsonResponse({"error": "Failed to fetch route information"}, status=route_response.status_code)
+        # sheets are persisted by Trip.save(), so clients can poll with conditional requests
+        log_sheets = None
+        etag, last_modified = f'"{trip.log_sheets_etag}"', trip.log_sheets_updated_at
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+    if not_modified is not None:
+        return not_modified
+
+    if log_sheets is None:
+        log_sheets = trip.stored_log_sheets()
+
+    # log sheets
+    response = JsonResponse({
+        "trip_id": trip_id,
+        "pickup": trip.pickup_location,
+        "dropoff": trip.dropoff_location,
+        "total_distance": trip.total_distance,
+        "log_sheets": log_sheets,
+        "total_days": len(log_sheets)
+    })
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
 
 class TripLogView(View):
+    @method_decorator(cached_response('trip_id'))
     def get(self, request, trip_id):
-        try:
-            trip = Trip.objects.get(pk=trip_id)
-        except Trip.DoesNotExist:
-            return JsonResponse({"error": "Trip not found"}, status=404)
-        
-  
-        log_sheets = trip.generate_log_sheets()  
-        
-        # log sheets
-        return JsonResponse({
-            "trip_id": trip_id,
-            "pickup": trip.pickup_location,
-            "dropoff": trip.dropoff_location,
-            "total_distance": trip.total_distance,
-            "log_sheets": log_sheets,
-            "total_days": len(log_sheets)
-        })
\ No newline at end of file
+        return trip_log_response(request, trip_id)
+
+
+@api_view(['GET', 'POST'])
+def trip_cycle(request, id):
+    try:
+        trip = Trip.objects.select_related('driver').get(pk=id)
+    except Trip.DoesNotExist:
+        return JsonResponse({"error": "Trip not found"}, status=404)
+    if trip.driver is None:
+        return JsonResponse({"error": "Trip has no driver"}, status=400)
+
+    # GET previews the trip against the driver's cycle; POST records it there
+    try:
+        if request.method == 'GET':
+            log_sheets, cycle = trip.driver.plan_trip(trip)
+        else:
+            with transaction.atomic():
+                driver = Driver.objects.select_for_update().get(pk=trip.driver_id)
+                log_sheets, cycle = driver.plan_trip(trip)
+                driver.store_cycle(cycle)
+    except CycleError as e:
+        return JsonResponse({"error": str(e)}, status=409)
+
+    return JsonResponse({
+        "trip_id": trip.pk,
+        "driver_id": trip.driver_id,
+        "log_sheets": log_sheets,
+        "total_days": len(log_sheets),
+        "cycle": cycle.summary(),
+    })
+
+
+@api_view(['GET'])
+def trip_status(request, trip_id):
+    try:
+        trip = Trip.objects.get(pk=trip_id)
+    except Trip.DoesNotExist:
+        return JsonResponse({"error": "Trip not found"}, status=404)
+
+    return JsonResponse({"trip_id": trip_id, **trip.duty_status()})
+
+
+@api_view(['GET'])
+def driver_log_sheets(request, id):
+    driver = Driver.objects.filter(pk=id).values('id', 'name').first()
+    if driver is None:
+        return JsonResponse({"error": "Driver not found"}, status=404)
+
+    try:
+        history = recent_log_sheets(request.query_params, driver_id=id)
+    except ListingError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return HttpResponse(render_json({"driver": driver, **history}), content_type='application/json')
+
+
+@api_view(['GET'])
+def vehicle_log_sheets(request, id):
+    vehicle = Vehicle.objects.filter(pk=id).values('id', 'unit_number').first()
+    if vehicle is None:
+        return JsonResponse({"error": "Vehicle not found"}, status=404)
+
+    try:
+        history = recent_log_sheets(request.query_params, vehicle_id=id)
+    except ListingError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return HttpResponse(render_json({"vehicle": vehicle, **history}), content_type='application/json')
+
+
+@api_view(['GET'])
+def cache_stats(request):
+    return JsonResponse({
+        "geocode": geocode_cache.stats(),
+        "route": route_cache.stats(),
+        "responses": response_cache.stats(),
+        "ors_circuit": ors_client.breaker.state,
+    })
+
+
+# plain Django view: Prometheus scrapes text, not a DRF-negotiated response
+@require_GET
+def metrics(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET'])
+def route_job_detail(request, id):
+    try:
+        job = RouteJob.objects.get(pk=id)
+    except RouteJob.DoesNotExist:
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    return JsonResponse(job.to_dict(include_result=True))